@@ -0,0 +1,201 @@
+"""
+Multiplexed WebSocket channel: requests, responses and stream events for any
+number of sessions over one connection.
+
+Client frames are JSON `{"id", "op", "body", "idempotency_key"?}`. Each is
+answered by `{"type": "response", "id", "ok", "body" | "error"}`; responses
+arrive in completion order, not request order. `subscribe` /
+`unsubscribe` attach the connection to a session's event stream, delivered
+as `{"type": "event", "event_id", "event"}` frames (the same ids as the SSE
+`id:` field, so `last_event_id` resumes after a reconnect).
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import aclosing, suppress
+from dataclasses import dataclass
+import json
+from typing import Any, Awaitable, Callable
+
+from fastapi import WebSocket
+from pydantic import BaseModel, ValidationError
+
+from core.config import settings
+from core.event_bus import EventBus
+from core.schemas import (
+    ChannelError,
+    ChannelRequest,
+    ChannelResponse,
+    ChannelSubscribeRequest,
+    ChannelUnsubscribeRequest,
+)
+
+
+@dataclass(frozen=True)
+class ChannelCall:
+    """Per-request context handed to an operation handler."""
+
+    idempotency_key: str | None
+    is_disconnected: Callable[[], Awaitable[bool]]
+
+
+@dataclass(frozen=True)
+class ChannelOperation:
+    request_model: type[BaseModel]
+    handler: Callable[[Any, ChannelCall], Awaitable[BaseModel | dict[str, Any]]]
+    # Typed service errors (with `status_code` and `error_code`) reported to the client as-is.
+    errors: tuple[type[Exception], ...] = ()
+
+
+class ChannelConnection:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        operations: dict[str, ChannelOperation],
+        event_bus: EventBus,
+        max_inflight: int | None = None,
+    ) -> None:
+        self._websocket = websocket
+        self._operations = operations
+        self._event_bus = event_bus
+        self._inflight = asyncio.Semaphore(max_inflight or settings.channel_max_inflight)
+        # Bounded, so a slow client pushes back on its event subscriptions (and their overflow policy).
+        self._outgoing: asyncio.Queue[str] = asyncio.Queue(maxsize=settings.event_queue_size)
+        self._requests: set[asyncio.Task[None]] = set()
+        self._subscriptions: dict[str, asyncio.Task[None]] = {}
+        self._closed = False
+
+    async def serve(self) -> None:
+        await self._websocket.accept()
+        writer = asyncio.create_task(self._write())
+        try:
+            while True:
+                message = await self._websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                raw = message.get("text")
+                if raw is None:
+                    raw = (message.get("bytes") or b"").decode("utf-8", errors="replace")
+                try:
+                    request = ChannelRequest.model_validate_json(raw)
+                except ValidationError as exc:
+                    await self._respond_error(_request_id(raw), 422, _validation_message(exc), "invalid_request")
+                    continue
+                # Wait for a free slot before reading on, so one connection cannot queue unbounded work.
+                await self._inflight.acquire()
+                task = asyncio.create_task(self._handle(request))
+                self._requests.add(task)
+                task.add_done_callback(self._request_done)
+        finally:
+            self._closed = True
+            for task in [*self._requests, *self._subscriptions.values(), writer]:
+                task.cancel()
+            await asyncio.gather(*self._requests, *self._subscriptions.values(), writer, return_exceptions=True)
+
+    def _request_done(self, task: asyncio.Task[None]) -> None:
+        self._requests.discard(task)
+        self._inflight.release()
+        if not task.cancelled() and task.exception() is not None:
+            # The client already got an internal_error response; report the bug like an unhandled route error.
+            asyncio.get_running_loop().call_exception_handler(
+                {"message": "Unhandled error in channel request", "exception": task.exception(), "task": task}
+            )
+
+    async def _is_disconnected(self) -> bool:
+        return self._closed
+
+    async def _write(self) -> None:
+        while True:
+            frame = await self._outgoing.get()
+            await self._websocket.send_text(frame)
+
+    async def _handle(self, request: ChannelRequest) -> None:
+        if request.op == "subscribe":
+            await self._subscribe(request)
+            return
+        if request.op == "unsubscribe":
+            await self._unsubscribe(request)
+            return
+        operation = self._operations.get(request.op)
+        if operation is None:
+            await self._respond_error(request.id, 404, f"Unknown op '{request.op}'", "unknown_op")
+            return
+        try:
+            body = operation.request_model.model_validate(request.body)
+        except ValidationError as exc:
+            await self._respond_error(request.id, 422, _validation_message(exc), "invalid_request")
+            return
+        call = ChannelCall(idempotency_key=request.idempotency_key, is_disconnected=self._is_disconnected)
+        try:
+            result = await operation.handler(body, call)
+        except operation.errors as exc:
+            await self._respond_error(request.id, exc.status_code, str(exc), exc.error_code)  # type: ignore[attr-defined]
+            return
+        except Exception:
+            await self._respond_error(request.id, 500, "Internal error", "internal_error")
+            raise
+        payload = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+        await self._send(ChannelResponse(id=request.id, ok=True, body=payload).model_dump_json())
+
+    async def _subscribe(self, request: ChannelRequest) -> None:
+        try:
+            body = ChannelSubscribeRequest.model_validate(request.body)
+        except ValidationError as exc:
+            await self._respond_error(request.id, 422, _validation_message(exc), "invalid_request")
+            return
+        previous = self._subscriptions.pop(body.session_id, None)
+        if previous is not None:
+            previous.cancel()
+        # Acknowledge first; the subscription's replay covers anything published meanwhile.
+        await self._send(ChannelResponse(id=request.id, ok=True, body={"session_id": body.session_id}).model_dump_json())
+        self._subscriptions[body.session_id] = asyncio.create_task(self._forward(body))
+
+    async def _unsubscribe(self, request: ChannelRequest) -> None:
+        try:
+            body = ChannelUnsubscribeRequest.model_validate(request.body)
+        except ValidationError as exc:
+            await self._respond_error(request.id, 422, _validation_message(exc), "invalid_request")
+            return
+        task = self._subscriptions.pop(body.session_id, None)
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        body_out = {"session_id": body.session_id, "subscribed": task is not None}
+        await self._send(ChannelResponse(id=request.id, ok=True, body=body_out).model_dump_json())
+
+    async def _forward(self, request: ChannelSubscribeRequest) -> None:
+        events = self._event_bus.subscribe(
+            request.session_id, last_event_id=request.last_event_id, overflow_policy=request.overflow
+        )
+        async with aclosing(events):
+            async for published in events:
+                # The event JSON was encoded once at publish time; only the envelope is per connection.
+                await self._send(f'{{"type":"event","event_id":{published.id},"event":{published.data}}}')
+        # The bus ended the subscription (disconnect overflow policy): tell the client to resume.
+        if self._subscriptions.get(request.session_id) is asyncio.current_task():
+            del self._subscriptions[request.session_id]
+        await self._send(json.dumps({"type": "unsubscribed", "session_id": request.session_id, "reason": "overflow"}))
+
+    async def _respond_error(self, request_id: str | None, status_code: int, message: str, error_code: str) -> None:
+        error = ChannelError(status_code=status_code, message=message, error_code=error_code)
+        await self._send(ChannelResponse(id=request_id, ok=False, error=error).model_dump_json())
+
+    async def _send(self, frame: str) -> None:
+        if not self._closed:
+            await self._outgoing.put(frame)
+
+
+def _request_id(raw: str) -> str | None:
+    with suppress(ValueError):
+        payload = json.loads(raw)
+        if isinstance(payload, dict) and isinstance(payload.get("id"), str):
+            return payload["id"]
+    return None
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'body'}: {error['msg']}" for error in exc.errors()
+    )
@@ -1,29 +1,68 @@
 from __future__ import annotations
 
-import json
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket
 from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 
+from app.channel import ChannelCall, ChannelConnection, ChannelOperation
+from core.config import settings
+from core.cpu_executor import CPUExecutor, LoopLagMonitor
 from core.event_bus import EventBus
-from core.planner_service import PlannerService
+from core.planner_service import IdempotencyKeyMismatchError, PlannerService, PlanningCancelledError
 from core.schemas import (
+    ActionPlan,
+    EventOverflowPolicy,
     PlanRequest,
     PlanSimulationRequest,
+    PlanSimulationResponse,
     ProviderValidationRequest,
+    ReplanRequest,
+    RuntimeStatsResponse,
+    TelemetryBatchRequest,
+    TelemetryBatchResponse,
     TelemetryEvent,
+    TelemetryHistoryResponse,
     VerifyRequest,
+    VerifyResponse,
+    VerifyStepRequest,
+    VerifyStepResponse,
 )
+from core.telemetry import GROUP_BY_FIELDS, TelemetryBatchError, TelemetryStore, parse_batch
+from core.telemetry_log import TelemetryLog
 from core.verifier_service import VerifierService
-from macos_use_adapter.adapter import ProviderConfigurationError
+from macos_use_adapter.adapter import MacOSUseAdapter, ProviderConfigurationError
 
 
-app = FastAPI(title="Orange Sidecar", version="0.1.0")
-
 _event_bus = EventBus()
-_planner = PlannerService(_event_bus)
-_verifier = VerifierService()
-_telemetry_events: list[TelemetryEvent] = []
+_cpu_executor = CPUExecutor()
+_loop_lag = LoopLagMonitor()
+_planner = PlannerService(_event_bus, adapter=MacOSUseAdapter(cpu_executor=_cpu_executor))
+_verifier = VerifierService(cpu_executor=_cpu_executor)
+_telemetry = TelemetryStore()
+_telemetry_log = TelemetryLog() if settings.telemetry_log else None
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    await _planner.startup()
+    _loop_lag.start()
+    if _telemetry_log is not None:
+        _telemetry_log.start()
+    try:
+        yield
+    finally:
+        if _telemetry_log is not None:
+            await _telemetry_log.stop()
+        await _loop_lag.stop()
+        await _planner.shutdown()
+        _cpu_executor.shutdown()
+
+
+app = FastAPI(title="Orange Sidecar", version="0.1.0", lifespan=lifespan)
 
 
 @app.get("/health")
@@ -31,28 +70,122 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/v1/plan")
-async def plan(request: PlanRequest) -> JSONResponse:
+async def _plan(request: PlanRequest, call: ChannelCall) -> ActionPlan:
+    return await _planner.plan(request, idempotency_key=call.idempotency_key, is_disconnected=call.is_disconnected)
+
+
+async def _simulate(request: PlanSimulationRequest, call: ChannelCall) -> PlanSimulationResponse:
+    return await _planner.simulate(
+        request, idempotency_key=call.idempotency_key, is_disconnected=call.is_disconnected
+    )
+
+
+async def _replan(request: ReplanRequest, call: ChannelCall) -> ActionPlan:
+    return await _planner.replan(request, is_disconnected=call.is_disconnected)
+
+
+async def _verify(request: VerifyRequest, _call: ChannelCall) -> VerifyResponse:
+    result = await _verifier.verify(request)
+    _planner.record_verification(request.session_id, success=result.status == "success")
+    if result.status == "failure":
+        _planner.invalidate_session_plan(request.session_id)
+    return result
+
+
+async def _verify_step(request: VerifyStepRequest, _call: ChannelCall) -> VerifyStepResponse:
+    result = await _verifier.verify_step(request)
+    if result.status == "failure":
+        _planner.invalidate_session_plan(request.session_id)
+    return result
+
+
+async def _record_telemetry(event: TelemetryEvent, _call: ChannelCall) -> dict[str, Any]:
+    _telemetry.record(event)
+    if _telemetry_log is not None:
+        _telemetry_log.append(event)
+    return {"status": "accepted", "count": len(_telemetry)}
+
+
+async def _record_telemetry_batch(batch: TelemetryBatchRequest, _call: ChannelCall) -> TelemetryBatchResponse:
+    limit = settings.telemetry_batch_max_events
+    if len(batch.events) > limit:
+        raise TelemetryBatchError(
+            f"Batch has {len(batch.events)} events; at most {limit} are accepted",
+            status_code=413,
+            error_code="telemetry_batch_too_large",
+        )
+    for event in batch.events:
+        _telemetry.record(event, sample_rate=batch.sample_rate)
+        if _telemetry_log is not None:
+            _telemetry_log.append(event)
+    sample_rate, flush_interval_s = _telemetry.batching_advice()
+    return TelemetryBatchResponse(
+        accepted=len(batch.events),
+        count=len(_telemetry),
+        sample_rate=sample_rate,
+        flush_interval_s=flush_interval_s,
+    )
+
+
+_PLANNER_ERRORS = (ProviderConfigurationError, PlanningCancelledError, IdempotencyKeyMismatchError)
+
+# Operations shared by the HTTP routes and the multiplexed WebSocket channel.
+_operations: dict[str, ChannelOperation] = {
+    "plan": ChannelOperation(PlanRequest, _plan, _PLANNER_ERRORS),
+    "plan.simulate": ChannelOperation(PlanSimulationRequest, _simulate, _PLANNER_ERRORS),
+    "plan.replan": ChannelOperation(ReplanRequest, _replan, _PLANNER_ERRORS),
+    "verify": ChannelOperation(VerifyRequest, _verify),
+    "verify.step": ChannelOperation(VerifyStepRequest, _verify_step),
+    "telemetry": ChannelOperation(TelemetryEvent, _record_telemetry),
+    "telemetry.batch": ChannelOperation(TelemetryBatchRequest, _record_telemetry_batch, (TelemetryBatchError,)),
+}
+
+
+async def _http(op: str, request: BaseModel, call: ChannelCall) -> JSONResponse:
+    operation = _operations[op]
     try:
-        plan_result = await _planner.plan(request)
-    except ProviderConfigurationError as exc:
+        result = await operation.handler(request, call)
+    except operation.errors as exc:
         raise HTTPException(
-            status_code=exc.status_code,
-            detail={"message": str(exc), "error_code": exc.error_code},
+            status_code=exc.status_code,  # type: ignore[attr-defined]
+            detail={"message": str(exc), "error_code": exc.error_code},  # type: ignore[attr-defined]
         ) from exc
-    return JSONResponse(plan_result.model_dump(mode="json"))
+    return JSONResponse(result.model_dump(mode="json") if isinstance(result, BaseModel) else result)
+
+
+@app.post("/v1/plan")
+async def plan(
+    request: PlanRequest,
+    http_request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+) -> JSONResponse:
+    return await _http("plan", request, ChannelCall(idempotency_key, http_request.is_disconnected))
 
 
 @app.post("/v1/plan/simulate")
-async def plan_simulate(request: PlanSimulationRequest) -> JSONResponse:
-    try:
-        simulation = await _planner.simulate(request)
-    except ProviderConfigurationError as exc:
-        raise HTTPException(
-            status_code=exc.status_code,
-            detail={"message": str(exc), "error_code": exc.error_code},
-        ) from exc
-    return JSONResponse(simulation.model_dump(mode="json"))
+async def plan_simulate(
+    request: PlanSimulationRequest,
+    http_request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+) -> JSONResponse:
+    return await _http("plan.simulate", request, ChannelCall(idempotency_key, http_request.is_disconnected))
+
+
+@app.post("/v1/plan/replan")
+async def plan_replan(request: ReplanRequest, http_request: Request) -> JSONResponse:
+    return await _http("plan.replan", request, ChannelCall(None, http_request.is_disconnected))
+
+
+@app.get("/v1/plan/cache")
+async def plan_cache_stats() -> JSONResponse:
+    payload = _planner.plan_cache_stats()
+    return JSONResponse(payload.model_dump(mode="json"))
+
+
+@app.get("/v1/plan/stats")
+async def planner_stats() -> JSONResponse:
+    payload = _planner.planner_stats()
+    return JSONResponse(payload.model_dump(mode="json"))
 
 
 @app.get("/v1/provider/status")
@@ -61,6 +194,12 @@ async def provider_status() -> JSONResponse:
     return JSONResponse(payload.model_dump(mode="json"))
 
 
+@app.get("/v1/provider/usage")
+async def provider_usage() -> JSONResponse:
+    payload = _planner.provider_usage()
+    return JSONResponse(payload.model_dump(mode="json"))
+
+
 @app.post("/v1/provider/validate")
 async def provider_validate(request: ProviderValidationRequest) -> JSONResponse:
     payload = await _planner.validate_provider(request)
@@ -73,32 +212,113 @@ async def models() -> JSONResponse:
     return JSONResponse(payload.model_dump(mode="json"))
 
 
+@app.get("/v1/runtime")
+async def runtime_stats() -> JSONResponse:
+    payload = RuntimeStatsResponse(
+        event_loop_lag=_loop_lag.snapshot(),
+        cpu_executor=_cpu_executor.snapshot(),
+        event_bus=_event_bus.snapshot(),
+    )
+    return JSONResponse(payload.model_dump(mode="json"))
+
+
 @app.post("/v1/verify")
-async def verify(request: VerifyRequest) -> JSONResponse:
-    result = await _verifier.verify(request)
-    return JSONResponse(result.model_dump(mode="json"))
+async def verify(request: VerifyRequest, http_request: Request) -> JSONResponse:
+    return await _http("verify", request, ChannelCall(None, http_request.is_disconnected))
+
+
+@app.post("/v1/verify/step")
+async def verify_step(request: VerifyStepRequest, http_request: Request) -> JSONResponse:
+    return await _http("verify.step", request, ChannelCall(None, http_request.is_disconnected))
 
 
 @app.post("/v1/telemetry")
-async def telemetry(event: TelemetryEvent) -> JSONResponse:
-    _telemetry_events.append(event)
-    if len(_telemetry_events) > 5_000:
-        del _telemetry_events[:1_000]
-    return JSONResponse({"status": "accepted", "count": len(_telemetry_events)})
+async def telemetry(event: TelemetryEvent, http_request: Request) -> JSONResponse:
+    return await _http("telemetry", event, ChannelCall(None, http_request.is_disconnected))
+
+
+@app.post("/v1/telemetry/batch")
+async def telemetry_batch(
+    http_request: Request,
+    sample_rate: float = Query(default=1.0, gt=0.0, le=1.0),
+) -> JSONResponse:
+    # The body is a JSON array or NDJSON, validated in one pass rather than through a request model.
+    try:
+        events = parse_batch(await http_request.body())
+    except TelemetryBatchError as exc:
+        raise HTTPException(
+            status_code=exc.status_code, detail={"message": str(exc), "error_code": exc.error_code}
+        ) from exc
+    batch = TelemetryBatchRequest.model_construct(events=events, sample_rate=sample_rate)
+    return await _http("telemetry.batch", batch, ChannelCall(None, http_request.is_disconnected))
 
 
 @app.get("/v1/telemetry")
 async def telemetry_recent(limit: int = 100) -> JSONResponse:
     safe_limit = max(1, min(limit, 1000))
-    recent = _telemetry_events[-safe_limit:]
+    recent = _telemetry.recent(safe_limit)
     return JSONResponse({"events": [e.model_dump(mode="json") for e in recent]})
 
 
+@app.get("/v1/telemetry/summary")
+async def telemetry_summary(windows: str = "60,300,3600", group_by: str = "stage") -> JSONResponse:
+    fields = [name.strip() for name in group_by.split(",") if name.strip()]
+    try:
+        windows_s = [int(value) for value in windows.split(",") if value.strip()]
+    except ValueError:
+        windows_s = []
+    if not windows_s or any(value <= 0 for value in windows_s):
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "windows must be positive integer seconds", "error_code": "invalid_windows"},
+        )
+    unknown = [name for name in fields if name not in GROUP_BY_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "message": f"Unknown group_by fields {unknown}; expected any of {list(GROUP_BY_FIELDS)}",
+                "error_code": "invalid_group_by",
+            },
+        )
+    payload = _telemetry.summary(windows_s, fields)
+    return JSONResponse(payload.model_dump(mode="json"))
+
+
+@app.get("/v1/telemetry/history")
+async def telemetry_history(
+    since: float | None = None,
+    until: float | None = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+) -> JSONResponse:
+    if _telemetry_log is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "message": "Telemetry log is disabled (ORANGE_TELEMETRY_LOG=0)",
+                "error_code": "telemetry_log_disabled",
+            },
+        )
+    # Segment reads and decompression stay off the event loop.
+    records = await asyncio.to_thread(_telemetry_log.read, since=since, until=until, limit=limit)
+    payload = TelemetryHistoryResponse(events=records, log=_telemetry_log.stats())
+    return JSONResponse(payload.model_dump(mode="json"))
+
+
 @app.get("/v1/events/{session_id}")
-async def events(session_id: str) -> StreamingResponse:
-    async def stream() -> str:
-        async for event in _event_bus.subscribe(session_id):
-            payload = json.dumps(event.model_dump(mode="json"))
-            yield f"event: {event.event}\ndata: {payload}\n\n"
+async def events(
+    session_id: str,
+    overflow: EventOverflowPolicy | None = None,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    # A malformed id replays the whole buffer rather than failing the reconnect.
+    resume_after = int(last_event_id) if last_event_id and last_event_id.strip().isdigit() else None
+    return StreamingResponse(
+        _event_bus.stream_sse(session_id, last_event_id=resume_after, overflow_policy=overflow),
+        media_type="text/event-stream",
+    )
+
 
-    return StreamingResponse(stream(), media_type="text/event-stream")
+@app.websocket("/v1/channel")
+async def channel(websocket: WebSocket) -> None:
+    await ChannelConnection(websocket, operations=_operations, event_bus=_event_bus).serve()
@@ -0,0 +1 @@
+"""Standalone sidecar micro-benchmarks (run with `python -m benchmarks.<name>`)."""
@@ -0,0 +1,64 @@
+"""
+AX summary compression time and size on synthetic trees of increasing size.
+
+    cd agent && python -m benchmarks.bench_ax_context --rounds 20
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from core.config import settings
+from macos_use_adapter.adapter import _CHARS_PER_TOKEN_ESTIMATE
+from macos_use_adapter.ax_context import compress_ax_summary
+
+
+WORDS = (
+    "inbox meeting invoice quarterly report draft archive flagged project update lunch travel "
+    "receipt newsletter build failed review request merge release notes standup"
+).split()
+ROLES = ["AXGroup", "AXRow", "AXCell", "AXStaticText", "AXButton", "AXImage", "AXScrollArea"]
+
+
+def synthetic_summary(target_chars: int, seed: int = 7) -> str:
+    """A mail-like tree with one relevant row buried deep in the list."""
+    rng = random.Random(seed)
+    lines = ['[1] depth=0 role=AXWindow title="Inbox (2,418 messages)" value="" enabled=true description=""']
+    count = 1
+    size = len(lines[0])
+    needle_at = target_chars * 4 // 5
+    while size < target_chars:
+        count += 1
+        depth = rng.randint(1, 5)
+        role = rng.choice(ROLES)
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+        if size >= needle_at:
+            role, title, needle_at = "AXRow", "Dentist appointment confirmation from Dr. Patel", target_chars * 2
+        line = f'[{count}] depth={depth} role={role} title="{title}" value="" enabled=true description=""'
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def main(rounds: int) -> None:
+    budget = settings.ax_context_budget_tokens * _CHARS_PER_TOKEN_ESTIMATE
+    transcript = "open the dentist appointment email"
+    for target in (4_000, 50_000, 200_000):
+        summary = synthetic_summary(target)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            compressed = compress_ax_summary(summary, transcript, budget_chars=budget)
+        per_call_ms = (time.perf_counter() - started) / rounds * 1000
+        truncated_hit = "Dentist" in summary[:3500]
+        print(
+            f"{len(summary) // 1000:4d}KB -> {len(compressed):5d} chars in {per_call_ms:6.2f}ms; "
+            f"relevant row kept: {'Dentist' in compressed} (blind [:3500] truncation: {truncated_hit})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rounds)
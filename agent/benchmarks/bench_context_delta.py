@@ -0,0 +1,71 @@
+"""
+Verifier context delta time at 1KB, 50KB and 500KB, against difflib's ratio().
+
+    cd agent && python -m benchmarks.bench_context_delta --rounds 20
+"""
+from __future__ import annotations
+
+import argparse
+from difflib import SequenceMatcher
+import random
+import time
+
+from core.context_delta import context_delta
+
+
+ROLES = ["AXGroup", "AXRow", "AXCell", "AXStaticText", "AXButton", "AXTextField"]
+
+
+def synthetic_context(target_chars: int, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    lines: list[str] = []
+    size = 0
+    while size < target_chars:
+        line = (
+            f'[{len(lines) + 1}] depth={rng.randint(0, 5)} role={rng.choice(ROLES)} '
+            f'title="Message {rng.randint(0, 99_999)}" value="{rng.randint(0, 9_999)}" enabled=true'
+        )
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def edited(context: str, fraction: float, seed: int = 3) -> str:
+    """Replace the value of roughly `fraction` of the elements."""
+    rng = random.Random(seed)
+    lines = context.split("\n")
+    for index in rng.sample(range(len(lines)), max(1, int(len(lines) * fraction))):
+        lines[index] = lines[index].replace('value="', 'value="edited ')
+    return "\n".join(lines)
+
+
+def _time_ms(fn, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main(rounds: int, difflib_max_kb: int) -> None:
+    for target in (1_000, 50_000, 500_000):
+        before = synthetic_context(target)
+        for label, after in (
+            ("small edit", edited(before, 0.02)),
+            ("rewritten", synthetic_context(target, seed=12)),
+        ):
+            fast_ms = _time_ms(lambda: context_delta(before, after), rounds)
+            line = f"{target // 1000:4d}KB {label:10s}: delta {context_delta(before, after):.3f} in {fast_ms:7.2f}ms"
+            if target // 1000 <= difflib_max_kb:
+                started = time.perf_counter()
+                ratio = SequenceMatcher(a=before, b=after).ratio()
+                difflib_ms = (time.perf_counter() - started) * 1000
+                line += f" | difflib delta {1 - ratio:.3f} in {difflib_ms:9.2f}ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--difflib-max-kb", type=int, default=50, help="skip the difflib baseline above this size")
+    args = parser.parse_args()
+    main(args.rounds, args.difflib_max_kb)
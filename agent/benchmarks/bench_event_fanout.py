@@ -0,0 +1,105 @@
+"""
+EventBus fan-out to thousands of subscribers, and memory under slow consumers, per overflow policy.
+
+    cd agent && python -m benchmarks.bench_event_fanout --subscribers 5000 --events 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from core.event_bus import OVERFLOW_POLICIES, EventBus
+from core.schemas import Action, StreamEvent
+
+
+SESSION_ID = "bench-fanout"
+
+
+def _events(count: int) -> list[StreamEvent]:
+    events: list[StreamEvent] = []
+    for index in range(count):
+        if index % 5 == 0:
+            action = Action(id=f"a{index}", kind="click", target="Send")
+            events.append(StreamEvent(session_id=SESSION_ID, event="planning_action", message="a", action=action))
+        else:
+            events.append(StreamEvent(session_id=SESSION_ID, event="planning_progress", message="p", progress=50))
+    return events
+
+
+async def run_fanout(subscribers: int, events: list[StreamEvent], policy: str) -> dict[str, float]:
+    bus = EventBus(overflow_policy=policy, replay_events=0)
+    done = asyncio.Event()
+    remaining = subscribers
+
+    async def consume() -> None:
+        nonlocal remaining
+        seen = 0
+        async for _ in bus.subscribe(SESSION_ID):
+            seen += 1
+            if seen == len(events):
+                break
+        remaining -= 1
+        if remaining == 0:
+            done.set()
+
+    consumers = [asyncio.create_task(consume()) for _ in range(subscribers)]
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    publish_s = 0.0
+    for event in events:
+        publish_started = time.perf_counter()
+        await bus.publish(event)
+        publish_s += time.perf_counter() - publish_started
+        # Let consumers drain between events, as a real planner awaits the provider.
+        await asyncio.sleep(0)
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*consumers)
+    return {
+        "publish_us": publish_s / len(events) * 1e6,
+        "deliveries_per_s": subscribers * len(events) / elapsed,
+        "dropped": bus.snapshot()["dropped_events"],
+    }
+
+
+async def run_slow_consumers(subscribers: int, events: list[StreamEvent], policy: str) -> dict[str, int]:
+    """Subscribers that never read: queues must stay bounded whatever the policy."""
+    bus = EventBus(overflow_policy=policy)
+    streams = [bus.subscribe(SESSION_ID) for _ in range(subscribers)]
+    waiters = [asyncio.ensure_future(anext(stream)) for stream in streams]
+    await asyncio.sleep(0)
+    tracemalloc.start()
+    for event in events:
+        await bus.publish(event)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    snapshot = bus.snapshot()
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    return {"peak_kb": peak // 1024, **snapshot}
+
+
+def main(subscribers: int, event_count: int) -> None:
+    events = _events(event_count)
+    print(f"{subscribers} subscribers on one session, {event_count} events (1 in 5 carries an action)")
+    for policy in OVERFLOW_POLICIES:
+        fanout = asyncio.run(run_fanout(subscribers, events, policy))
+        slow = asyncio.run(run_slow_consumers(subscribers, events, policy))
+        print(
+            f"{policy:11s}: publish {fanout['publish_us']:8.1f}us/event | "
+            f"{fanout['deliveries_per_s']:10.0f} deliveries/s | "
+            f"slow consumers: queued {slow['queued_events']:7d} dropped {slow['dropped_events']:8d} "
+            f"coalesced {slow['coalesced_events']:8d} disconnected {slow['disconnected_subscribers']:5d} "
+            f"peak {slow['peak_kb']}KB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    main(args.subscribers, args.events)
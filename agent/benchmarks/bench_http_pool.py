@@ -0,0 +1,95 @@
+"""
+Per-request latency of a fresh `httpx.AsyncClient` versus the shared pool.
+
+Runs against a local keep-alive stub so the numbers isolate client setup,
+TCP connect and connection reuse. Real Anthropic calls additionally pay DNS
+and TLS on every fresh client, so production savings are larger.
+
+    cd agent && python -m benchmarks.bench_http_pool --requests 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from macos_use_adapter.http_pool import ProviderConnectionPool
+
+
+_RESPONSE_HEAD = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"content-type: application/json\r\n"
+    b"content-length: 2\r\n"
+    b"connection: keep-alive\r\n\r\n"
+)
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(_RESPONSE_HEAD if head.startswith(b"HEAD ") else _RESPONSE_HEAD + b"{}")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _time_fresh_clients(url: str, count: int) -> list[float]:
+    samples: list[float] = []
+    for _ in range(count):
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=24.0) as client:
+            await client.post(url, json={"model": "stub"})
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def _time_pooled_client(base_url: str, url: str, count: int) -> list[float]:
+    pool = ProviderConnectionPool(base_url=base_url, keepalive_interval_s=0)
+    await pool.start()
+    samples: list[float] = []
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            await pool.client().post(url, json={"model": "stub"}, timeout=24.0)
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        await pool.aclose()
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<14} mean={statistics.fmean(samples):7.3f}ms  p50={statistics.median(samples):7.3f}ms  p95={p95:7.3f}ms")
+
+
+async def main(count: int) -> None:
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    url = f"{base_url}/v1/messages"
+    async with server:
+        fresh = await _time_fresh_clients(url, count)
+        pooled = await _time_pooled_client(base_url, url, count)
+    _report("fresh client", fresh)
+    _report("pooled client", pooled)
+    print(f"saved per request: {statistics.fmean(fresh) - statistics.fmean(pooled):.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,48 @@
+"""
+Per-command latency of the local intent engine.
+
+    cd agent && python -m benchmarks.bench_intent_engine --rounds 2000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from macos_use_adapter.intent_engine import LocalIntentEngine
+
+
+CORPUS = [
+    ("open Slack", "Finder"),
+    ("switch to Google Chrome", "Slack"),
+    ("go to github.com", "Safari"),
+    ("quit Spotify", "Finder"),
+    ("scroll down a little", "Safari"),
+    ("open a new tab", "Google Chrome"),
+    ("copy that", "Notes"),
+    ("paste", "Notes"),
+    ("undo", "TextEdit"),
+    ("choose the file menu new window", "Finder"),
+    ("new folder", "Finder"),
+    # Misses: these must fall through quickly too.
+    ("reply to the last email saying I will be late", "Mail"),
+    ("open Safari and go to openai.com", "Finder"),
+    ("click the blue submit button under the form", "Safari"),
+]
+
+
+def main(rounds: int) -> None:
+    engine = LocalIntentEngine()
+    for transcript, app_name in CORPUS:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            match = engine.match(transcript, app_name=app_name)
+        per_call_us = (time.perf_counter() - started) / rounds * 1_000_000
+        outcome = f"{match.intent} ({match.confidence:.2f})" if match else "fall through"
+        print(f"{per_call_us:7.2f}us  {transcript!r:<50} -> {outcome}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rounds)
@@ -0,0 +1,45 @@
+"""
+Planner JSON extraction time on complete and truncated responses of growing size.
+Time per KB should stay flat: the scanner is linear in the response length.
+
+    cd agent && python -m benchmarks.bench_json_extract --rounds 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from macos_use_adapter.json_extract import extract_json_object
+
+
+def response(action_count: int) -> str:
+    actions = [
+        {"id": f"a{index}", "kind": "type", "text": f"line {index} with \"quotes\" and {{braces}} ]", "timeout_ms": 3000}
+        for index in range(1, action_count + 1)
+    ]
+    plan = json.dumps({"summary": "Type the report", "confidence": 0.8, "actions": actions})
+    return f"Here is the plan:\n```json\n{plan}\n```\n"
+
+
+def main(rounds: int) -> None:
+    for action_count in (10, 100, 1_000, 10_000):
+        text = response(action_count)
+        truncated = text[: int(len(text) * 0.9)]
+        for label, sample in (("complete", text), ("truncated", truncated)):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                result = extract_json_object(sample)
+            elapsed_ms = (time.perf_counter() - started) / rounds * 1000
+            salvaged = len(result.payload["actions"]) if result else 0
+            print(
+                f"{label:>9} {len(sample) / 1000:8.1f}KB {elapsed_ms:8.3f}ms "
+                f"({elapsed_ms / (len(sample) / 1000) * 1000:6.1f}us/KB) actions={salvaged}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rounds)
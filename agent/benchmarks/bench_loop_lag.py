@@ -0,0 +1,104 @@
+"""
+Event-loop lag and SSE delivery latency while large verifies run, per CPU executor mode.
+
+    cd agent && python -m benchmarks.bench_loop_lag --rounds 6
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_context_delta import edited, synthetic_context
+from core.cpu_executor import EXECUTOR_MODES, CPUExecutor, LoopLagMonitor
+from core.event_bus import EventBus
+from core.schemas import Action, ActionPlan, StreamEvent, VerifyRequest
+from core.verifier_service import VerifierService
+
+
+SESSION_ID = "bench-loop-lag"
+PUBLISH_INTERVAL_S = 0.01
+
+
+def _verify_request(context_chars: int) -> VerifyRequest:
+    before = synthetic_context(context_chars)
+    plan = ActionPlan(
+        session_id=SESSION_ID,
+        actions=[Action(id="a1", kind="click", target="Message", expected_outcome="Message value edited")],
+        confidence=0.8,
+        risk_level="low",
+        requires_confirmation=False,
+    )
+    return VerifyRequest(
+        session_id=SESSION_ID,
+        action_plan=plan,
+        execution_result="success",
+        before_context=before,
+        after_context=edited(before, 0.05),
+    )
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+
+async def run_mixed_load(mode: str, request: VerifyRequest, rounds: int, concurrency: int) -> dict[str, float]:
+    executor = CPUExecutor(mode=mode)
+    verifier = VerifierService(cpu_executor=executor)
+    bus = EventBus()
+    monitor = LoopLagMonitor(interval_s=0.005)
+    delivery_ms: list[float] = []
+    stop = asyncio.Event()
+
+    async def consume() -> None:
+        async for published in bus.subscribe(SESSION_ID):
+            delivery_ms.append((time.perf_counter() - float(published.event.message)) * 1000)
+
+    async def produce() -> None:
+        while not stop.is_set():
+            await bus.publish(StreamEvent(session_id=SESSION_ID, event="progress", message=repr(time.perf_counter())))
+            await asyncio.sleep(PUBLISH_INTERVAL_S)
+
+    # Warm the pool (process start-up is not what is being measured).
+    await verifier.verify(request)
+    consumer = asyncio.create_task(consume())
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.05)
+    monitor.start()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(verifier.verify(request) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor.stop()
+    await producer
+    consumer.cancel()
+    executor.shutdown()
+    lag = monitor.snapshot()
+    return {
+        "verifies_per_s": rounds * concurrency / elapsed,
+        "lag_p99_ms": lag["p99_ms"] or 0.0,
+        "lag_max_ms": lag["max_ms"] or 0.0,
+        "delivery_p99_ms": _percentile(delivery_ms, 99),
+    }
+
+
+def main(rounds: int, context_kb: int, concurrency: int) -> None:
+    request = _verify_request(context_kb * 1000)
+    print(f"{concurrency} concurrent verifies of {context_kb}KB contexts x {rounds}, events every 10ms")
+    for mode in EXECUTOR_MODES:
+        result = asyncio.run(run_mixed_load(mode, request, rounds, concurrency))
+        print(
+            f"{mode:8s}: {result['verifies_per_s']:6.1f} verifies/s | loop lag p99 {result['lag_p99_ms']:7.2f}ms "
+            f"max {result['lag_max_ms']:7.2f}ms | SSE delivery p99 {result['delivery_p99_ms']:7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--context-kb", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=2)
+    args = parser.parse_args()
+    main(args.rounds, args.context_kb, args.concurrency)
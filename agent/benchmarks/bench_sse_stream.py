@@ -0,0 +1,74 @@
+"""
+Events per second per core on the SSE stream path: encoding per subscriber vs once per publish.
+
+    cd agent && python -m benchmarks.bench_sse_stream --subscribers 50 --events 2000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from core.event_bus import EventBus
+from core.schemas import Action, StreamEvent
+
+
+SESSION_ID = "bench-sse"
+
+
+def _event(index: int) -> StreamEvent:
+    if index % 5 == 0:
+        action = Action(id=f"a{index}", kind="type", text="Thanks, see you Friday!", expected_outcome="Reply typed")
+        return StreamEvent(session_id=SESSION_ID, event="planning_action", message="Action ready: type", action=action)
+    return StreamEvent(session_id=SESSION_ID, event="planning_progress", message="Planning", progress=index % 100)
+
+
+async def _legacy_stream(bus: EventBus) -> None:
+    """The previous /v1/events generator: dump and encode each event for each subscriber."""
+    async for published in bus.subscribe(SESSION_ID):
+        event = published.event
+        payload = json.dumps(event.model_dump(mode="json"))
+        yield f"id: {published.id}\nevent: {event.event}\ndata: {payload}\n\n".encode()
+
+
+async def run(mode: str, subscribers: int, events: list[StreamEvent]) -> float:
+    bus = EventBus(replay_events=0, queue_size=len(events))
+    delivered = 0
+
+    async def consume() -> None:
+        nonlocal delivered
+        stream = _legacy_stream(bus) if mode == "per-subscriber" else bus.stream_sse(SESSION_ID, heartbeat_s=0)
+        seen = 0
+        async for frame in stream:
+            delivered += len(frame) > 0
+            seen += 1
+            if seen == len(events):
+                break
+        await stream.aclose()
+
+    consumers = [asyncio.create_task(consume()) for _ in range(subscribers)]
+    await asyncio.sleep(0)
+    cpu_started = time.process_time()
+    for event in events:
+        await bus.publish(event)
+        await asyncio.sleep(0)
+    await asyncio.gather(*consumers)
+    cpu_s = time.process_time() - cpu_started
+    assert delivered == subscribers * len(events)
+    return delivered / cpu_s
+
+
+def main(subscribers: int, event_count: int) -> None:
+    events = [_event(index) for index in range(event_count)]
+    print(f"{event_count} events to {subscribers} subscribers (delivered frames per CPU second)")
+    for mode in ("per-subscriber", "encode-once"):
+        print(f"{mode:15s}: {asyncio.run(run(mode, subscribers, events)):10.0f} events/s/core")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=50)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.subscribers, args.events)
@@ -20,6 +20,68 @@ class Settings:
     anthropic_api_base: str = os.getenv("ANTHROPIC_API_BASE", "https://api.anthropic.com")
     safety_strictness: str = os.getenv("ORANGE_SAFETY_STRICTNESS", "strict")
     model_overrides_raw: str = os.getenv("ORANGE_MODEL_OVERRIDES", "")
+    data_dir_raw: str = os.getenv("ORANGE_DATA_DIR", "")
+    plan_cache_enabled: bool = os.getenv("ORANGE_PLAN_CACHE", "1") == "1"
+    plan_cache_capacity: int = int(os.getenv("ORANGE_PLAN_CACHE_CAPACITY", "256"))
+    plan_cache_ttl_s: float = float(os.getenv("ORANGE_PLAN_CACHE_TTL_S", "86400"))
+    local_intents_enabled: bool = os.getenv("ORANGE_LOCAL_INTENTS", "1") == "1"
+    local_intent_min_confidence: float = float(os.getenv("ORANGE_LOCAL_INTENT_MIN_CONFIDENCE", "0.85"))
+    hedge_mode: str = os.getenv("ORANGE_HEDGE_MODE", "off").strip().lower()
+    race_model_tiers: bool = os.getenv("ORANGE_RACE_MODEL_TIERS", "0") == "1"
+    hedge_default_delay_ms: int = int(os.getenv("ORANGE_HEDGE_DEFAULT_DELAY_MS", "2500"))
+    hedge_min_delay_ms: int = int(os.getenv("ORANGE_HEDGE_MIN_DELAY_MS", "400"))
+    hedge_min_samples: int = int(os.getenv("ORANGE_HEDGE_MIN_SAMPLES", "20"))
+    idempotency_ttl_s: float = float(os.getenv("ORANGE_IDEMPOTENCY_TTL_S", "120"))
+    simulation_reuse_ttl_s: float = float(os.getenv("ORANGE_SIMULATION_REUSE_TTL_S", "60"))
+    disconnect_poll_interval_s: float = float(os.getenv("ORANGE_DISCONNECT_POLL_INTERVAL_S", "0.2"))
+    ax_context_budget_tokens: int = int(os.getenv("ORANGE_AX_CONTEXT_TOKENS", "900"))
+    adaptive_routing: bool = os.getenv("ORANGE_ADAPTIVE_ROUTING", "1") == "1"
+    router_latency_target_ms: int = int(os.getenv("ORANGE_ROUTER_LATENCY_TARGET_MS", "6000"))
+    router_success_target: float = float(os.getenv("ORANGE_ROUTER_SUCCESS_TARGET", "0.85"))
+    router_min_samples: int = int(os.getenv("ORANGE_ROUTER_MIN_SAMPLES", "10"))
+    # Routing judges each model on its last N plans/verifications only, and every Nth request
+    # that escalates past a cheaper model goes to that model instead, so its record can recover.
+    router_window: int = int(os.getenv("ORANGE_ROUTER_WINDOW", "30"))
+    router_probe_every: int = int(os.getenv("ORANGE_ROUTER_PROBE_EVERY", "10"))
+    fast_max_tokens: int = int(os.getenv("ORANGE_FAST_MAX_TOKENS", "500"))
+    fast_ax_context_tokens: int = int(os.getenv("ORANGE_FAST_AX_CONTEXT_TOKENS", "350"))
+    fast_timeout_s: float = float(os.getenv("ORANGE_FAST_TIMEOUT_S", "10"))
+    # Above the 0.8 given to unknown app-shaped names: "start recording" must not open an app called "Recording".
+    fast_local_intent_min_confidence: float = float(os.getenv("ORANGE_FAST_LOCAL_INTENT_MIN_CONFIDENCE", "0.82"))
+    cpu_executor: str = os.getenv("ORANGE_CPU_EXECUTOR", "thread")
+    cpu_workers: int = int(os.getenv("ORANGE_CPU_WORKERS", "2"))
+    cpu_offload_min_chars: int = int(os.getenv("ORANGE_CPU_OFFLOAD_MIN_CHARS", "16384"))
+    step_verify_sessions: int = int(os.getenv("ORANGE_STEP_VERIFY_SESSIONS", "64"))
+    step_verify_ttl_s: float = float(os.getenv("ORANGE_STEP_VERIFY_TTL_S", "600"))
+    event_replay_events: int = int(os.getenv("ORANGE_EVENT_REPLAY_EVENTS", "256"))
+    event_replay_sessions: int = int(os.getenv("ORANGE_EVENT_REPLAY_SESSIONS", "256"))
+    event_replay_ttl_s: float = float(os.getenv("ORANGE_EVENT_REPLAY_TTL_S", "120"))
+    event_session_idle_s: float = float(os.getenv("ORANGE_EVENT_SESSION_IDLE_S", "900"))
+    event_queue_size: int = int(os.getenv("ORANGE_EVENT_QUEUE_SIZE", "100"))
+    event_overflow_policy: str = os.getenv("ORANGE_EVENT_OVERFLOW_POLICY", "drop_oldest")
+    event_heartbeat_s: float = float(os.getenv("ORANGE_EVENT_HEARTBEAT_S", "15"))
+    channel_max_inflight: int = int(os.getenv("ORANGE_CHANNEL_MAX_INFLIGHT", "16"))
+    telemetry_capacity: int = int(os.getenv("ORANGE_TELEMETRY_CAPACITY", "5000"))
+    telemetry_slot_s: float = float(os.getenv("ORANGE_TELEMETRY_SLOT_S", "10"))
+    telemetry_window_s: float = float(os.getenv("ORANGE_TELEMETRY_WINDOW_S", "3600"))
+    telemetry_max_series: int = int(os.getenv("ORANGE_TELEMETRY_MAX_SERIES", "512"))
+    telemetry_batch_max_events: int = int(os.getenv("ORANGE_TELEMETRY_BATCH_MAX_EVENTS", "1000"))
+    telemetry_target_events_per_s: float = float(os.getenv("ORANGE_TELEMETRY_TARGET_EVENTS_PER_S", "20"))
+    telemetry_flush_interval_s: float = float(os.getenv("ORANGE_TELEMETRY_FLUSH_INTERVAL_S", "5"))
+    telemetry_max_flush_interval_s: float = float(os.getenv("ORANGE_TELEMETRY_MAX_FLUSH_INTERVAL_S", "60"))
+    telemetry_log: bool = os.getenv("ORANGE_TELEMETRY_LOG", "1") == "1"
+    telemetry_log_flush_s: float = float(os.getenv("ORANGE_TELEMETRY_LOG_FLUSH_S", "1"))
+    telemetry_log_segment_bytes: int = int(os.getenv("ORANGE_TELEMETRY_LOG_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+    telemetry_log_segment_s: float = float(os.getenv("ORANGE_TELEMETRY_LOG_SEGMENT_S", "3600"))
+    telemetry_log_max_bytes: int = int(os.getenv("ORANGE_TELEMETRY_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+    telemetry_log_retention_s: float = float(os.getenv("ORANGE_TELEMETRY_LOG_RETENTION_S", str(7 * 24 * 3600)))
+    telemetry_log_max_pending: int = int(os.getenv("ORANGE_TELEMETRY_LOG_MAX_PENDING", "10000"))
+    replan_max_tokens: int = int(os.getenv("ORANGE_REPLAN_MAX_TOKENS", "500"))
+    stream_planning: bool = os.getenv("ORANGE_STREAM_PLANNING", "1") == "1"
+    provider_prewarm: bool = os.getenv("ORANGE_PROVIDER_PREWARM", "1") == "1"
+    provider_max_connections: int = int(os.getenv("ORANGE_PROVIDER_MAX_CONNECTIONS", "8"))
+    provider_keepalive_expiry_s: float = float(os.getenv("ORANGE_PROVIDER_KEEPALIVE_EXPIRY_S", "120"))
+    provider_keepalive_interval_s: float = float(os.getenv("ORANGE_PROVIDER_KEEPALIVE_INTERVAL_S", "45"))
 
     @property
     def repo_root(self) -> Path:
@@ -29,6 +91,13 @@ class Settings:
     def vendor_macos_use(self) -> Path:
         return self.repo_root / "vendor" / "macos-use"
 
+    @property
+    def data_dir(self) -> Path:
+        """Sidecar state directory (plan cache, telemetry); defaults to the app support folder."""
+        if self.data_dir_raw:
+            return Path(self.data_dir_raw).expanduser()
+        return Path.home() / "Library" / "Application Support" / "Orange" / "sidecar"
+
     @property
     def model_overrides(self) -> dict[str, str]:
         """
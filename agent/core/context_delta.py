@@ -0,0 +1,109 @@
+"""Bounded-time similarity estimate for before/after screen contexts."""
+from __future__ import annotations
+
+from collections import Counter
+from difflib import SequenceMatcher
+
+
+# Below this combined size an exact character diff is cheap, so it is used as-is.
+EXACT_LIMIT_CHARS = 1024
+# Changed lines compared character by character, per side; the rest is extrapolated.
+PAIR_BUDGET_CHARS = 4 * 1024
+# Longer changed spans (after trimming the shared prefix and suffix) are clipped before diffing.
+MAX_PAIR_LINE_CHARS = 256
+
+
+def similarity_ratio(before: str, after: str) -> float:
+    """
+    Estimate `SequenceMatcher(a=before, b=after, autojunk=False).ratio()`.
+
+    Identical lines are matched as hashed multisets in linear time. Lines left
+    over on each side are then aligned in document order and compared pairwise
+    with a character diff, so an edited value inside an otherwise unchanged
+    element still counts as mostly similar. Only PAIR_BUDGET_CHARS of changed
+    lines are diffed and the result is extrapolated, which bounds the cost of
+    comparing two large, very different contexts. Like `ratio()`, the result is
+    2 * matched characters / total characters.
+    """
+    total = len(before) + len(after)
+    if total == 0:
+        return 1.0
+    if total <= EXACT_LIMIT_CHARS:
+        return SequenceMatcher(a=before, b=after, autojunk=False).ratio()
+
+    before_lines = before.split("\n")
+    after_lines = after.split("\n")
+    before_counts = Counter(before_lines)
+    after_counts = Counter(after_lines)
+    common = before_counts & after_counts
+    matched = sum((len(line) + 1) * count for line, count in common.items())
+    changed_before = _unmatched(before_lines, common)
+    changed_after = _unmatched(after_lines, common)
+    if changed_before and changed_after:
+        matched += _paired_overlap(changed_before, changed_after)
+    return max(0.0, min(1.0, 2 * matched / total))
+
+
+def context_delta(before: str, after: str) -> float:
+    """1 - similarity: 0.0 means the contexts are identical."""
+    return max(0.0, 1.0 - similarity_ratio(before, after))
+
+
+def _unmatched(lines: list[str], common: Counter[str]) -> list[str]:
+    remaining = dict(common)
+    changed = []
+    for line in lines:
+        if remaining.get(line, 0) > 0:
+            remaining[line] -= 1
+        else:
+            changed.append(line)
+    return changed
+
+
+def _paired_overlap(before: list[str], after: list[str]) -> float:
+    pairs = min(len(before), len(after))
+    matched = 0.0
+    budget = PAIR_BUDGET_CHARS
+    compared = 0
+    for index in range(pairs):
+        a = before[index]
+        b = after[index]
+        if a and b:
+            matched += _line_matches(a, b) + 1  # plus the newline separating aligned lines
+        compared += 1
+        budget -= min(MAX_PAIR_LINE_CHARS, max(len(a), len(b)))
+        if budget <= 0:
+            break
+    if compared < pairs:
+        matched *= pairs / compared
+    return matched
+
+
+def _line_matches(a: str, b: str) -> float:
+    # Edits are usually local, so only the middle between the shared prefix and suffix is diffed.
+    # The prefix and suffix are trimmed on the full lines, so an edit deep inside a long value still counts.
+    prefix = _common_prefix(a, b)
+    suffix = _common_prefix(a[prefix:][::-1], b[prefix:][::-1])
+    middle_a = a[prefix : len(a) - suffix]
+    middle_b = b[prefix : len(b) - suffix]
+    shared: float = prefix + suffix
+    if middle_a and middle_b:
+        # Long middles are clipped; their matching blocks are extrapolated to the full middle lengths.
+        clipped_a = middle_a[:MAX_PAIR_LINE_CHARS]
+        clipped_b = middle_b[:MAX_PAIR_LINE_CHARS]
+        matcher = SequenceMatcher(a=clipped_a, b=clipped_b, autojunk=False)
+        blocks = sum(block.size for block in matcher.get_matching_blocks())
+        shared += blocks * (len(middle_a) + len(middle_b)) / (len(clipped_a) + len(clipped_b))
+    return shared
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Binary search over slice comparisons: C-speed even for very long values.
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
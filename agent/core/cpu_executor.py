@@ -0,0 +1,131 @@
+"""Worker pool for CPU-bound request stages, and an event-loop lag probe."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import suppress
+import multiprocessing
+import time
+from typing import Any, Callable, TypeVar
+
+from .config import settings
+
+
+T = TypeVar("T")
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+class CPUExecutor:
+    """
+    Run CPU-bound stages (verification diffs, provider output parsing) off
+    the event loop so one large input does not stall SSE delivery or other
+    requests.
+
+    Inputs smaller than `offload_min_chars` run inline: handing them to a
+    pool costs more than the work. "thread" keeps everything in-process (the
+    loop still gets the GIL every switch interval); "process" gives true
+    parallelism but needs picklable, module-level callables and arguments.
+    The pool is created on first use.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: str | None = None,
+        max_workers: int | None = None,
+        offload_min_chars: int | None = None,
+    ) -> None:
+        self.mode = (mode or settings.cpu_executor).strip().lower()
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown CPU executor mode {self.mode!r}; expected one of {EXECUTOR_MODES}")
+        self.max_workers = max_workers or settings.cpu_workers
+        self.offload_min_chars = settings.cpu_offload_min_chars if offload_min_chars is None else offload_min_chars
+        self._pool: Executor | None = None
+        self.inline_runs = 0
+        self.offloaded_runs = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int = 0) -> T:
+        """Call `fn(*args)`, offloading it when `size` (input chars) reaches the threshold."""
+        if self.mode == "inline" or size < self.offload_min_chars:
+            self.inline_runs += 1
+            return fn(*args)
+        self.offloaded_runs += 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "offload_min_chars": self.offload_min_chars,
+            "inline_runs": self.inline_runs,
+            "offloaded_runs": self.offloaded_runs,
+        }
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # spawn: forking a process that runs an event loop and open sockets is unsafe.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="orange-cpu")
+        return self._pool
+
+
+class LoopLagMonitor:
+    """
+    Measure how late a periodic timer fires on the running event loop.
+
+    Lag is the time between when a `sleep(interval_s)` should have ended and
+    when the loop actually resumed it; anything blocking the loop (inline
+    CPU work, synchronous I/O) shows up directly.
+    """
+
+    def __init__(self, interval_s: float = 0.05, window: int = 1200) -> None:
+        self.interval_s = interval_s
+        self._samples: deque[float] = deque(maxlen=window)
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._probe())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    def reset(self) -> None:
+        self._samples.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        ordered = sorted(self._samples)
+
+        def percentile(pct: float) -> float | None:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 2)
+
+        return {
+            "interval_ms": round(self.interval_s * 1000, 2),
+            "samples": len(ordered),
+            "p50_ms": percentile(50),
+            "p99_ms": percentile(99),
+            "max_ms": round(ordered[-1], 2) if ordered else None,
+        }
+
+    async def _probe(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            self._samples.append(max(0.0, (time.perf_counter() - expected) * 1000))
@@ -1,32 +1,302 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
-from contextlib import suppress
+from collections import OrderedDict, deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
+import time
 from typing import AsyncIterator
 
+from .config import settings
 from .schemas import StreamEvent
 
 
+TERMINAL_EVENTS = frozenset({"planning_completed", "planning_cancelled"})
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+SSE_HEARTBEAT = b": keepalive\n\n"
+_SWEEP_INTERVAL_S = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class PublishedEvent:
+    """
+    A stream event with its bus-wide, monotonically increasing id (the SSE
+    `id:` field), its JSON and its SSE frame, encoded once and shared by
+    every subscriber and replay.
+    """
+
+    id: int
+    event: StreamEvent
+    data: str
+    sse: bytes
+
+    @classmethod
+    def encode(cls, event_id: int, event: StreamEvent) -> PublishedEvent:
+        # pydantic-core serializes straight to compact JSON, skipping the dict and json.dumps round trip.
+        data = event.model_dump_json()
+        sse = f"id: {event_id}\nevent: {event.event}\ndata: {data}\n\n".encode()
+        return cls(id=event_id, event=event, data=data, sse=sse)
+
+
+def is_progress_event(event: StreamEvent) -> bool:
+    """Informational progress a newer event supersedes; actions, warnings and terminal events are not."""
+    return event.action is None and event.severity == "info" and event.event not in TERMINAL_EVENTS
+
+
+class _Subscriber:
+    """
+    One consumer's bounded queue. When it is full, `policy` decides what is lost:
+
+    - drop_oldest: the oldest queued event.
+    - coalesce: the oldest queued progress event (a newer progress event
+      carries the current state); only when none is queued does a progress
+      event get dropped, or the oldest event as a last resort.
+    - disconnect: the subscriber is closed so the client reconnects with
+      `Last-Event-ID` and resumes from the replay buffer without gaps.
+    """
+
+    __slots__ = ("capacity", "policy", "pending", "closed", "_wakeup")
+
+    def __init__(self, capacity: int, policy: str) -> None:
+        self.capacity = capacity
+        self.policy = policy
+        self.pending: deque[PublishedEvent] = deque()
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def offer(self, published: PublishedEvent) -> tuple[int, int]:
+        """Queue `published`; returns (dropped, coalesced) counts."""
+        if self.closed:
+            return 0, 0
+        dropped = coalesced = 0
+        if len(self.pending) >= self.capacity:
+            if self.policy == "disconnect":
+                dropped = len(self.pending) + 1
+                self.pending.clear()
+                self.closed = True
+                self._wakeup.set()
+                return dropped, 0
+            if self.policy == "coalesce" and self._coalesce():
+                coalesced = 1
+            elif self.policy == "coalesce" and is_progress_event(published.event):
+                return 0, 1
+            else:
+                self.pending.popleft()
+                dropped = 1
+        self.pending.append(published)
+        self._wakeup.set()
+        return dropped, coalesced
+
+    def _coalesce(self) -> bool:
+        for queued in self.pending:
+            if is_progress_event(queued.event):
+                self.pending.remove(queued)
+                return True
+        return False
+
+    async def next(self, idle_s: float | None = None) -> PublishedEvent | None:
+        """
+        The next queued event; None once the subscriber was disconnected or,
+        with `idle_s`, when nothing arrived for that long.
+        """
+        while not self.pending:
+            if self.closed:
+                return None
+            self._wakeup.clear()
+            if idle_s is None:
+                await self._wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), idle_s)
+            except asyncio.TimeoutError:
+                return None
+        return self.pending.popleft()
+
+
+@dataclass
+class _Session:
+    replay: deque[PublishedEvent]
+    subscribers: set[_Subscriber] = field(default_factory=set)
+    touched_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+
 class EventBus:
-    """Fan-out event bus per session for SSE streaming."""
+    """
+    Fan-out event bus per session for SSE streaming.
+
+    Each session keeps its last `replay_events` events so a subscriber that
+    connects after planning started (or reconnects with `Last-Event-ID`)
+    receives what it missed. Sessions nobody is subscribed to are dropped
+    `replay_ttl_s` after their last activity once their plan finished, or
+    after `idle_ttl_s` otherwise; the number of buffered sessions is capped,
+    least recently used first. Subscriber queues hold `queue_size` events and
+    overflow according to their policy (see `_Subscriber`).
+    """
+
+    def __init__(
+        self,
+        *,
+        replay_events: int | None = None,
+        max_sessions: int | None = None,
+        replay_ttl_s: float | None = None,
+        idle_ttl_s: float | None = None,
+        queue_size: int | None = None,
+        overflow_policy: str | None = None,
+    ) -> None:
+        self._replay_events = settings.event_replay_events if replay_events is None else replay_events
+        self._max_sessions = max_sessions or settings.event_replay_sessions
+        self._replay_ttl_s = settings.event_replay_ttl_s if replay_ttl_s is None else replay_ttl_s
+        self._idle_ttl_s = settings.event_session_idle_s if idle_ttl_s is None else idle_ttl_s
+        self._queue_size = queue_size or settings.event_queue_size
+        self._overflow_policy = checked_overflow_policy(overflow_policy or settings.event_overflow_policy)
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._last_id = 0
+        self._swept_at = time.monotonic()
+        self._counters = {"dropped": 0, "coalesced": 0, "disconnected": 0, "evicted_sessions": 0}
 
-    def __init__(self) -> None:
-        self._subscribers: dict[str, set[asyncio.Queue[StreamEvent]]] = defaultdict(set)
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
 
     async def publish(self, event: StreamEvent) -> None:
-        queues = self._subscribers.get(event.session_id)
-        if not queues:
-            return
-        for queue in list(queues):
-            with suppress(asyncio.QueueFull):
-                queue.put_nowait(event)
+        self._collect_garbage()
+        session = self._session(event.session_id)
+        self._last_id += 1
+        published = PublishedEvent.encode(self._last_id, event)
+        session.replay.append(published)
+        if event.event in TERMINAL_EVENTS:
+            session.finished_at = session.touched_at
+        elif session.finished_at is not None:
+            # A new plan (or a replan) on the same session reopens it.
+            session.finished_at = None
+        for subscriber in session.subscribers:
+            dropped, coalesced = subscriber.offer(published)
+            if dropped or coalesced:
+                self._counters["dropped"] += dropped
+                self._counters["coalesced"] += coalesced
+                self._counters["disconnected"] += int(subscriber.closed)
+
+    async def subscribe(
+        self,
+        session_id: str,
+        last_event_id: int | None = None,
+        *,
+        overflow_policy: str | None = None,
+    ) -> AsyncIterator[PublishedEvent]:
+        """
+        Yield the session's buffered events newer than `last_event_id` (all of
+        them when it is None), then live events as they are published. Ends
+        when a "disconnect" subscriber falls behind.
+        """
+        async with aclosing(self._listen(session_id, last_event_id, overflow_policy, idle_s=None)) as events:
+            async for published in events:
+                if published is None:
+                    return
+                yield published
 
-    async def subscribe(self, session_id: str) -> AsyncIterator[StreamEvent]:
-        queue: asyncio.Queue[StreamEvent] = asyncio.Queue(maxsize=100)
-        self._subscribers[session_id].add(queue)
+    async def stream_sse(
+        self,
+        session_id: str,
+        last_event_id: int | None = None,
+        *,
+        overflow_policy: str | None = None,
+        heartbeat_s: float | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        `subscribe` as ready-to-send SSE frames, with a comment line every
+        `heartbeat_s` of silence so clients and proxies can tell an idle
+        stream from a dead one.
+        """
+        heartbeat_s = settings.event_heartbeat_s if heartbeat_s is None else heartbeat_s
+        idle_s = heartbeat_s if heartbeat_s > 0 else None
+        async with aclosing(self._listen(session_id, last_event_id, overflow_policy, idle_s=idle_s)) as events:
+            async for published in events:
+                yield SSE_HEARTBEAT if published is None else published.sse
+
+    async def _listen(
+        self,
+        session_id: str,
+        last_event_id: int | None,
+        overflow_policy: str | None,
+        *,
+        idle_s: float | None,
+    ) -> AsyncIterator[PublishedEvent | None]:
+        """Replay then live events; None marks `idle_s` without events. Ends on disconnect."""
+        policy = checked_overflow_policy(overflow_policy or self._overflow_policy)
+        subscriber = _Subscriber(self._queue_size, policy)
+        session = self._session(session_id)
+        # Snapshot and register without awaiting in between: nothing is missed or sent twice.
+        after = last_event_id if last_event_id is not None else 0
+        backlog = [published for published in session.replay if published.id > after]
+        session.subscribers.add(subscriber)
         try:
+            for published in backlog:
+                yield published
             while True:
-                yield await queue.get()
+                published = await subscriber.next(idle_s)
+                if published is None and subscriber.closed:
+                    return
+                yield published
         finally:
-            self._subscribers[session_id].discard(queue)
+            session.subscribers.discard(subscriber)
+            session.touched_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, int]:
+        subscribers = [subscriber for session in self._sessions.values() for subscriber in session.subscribers]
+        return {
+            "sessions": len(self._sessions),
+            "subscribers": len(subscribers),
+            "queued_events": sum(len(subscriber.pending) for subscriber in subscribers),
+            "buffered_events": sum(len(session.replay) for session in self._sessions.values()),
+            "published_events": self._last_id,
+            "dropped_events": self._counters["dropped"],
+            "coalesced_events": self._counters["coalesced"],
+            "disconnected_subscribers": self._counters["disconnected"],
+            "evicted_sessions": self._counters["evicted_sessions"],
+        }
+
+    def buffered_sessions(self) -> int:
+        return len(self._sessions)
+
+    def _session(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            self._evict_for_capacity()
+            session = self._sessions[session_id] = _Session(replay=deque(maxlen=self._replay_events))
+        else:
+            self._sessions.move_to_end(session_id)
+        session.touched_at = time.monotonic()
+        return session
+
+    def _collect_garbage(self) -> None:
+        now = time.monotonic()
+        if now - self._swept_at < min(_SWEEP_INTERVAL_S, self._replay_ttl_s, self._idle_ttl_s):
+            return
+        self._swept_at = now
+        expired = [
+            session_id
+            for session_id, session in self._sessions.items()
+            if not session.subscribers
+            and now - session.touched_at >= (self._replay_ttl_s if session.finished_at is not None else self._idle_ttl_s)
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+        self._counters["evicted_sessions"] += len(expired)
+
+    def _evict_for_capacity(self) -> None:
+        if len(self._sessions) < self._max_sessions:
+            return
+        # Drop the least recently used sessions nobody is listening to.
+        for session_id in [sid for sid, session in self._sessions.items() if not session.subscribers]:
+            del self._sessions[session_id]
+            self._counters["evicted_sessions"] += 1
+            if len(self._sessions) < self._max_sessions:
+                return
+
+
+def checked_overflow_policy(policy: str) -> str:
+    policy = policy.strip().lower()
+    if policy not in OVERFLOW_POLICIES:
+        raise ValueError(f"Unknown event overflow policy {policy!r}; expected one of {OVERFLOW_POLICIES}")
+    return policy
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import threading
+import time
+
+from .schemas import Action
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_CACHE_FILE_VERSION = 1
+
+
+def normalize_transcript(transcript: str) -> str:
+    collapsed = _WHITESPACE_RE.sub(" ", transcript.strip().lower())
+    return collapsed.rstrip(" .!?")
+
+
+def plan_cache_key(
+    *,
+    transcript: str,
+    app_key: str | None,
+    model: str,
+    ax_tree_summary: str | None,
+) -> str:
+    """Content address for a plan: transcript, app, model and AX snapshot."""
+    ax_digest = hashlib.sha256((ax_tree_summary or "").encode("utf-8")).hexdigest()
+    material = "\x1f".join(
+        [normalize_transcript(transcript), (app_key or "").strip().lower(), model, ax_digest]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class CachedPlan:
+    actions: list[Action]
+    confidence: float
+    summary: str
+    stored_at: float
+
+
+class PlanCache:
+    """
+    TTL + LRU cache of provider plans, persisted to a compact JSON file.
+
+    Mutations only mark the cache dirty. Inside an event loop the file is
+    rewritten atomically at most once per `flush_delay_s`, serialized and
+    written on a worker thread so `/v1/plan` never waits on it; without a
+    running loop (scripts, `flush()` at shutdown) it is written at once.
+    """
+
+    def __init__(
+        self, *, capacity: int, ttl_s: float, path: Path | None = None, flush_delay_s: float = 1.0
+    ) -> None:
+        self._capacity = max(1, capacity)
+        self._ttl_s = ttl_s
+        self._path = path
+        self._flush_delay_s = flush_delay_s
+        self._entries: OrderedDict[str, CachedPlan] = OrderedDict()
+        self._dirty = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._writer: asyncio.Future[None] | None = None
+        # Serializes writes; a snapshot older than the last one written is skipped.
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._written_version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedPlan | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self._expired(entry):
+            del self._entries[key]
+            self.misses += 1
+            self._save()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, *, actions: list[Action], confidence: float, summary: str) -> None:
+        self._entries[key] = CachedPlan(
+            actions=[action.model_copy() for action in actions],
+            confidence=confidence,
+            summary=summary,
+            stored_at=time.time(),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._save()
+
+    def invalidate(self, key: str) -> bool:
+        if self._entries.pop(key, None) is None:
+            return False
+        self.invalidations += 1
+        self._save()
+        return True
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self._capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _expired(self, entry: CachedPlan) -> bool:
+        return self._ttl_s > 0 and time.time() - entry.stored_at > self._ttl_s
+
+    def _load(self) -> None:
+        if self._path is None or not self._path.exists():
+            return
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+            if payload.get("v") != _CACHE_FILE_VERSION:
+                return
+            for key, stored_at, confidence, summary, raw_actions in payload.get("entries", []):
+                entry = CachedPlan(
+                    actions=[Action.model_validate(raw) for raw in raw_actions],
+                    confidence=float(confidence),
+                    summary=str(summary),
+                    stored_at=float(stored_at),
+                )
+                if not self._expired(entry):
+                    self._entries[key] = entry
+        except Exception:
+            # A corrupt cache file must never block planning; start empty.
+            self._entries.clear()
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+
+    def flush(self) -> None:
+        """Write pending changes now (shutdown, or callers without an event loop)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._dirty:
+            self._dirty = False
+            self._write(self._snapshot())
+
+    def _save(self) -> None:
+        if self._path is None:
+            return
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._flush_delay_s, self._start_write)
+
+    def _start_write(self) -> None:
+        self._flush_handle = None
+        if not self._dirty:
+            return
+        loop = asyncio.get_running_loop()
+        if self._writer is not None and not self._writer.done():
+            # One write at a time; pick up these changes once it finishes.
+            self._flush_handle = loop.call_later(self._flush_delay_s, self._start_write)
+            return
+        self._dirty = False
+        self._writer = loop.run_in_executor(None, self._write, self._snapshot())
+
+    def _snapshot(self) -> tuple[int, list[tuple[str, CachedPlan]]]:
+        # Entries are never mutated after `put`, so a shallow copy is safe to serialize on another thread.
+        self._version += 1
+        return self._version, list(self._entries.items())
+
+    def _write(self, snapshot: tuple[int, list[tuple[str, CachedPlan]]]) -> None:
+        if self._path is None:
+            return
+        version, entries = snapshot
+        payload = {
+            "v": _CACHE_FILE_VERSION,
+            "entries": [
+                [
+                    key,
+                    round(entry.stored_at, 3),
+                    entry.confidence,
+                    entry.summary,
+                    [action.model_dump(mode="json", exclude_defaults=True) for action in entry.actions],
+                ]
+                for key, entry in entries
+            ],
+        }
+        with self._write_lock:
+            if version < self._written_version:
+                return
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+                tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp_path, self._path)
+            except OSError:
+                return
+            self._written_version = version
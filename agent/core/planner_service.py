@@ -1,34 +1,246 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timezone
+import hashlib
+import time
+from typing import Awaitable, Callable, TypeVar
+
 from core.config import SCHEMA_VERSION_CURRENT, settings
 from core.event_bus import EventBus
+from core.plan_cache import PlanCache, normalize_transcript, plan_cache_key
+from core.request_dedup import SingleFlight, TTLStore
 from core.schemas import (
     Action,
     ActionPlan,
+    AppMetadata,
     ModelInfo,
+    ModelRouteStats,
     ModelsResponse,
     ProviderStatusResponse,
+    ProviderUsageResponse,
     ProviderValidationRequest,
     ProviderValidationResponse,
     PlanRequest,
     PlanSimulationRequest,
+    PlanCacheStatsResponse,
+    PlannerPreferences,
+    PlanningMode,
+    PlanningModeStats,
     PlanSimulationResponse,
+    PlannerStatsResponse,
+    ReplanRequest,
+    RouteDecisionInfo,
     StreamEvent,
 )
-from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.adapter import (
+    AdapterResult,
+    MacOSUseAdapter,
+    PlanningProfile,
+    RecoveryContext,
+    planning_profile,
+)
 
 
 RISKY_ACTIONS = {"run_applescript"}
 RISKY_KEY_COMBOS = {"enter"}
 HIGH_RISK_TERMS = {"send", "delete", "purchase", "buy", "post", "submit"}
+MAX_TRACKED_SESSIONS = 512
+T = TypeVar("T")
+R = TypeVar("R", ActionPlan, PlanSimulationResponse)
+
+_SOURCE_LABELS = {
+    "local": "local fast path",
+    "cache": "plan cache hit",
+    "simulation": "reused simulation",
+}
+
+
+class _ModeStats:
+    """End-to-end latency and verify outcomes for one planning mode."""
+
+    def __init__(self) -> None:
+        self.plans = 0
+        self.latency_ms_total = 0
+        self.verifications = 0
+        self.verify_successes = 0
+
+    def record_plan(self, latency_ms: int) -> None:
+        self.plans += 1
+        self.latency_ms_total += latency_ms
+
+    def record_verification(self, success: bool) -> None:
+        self.verifications += 1
+        self.verify_successes += int(success)
+
+    def snapshot(self) -> PlanningModeStats:
+        return PlanningModeStats(
+            plans=self.plans,
+            mean_latency_ms=round(self.latency_ms_total / self.plans, 1) if self.plans else None,
+            verifications=self.verifications,
+            verify_success_rate=(
+                round(self.verify_successes / self.verifications, 4) if self.verifications else None
+            ),
+        )
+
+
+class PlanningCancelledError(RuntimeError):
+    def __init__(self, message: str, *, error_code: str) -> None:
+        super().__init__(message)
+        self.status_code = 409
+        self.error_code = error_code
+
+
+class IdempotencyKeyMismatchError(ValueError):
+    def __init__(self, key: str) -> None:
+        super().__init__(f"Idempotency-Key {key!r} was already used for a different request")
+        self.status_code = 422
+        self.error_code = "idempotency_key_mismatch"
 
 
 class PlannerService:
-    def __init__(self, event_bus: EventBus, adapter: MacOSUseAdapter | None = None) -> None:
+    def __init__(
+        self,
+        event_bus: EventBus,
+        adapter: MacOSUseAdapter | None = None,
+        plan_cache: PlanCache | None = None,
+    ) -> None:
         self._event_bus = event_bus
         self._adapter = adapter or MacOSUseAdapter()
+        self._plan_cache = plan_cache if plan_cache is not None else PlanCache(
+            capacity=settings.plan_cache_capacity,
+            ttl_s=settings.plan_cache_ttl_s,
+            path=settings.data_dir / "plan_cache.json",
+        )
+        # session_id -> cache key of the plan last served to that session, for invalidation.
+        self._session_cache_keys: OrderedDict[str, str] = OrderedDict()
+        # session_id -> (model, app) that produced its last provider plan, for verify feedback.
+        self._session_routes: OrderedDict[str, tuple[str, str | None]] = OrderedDict()
+        self._session_modes: OrderedDict[str, PlanningMode] = OrderedDict()
+        self._mode_stats: dict[str, _ModeStats] = {"standard": _ModeStats(), "fast": _ModeStats()}
+        self._plan_flights: SingleFlight[ActionPlan] = SingleFlight()
+        self._simulation_flights: SingleFlight[AdapterResult] = SingleFlight()
+        self._simulation_results: TTLStore[AdapterResult] = TTLStore(ttl_s=settings.simulation_reuse_ttl_s)
+        # Idempotency-Key -> (request identity, stored response); see `_idempotency_identity`.
+        self._idempotent_plans: TTLStore[tuple[str, ActionPlan]] = TTLStore(ttl_s=settings.idempotency_ttl_s)
+        self._idempotent_simulations: TTLStore[tuple[str, PlanSimulationResponse]] = TTLStore(
+            ttl_s=settings.idempotency_ttl_s
+        )
+        self._idempotent_replays = 0
+        self._simulation_reuses = 0
+        # session_id -> flight key of the newest plan request; older ones are superseded.
+        self._session_flights: dict[str, str] = {}
+        self._cancellations = {"superseded": 0, "disconnected": 0}
+        self._replans = 0
+
+    async def startup(self) -> None:
+        await self._adapter.startup()
+
+    async def shutdown(self) -> None:
+        await self._adapter.shutdown()
+        self._plan_cache.flush()
+
+    async def plan(
+        self,
+        request: PlanRequest,
+        *,
+        idempotency_key: str | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ) -> ActionPlan:
+        """
+        Plan with de-duplication: a replayed `Idempotency-Key` returns the stored
+        plan, and identical in-flight requests share one provider call. A key
+        reused for a different session, transcript, app or preferences is
+        rejected rather than answered with another request's plan.
+
+        A different plan request for the same session supersedes (cancels) the
+        previous one, and a disconnected client cancels its own request.
+        """
+        identity = self._idempotency_identity(request)
+        if idempotency_key:
+            stored_plan = self._replay(self._idempotent_plans, idempotency_key, identity)
+            if stored_plan is not None:
+                return stored_plan
+        flight_key = f"idem:{idempotency_key}:{identity}" if idempotency_key else self._request_fingerprint(request)
+        await self._supersede_previous(request.session_id, flight_key)
+        self._session_flights[request.session_id] = flight_key
+        try:
+            plan = await self._run_cancellable(
+                self._plan_flights.run(flight_key, lambda: self._plan(request)),
+                session_id=request.session_id,
+                is_disconnected=is_disconnected,
+            )
+        finally:
+            if self._session_flights.get(request.session_id) == flight_key:
+                del self._session_flights[request.session_id]
+        if idempotency_key:
+            self._remember_idempotent(self._idempotent_plans, idempotency_key, identity, plan)
+        return plan.model_copy(deep=True)
+
+    async def _supersede_previous(self, session_id: str, flight_key: str) -> None:
+        previous_key = self._session_flights.get(session_id)
+        if previous_key is None or previous_key == flight_key:
+            return
+        if self._plan_flights.cancel(previous_key):
+            self._cancellations["superseded"] += 1
+            await self._publish_cancelled(session_id, "Superseded by a newer request")
+
+    async def _run_cancellable(
+        self,
+        awaitable: Awaitable[T],
+        *,
+        session_id: str,
+        is_disconnected: Callable[[], Awaitable[bool]] | None,
+    ) -> T:
+        """
+        Await `awaitable`, cancelling it if the client goes away, and turn a
+        cancellation that did not come from our own caller into a typed error.
+        """
+        work = asyncio.ensure_future(awaitable)
+        disconnected = False
+
+        async def watch() -> None:
+            nonlocal disconnected
+            while not work.done():
+                await asyncio.sleep(settings.disconnect_poll_interval_s)
+                if await is_disconnected():  # type: ignore[misc]
+                    disconnected = True
+                    work.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch()) if is_disconnected is not None else None
+        try:
+            return await work
+        except asyncio.CancelledError:
+            work.cancel()
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            if disconnected:
+                self._cancellations["disconnected"] += 1
+                await self._publish_cancelled(session_id, "Client disconnected")
+                raise PlanningCancelledError("Client disconnected", error_code="client_disconnected") from None
+            raise PlanningCancelledError(
+                "Planning was superseded by a newer request", error_code="planning_superseded"
+            ) from None
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _publish_cancelled(self, session_id: str, reason: str) -> None:
+        await self._event_bus.publish(
+            StreamEvent(
+                session_id=session_id,
+                event="planning_cancelled",
+                message=reason,
+                severity="warning",
+            )
+        )
 
-    async def plan(self, request: PlanRequest) -> ActionPlan:
+    async def _plan(self, request: PlanRequest) -> ActionPlan:
+        started = time.perf_counter()
+        profile = _profile_for(request.preferences)
         await self._event_bus.publish(
             StreamEvent(
                 session_id=request.session_id,
@@ -39,11 +251,72 @@ class PlannerService:
             )
         )
 
-        adapter_result = await self._adapter.plan_actions(
-            transcript=request.transcript,
-            active_app_name=(request.app.name if request.app else None),
-            _ax_tree_summary=request.ax_tree_summary,
+        async def publish_action(action: Action, fraction: float) -> None:
+            await self._event_bus.publish(
+                StreamEvent(
+                    session_id=request.session_id,
+                    event="planning_action",
+                    message=f"Action ready: {action.kind}",
+                    progress=15 + int(45 * fraction),
+                    step_id=action.id,
+                    severity="info",
+                    action=action,
+                )
+            )
+
+        app_name = request.app.name if request.app else None
+        if settings.enable_remote_llm:
+            # Key errors surface the same way whether or not the provider is reached.
+            self._adapter.require_api_key()
+        source = "provider"
+        cache_key: str | None = None
+        adapter_result = self._adapter.plan_locally(
+            transcript=request.transcript, active_app_name=app_name, profile=profile
         )
+        if adapter_result is not None:
+            source = "local"
+        else:
+            cache_key = self._cache_key_for(request, profile)
+            cached = self._plan_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                source = "cache"
+                adapter_result = AdapterResult(
+                    actions=[action.model_copy() for action in cached.actions],
+                    confidence=cached.confidence,
+                    summary=cached.summary,
+                    warnings=[],
+                )
+            else:
+                adapter_result = await self._reuse_simulation(request)
+                if adapter_result is not None:
+                    source = "simulation"
+
+        if adapter_result is not None:
+            if settings.stream_planning:
+                for idx, action in enumerate(adapter_result.actions, start=1):
+                    await publish_action(action, idx / len(adapter_result.actions))
+        else:
+            adapter_result = await self._adapter.plan_actions(
+                transcript=request.transcript,
+                active_app_name=app_name,
+                _ax_tree_summary=request.ax_tree_summary,
+                on_action=publish_action if settings.stream_planning else None,
+                allow_local=False,
+                race_model_tiers=bool(request.preferences and request.preferences.race_model_tiers),
+                preferred_model=request.preferences.preferred_model if request.preferences else None,
+                profile=profile,
+            )
+            if cache_key and not adapter_result.warnings and adapter_result.recovery_guidance is None:
+                self._plan_cache.put(
+                    cache_key,
+                    actions=adapter_result.actions,
+                    confidence=adapter_result.confidence,
+                    summary=adapter_result.summary,
+                )
+        if cache_key:
+            self._remember_session_plan(request.session_id, cache_key)
+        if source == "provider" and adapter_result.model:
+            _remember(self._session_routes, request.session_id, (adapter_result.model, app_name))
 
         for warning in getattr(adapter_result, "warnings", []):
             await self._event_bus.publish(
@@ -56,11 +329,18 @@ class PlannerService:
                 )
             )
 
+        generated_message = f"Generated {len(adapter_result.actions)} actions"
+        if source != "provider":
+            generated_message += f" ({_SOURCE_LABELS[source]})"
+        if profile.mode == "fast":
+            generated_message += " (fast mode)"
+        if adapter_result.time_to_first_action_ms is not None:
+            generated_message += f" (first action after {adapter_result.time_to_first_action_ms}ms)"
         await self._event_bus.publish(
             StreamEvent(
                 session_id=request.session_id,
                 event="planning_generated",
-                message=f"Generated {len(adapter_result.actions)} actions",
+                message=generated_message,
                 progress=65,
                 severity="info",
             )
@@ -76,7 +356,10 @@ class PlannerService:
             risk_level=risk_level,
             requires_confirmation=requires_confirmation,
             summary=adapter_result.summary if not getattr(adapter_result, "recovery_guidance", None) else f"{adapter_result.summary}. {adapter_result.recovery_guidance}",
+            planning_mode=profile.mode,
         )
+        self._mode_stats[profile.mode].record_plan(int((time.perf_counter() - started) * 1000))
+        _remember(self._session_modes, request.session_id, profile.mode)
 
         await self._event_bus.publish(
             StreamEvent(
@@ -89,16 +372,275 @@ class PlannerService:
         )
         return plan
 
-    async def simulate(self, request: PlanSimulationRequest) -> PlanSimulationResponse:
-        adapter_result = await self._adapter.plan_actions(
+    async def replan(
+        self,
+        request: ReplanRequest,
+        *,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ) -> ActionPlan:
+        """
+        Replace the failed suffix of `request.action_plan`.
+
+        The returned plan holds only the actions to run from the failed step
+        on, numbered after the completed prefix.
+        """
+        return await self._run_cancellable(
+            self._replan(request), session_id=request.session_id, is_disconnected=is_disconnected
+        )
+
+    async def _replan(self, request: ReplanRequest) -> ActionPlan:
+        profile = _profile_for(request.preferences)
+        actions = request.action_plan.actions
+        recovery = RecoveryContext(
+            completed=tuple(actions[: request.failed_step_index]),
+            remaining=tuple(actions[request.failed_step_index :]),
+            failure_reason=request.failure_reason,
+        )
+        self._replans += 1
+        # The failed plan must not be served from the cache again.
+        self.invalidate_session_plan(request.session_id)
+        await self._event_bus.publish(
+            StreamEvent(
+                session_id=request.session_id,
+                event="planning_started",
+                message=f"Replanning from step {recovery.failed.id}",
+                progress=10,
+                severity="info",
+            )
+        )
+
+        first_id = len(recovery.completed) + 1
+        streamed = 0
+
+        async def publish_action(action: Action, fraction: float) -> None:
+            nonlocal streamed
+            step_id = f"a{first_id + streamed}"
+            streamed += 1
+            await self._event_bus.publish(
+                StreamEvent(
+                    session_id=request.session_id,
+                    event="planning_action",
+                    message=f"Action ready: {action.kind}",
+                    progress=15 + int(45 * fraction),
+                    step_id=step_id,
+                    severity="info",
+                    action=action.model_copy(update={"id": step_id}),
+                )
+            )
+
+        app_name = request.app.name if request.app else None
+        adapter_result = await self._adapter.replan_actions(
+            transcript=request.transcript,
+            active_app_name=app_name,
+            ax_tree_summary=request.ax_tree_summary,
+            recovery=recovery,
+            on_action=publish_action if settings.stream_planning else None,
+            preferred_model=request.preferences.preferred_model if request.preferences else None,
+            profile=profile,
+        )
+        if adapter_result.model:
+            _remember(self._session_routes, request.session_id, (adapter_result.model, app_name))
+        for warning in adapter_result.warnings:
+            await self._event_bus.publish(
+                StreamEvent(
+                    session_id=request.session_id,
+                    event="planning_warning",
+                    message=warning,
+                    progress=40,
+                    severity="warning",
+                )
+            )
+
+        # Ids continue after the completed prefix so the client can splice the suffix in.
+        suffix = [
+            action.model_copy(update={"id": f"a{first_id + offset}"})
+            for offset, action in enumerate(adapter_result.actions)
+        ]
+        risk_level, requires_confirmation = self._compute_risk(suffix, transcript=request.transcript)
+        summary = adapter_result.summary
+        if adapter_result.recovery_guidance:
+            summary = f"{summary}. {adapter_result.recovery_guidance}"
+        plan = ActionPlan(
+            schema_version=SCHEMA_VERSION_CURRENT,
+            session_id=request.session_id,
+            actions=suffix,
+            confidence=adapter_result.confidence,
+            risk_level=risk_level,
+            requires_confirmation=requires_confirmation,
+            summary=summary,
+            planning_mode=profile.mode,
+        )
+        _remember(self._session_modes, request.session_id, profile.mode)
+        await self._event_bus.publish(
+            StreamEvent(
+                session_id=request.session_id,
+                event="planning_completed",
+                message=f"Replan ready ({len(suffix)} actions)",
+                progress=100,
+                severity="info",
+            )
+        )
+        return plan
+
+    def invalidate_session_plan(self, session_id: str) -> bool:
+        """Drop the cached plan last served to `session_id` (e.g. after failed verification)."""
+        cache_key = self._session_cache_keys.pop(session_id, None)
+        if cache_key is None:
+            return False
+        return self._plan_cache.invalidate(cache_key)
+
+    def plan_cache_stats(self) -> PlanCacheStatsResponse:
+        return PlanCacheStatsResponse(enabled=settings.plan_cache_enabled, **self._plan_cache.stats())
+
+    def _cache_key_for(self, request: PlanRequest, profile: PlanningProfile) -> str | None:
+        if not settings.plan_cache_enabled or not settings.enable_remote_llm:
+            return None
+        app_name = request.app.name if request.app else None
+        app_key = (request.app.bundle_id or request.app.name) if request.app else None
+        model = self._adapter.select_model(
+            request.transcript,
+            active_app_name=app_name,
+            preferred_model=request.preferences.preferred_model if request.preferences else None,
+            profile=profile,
+        )
+        return plan_cache_key(
             transcript=request.transcript,
-            active_app_name=(request.app.name if request.app else None),
-            _ax_tree_summary=None,
+            app_key=app_key,
+            # Fast mode sees a smaller prompt, so its plans are cached separately.
+            model=model if profile.mode == "standard" else f"{model}|{profile.mode}",
+            ax_tree_summary=request.ax_tree_summary,
+        )
+
+    async def _reuse_simulation(self, request: PlanRequest) -> AdapterResult | None:
+        """Reuse a just-finished (or still running) simulate call for the same utterance."""
+        utterance_key = self._utterance_key(
+            request.session_id, request.transcript, request.app, _profile_for(request.preferences).mode
+        )
+        result = self._simulation_results.pop(utterance_key)
+        if result is None:
+            result = await self._simulation_flights.join(utterance_key)
+            self._simulation_results.pop(utterance_key)
+        if result is None or result.warnings:
+            return None
+        self._simulation_reuses += 1
+        return AdapterResult(
+            actions=[action.model_copy() for action in result.actions],
+            confidence=result.confidence,
+            summary=result.summary,
+            warnings=[],
+            recovery_guidance=result.recovery_guidance,
+        )
+
+    def planner_stats(self) -> PlannerStatsResponse:
+        return PlannerStatsResponse(
+            plan_requests=self._plan_flights.executed + self._plan_flights.coalesced,
+            coalesced=self._plan_flights.coalesced + self._simulation_flights.coalesced,
+            idempotent_replays=self._idempotent_replays,
+            simulation_reuses=self._simulation_reuses,
+            cancelled_superseded=self._cancellations["superseded"],
+            cancelled_disconnected=self._cancellations["disconnected"],
+            replans=self._replans,
+            modes={mode: stats.snapshot() for mode, stats in self._mode_stats.items()},
+        )
+
+    @staticmethod
+    def _utterance_key(session_id: str, transcript: str, app: AppMetadata | None, mode: PlanningMode) -> str:
+        material = "\x1f".join(
+            [session_id, normalize_transcript(transcript), (app.bundle_id or app.name or "") if app else "", mode]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _idempotency_identity(request: PlanRequest | PlanSimulationRequest) -> str:
+        """
+        What an `Idempotency-Key` is bound to: session, transcript, app and
+        preferences. The AX context is left out, since a retry re-captures it.
+        """
+        app = request.app.model_dump_json() if request.app else ""
+        preferences = request.preferences.model_dump_json() if request.preferences else ""
+        material = "\x1f".join([request.session_id, request.transcript, app, preferences])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _replay(self, store: TTLStore[tuple[str, R]], key: str, identity: str) -> R | None:
+        stored = store.get(key)
+        if stored is None:
+            return None
+        stored_identity, response = stored
+        if stored_identity != identity:
+            raise IdempotencyKeyMismatchError(key)
+        self._idempotent_replays += 1
+        return response.model_copy(deep=True)
+
+    @staticmethod
+    def _remember_idempotent(store: TTLStore[tuple[str, R]], key: str, identity: str, response: R) -> None:
+        stored = store.get(key)
+        # Two different requests raced on one key; the first to finish owns it.
+        if stored is not None and stored[0] != identity:
+            raise IdempotencyKeyMismatchError(key)
+        store.put(key, (identity, response))
+
+    def _request_fingerprint(self, request: PlanRequest) -> str:
+        ax_digest = hashlib.sha256((request.ax_tree_summary or "").encode("utf-8")).hexdigest()
+        preferences = request.preferences.model_dump_json() if request.preferences else ""
+        return hashlib.sha256(
+            "\x1f".join(
+                [
+                    self._utterance_key(
+                        request.session_id, request.transcript, request.app, _profile_for(request.preferences).mode
+                    ),
+                    ax_digest,
+                    preferences,
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def _remember_session_plan(self, session_id: str, cache_key: str) -> None:
+        _remember(self._session_cache_keys, session_id, cache_key)
+
+    def record_verification(self, session_id: str, *, success: bool) -> None:
+        """Feed a verify outcome back to the model router and the per-mode stats."""
+        mode = self._session_modes.pop(session_id, None)
+        if mode is not None:
+            self._mode_stats[mode].record_verification(success)
+        route = self._session_routes.pop(session_id, None)
+        if route is not None:
+            model, app_name = route
+            self._adapter.record_verification(model=model, active_app_name=app_name, success=success)
+
+    async def simulate(
+        self,
+        request: PlanSimulationRequest,
+        *,
+        idempotency_key: str | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ) -> PlanSimulationResponse:
+        identity = self._idempotency_identity(request)
+        if idempotency_key:
+            stored_response = self._replay(self._idempotent_simulations, idempotency_key, identity)
+            if stored_response is not None:
+                return stored_response
+        profile = _profile_for(request.preferences)
+        utterance_key = self._utterance_key(request.session_id, request.transcript, request.app, profile.mode)
+        adapter_result = await self._run_cancellable(
+            self._simulation_flights.run(
+                utterance_key,
+                lambda: self._adapter.plan_actions(
+                    transcript=request.transcript,
+                    active_app_name=(request.app.name if request.app else None),
+                    _ax_tree_summary=None,
+                    preferred_model=request.preferences.preferred_model if request.preferences else None,
+                    profile=profile,
+                ),
+            ),
+            session_id=request.session_id,
+            is_disconnected=is_disconnected,
         )
+        if not adapter_result.warnings:
+            self._simulation_results.put(utterance_key, adapter_result)
         risk_level, requires_confirmation = self._compute_risk(adapter_result.actions, transcript=request.transcript)
         warnings = getattr(adapter_result, "warnings", [])
         recovery_guidance = getattr(adapter_result, "recovery_guidance", None)
-        return PlanSimulationResponse(
+        response = PlanSimulationResponse(
             schema_version=SCHEMA_VERSION_CURRENT,
             session_id=request.session_id,
             is_valid=len(warnings) == 0 and len(adapter_result.actions) > 0,
@@ -108,7 +650,11 @@ class PlannerService:
             summary=adapter_result.summary,
             proposed_actions_count=len(adapter_result.actions),
             recovery_guidance=recovery_guidance,
+            planning_mode=profile.mode,
         )
+        if idempotency_key:
+            self._remember_idempotent(self._idempotent_simulations, idempotency_key, identity, response)
+        return response
 
     async def validate_provider(self, request: ProviderValidationRequest) -> ProviderValidationResponse:
         result = await self._adapter.validate_provider_key(request.api_key)
@@ -128,6 +674,9 @@ class PlannerService:
             health=True,
         )
 
+    def provider_usage(self) -> ProviderUsageResponse:
+        return ProviderUsageResponse(provider="anthropic", **self._adapter.usage_snapshot())
+
     def models(self) -> ModelsResponse:
         routing: list[ModelInfo] = [
             ModelInfo(app=None, model=settings.model_simple, reason="Default model for short/simple tasks"),
@@ -135,6 +684,7 @@ class PlannerService:
         ]
         for app, model in settings.model_overrides.items():
             routing.append(ModelInfo(app=app, model=model, reason="App-specific override"))
+        stats, decisions = self._adapter.routing_snapshot()
         return ModelsResponse(
             schema_version=SCHEMA_VERSION_CURRENT,
             routing=routing,
@@ -142,7 +692,20 @@ class PlannerService:
                 "enable_remote_llm": "true" if settings.enable_remote_llm else "false",
                 "safety_strictness": settings.safety_strictness,
                 "provider": settings.provider,
+                "adaptive_routing": "true" if settings.adaptive_routing else "false",
+                "router_latency_target_ms": str(settings.router_latency_target_ms),
+                "router_success_target": str(settings.router_success_target),
             },
+            stats=[ModelRouteStats(**item) for item in stats],
+            recent_decisions=[
+                RouteDecisionInfo(
+                    app=decision.app,
+                    model=decision.model,
+                    reason=decision.reason,
+                    at=datetime.fromtimestamp(decision.at, tz=timezone.utc),
+                )
+                for decision in decisions
+            ],
         )
 
     @staticmethod
@@ -171,3 +734,15 @@ class PlannerService:
         if medium:
             return "medium", True
         return "low", False
+
+
+def _remember(store: OrderedDict[str, T], session_id: str, value: T) -> None:
+    store[session_id] = value
+    store.move_to_end(session_id)
+    while len(store) > MAX_TRACKED_SESSIONS:
+        store.popitem(last=False)
+
+
+def _profile_for(preferences: PlannerPreferences | None) -> PlanningProfile:
+    # Requests without preferences keep the standard mode; the desktop app sends low_latency=true.
+    return planning_profile(low_latency=bool(preferences and preferences.low_latency))
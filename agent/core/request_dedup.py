@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Awaitable, Callable, Generic, TypeVar
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight(Generic[T]):
+    task: asyncio.Task[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls with the same key onto one underlying task.
+
+    Every caller awaits a shielded view of the shared task, so one caller
+    going away does not cancel the work for the others; the task is only
+    cancelled once its last waiter has left.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, _Flight[T]] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(task=asyncio.ensure_future(factory()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _task, key=key, flight=flight: self._forget(key, flight))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await self._wait(flight)
+
+    async def join(self, key: str) -> T | None:
+        """Await an in-flight call for `key` if there is one; None otherwise."""
+        flight = self._inflight.get(key)
+        if flight is None:
+            return None
+        self.coalesced += 1
+        return await self._wait(flight)
+
+    def cancel(self, key: str) -> bool:
+        """Cancel the shared task for `key`; every waiter sees CancelledError."""
+        flight = self._inflight.get(key)
+        if flight is None or flight.task.done():
+            return False
+        return flight.task.cancel()
+
+    async def _wait(self, flight: _Flight[T]) -> T:
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight[T]) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+
+class TTLStore(Generic[T]):
+    """Small bounded map whose entries expire after `ttl_s` seconds."""
+
+    def __init__(self, *, ttl_s: float, capacity: int = 256) -> None:
+        self._ttl_s = ttl_s
+        self._capacity = max(1, capacity)
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: str) -> T | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self._ttl_s:
+            del self._entries[key]
+            return None
+        return value
+
+    def pop(self, key: str) -> T | None:
+        value = self.get(key)
+        self._entries.pop(key, None)
+        return value
+
+    def put(self, key: str, value: T) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
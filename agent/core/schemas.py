@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Literal
+from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 from .config import SCHEMA_VERSION_CURRENT, SCHEMA_VERSION_MIN
 
@@ -20,8 +20,15 @@ ActionKind = Literal[
 ]
 RiskLevel = Literal["low", "medium", "high"]
 ExecutionStatus = Literal["success", "failure", "partial"]
+EventOverflowPolicy = Literal["drop_oldest", "coalesce", "disconnect"]
 EventSeverity = Literal["info", "warning", "error"]
 ProviderName = Literal["anthropic"]
+PlanningMode = Literal["standard", "fast"]
+ActionVerificationStatus = Literal["success", "failure", "unverified"]
+StepVerificationStatus = Literal["baseline", "success", "failure", "unverified"]
+
+# Step contexts are held per session on the server, so they are capped.
+MAX_STEP_CONTEXT_CHARS = 200_000
 
 
 class AppMetadata(BaseModel):
@@ -39,6 +46,7 @@ class PlannerPreferences(BaseModel):
     preferred_model: str | None = None
     locale: str | None = None
     low_latency: bool = True
+    race_model_tiers: bool = False
 
 
 class Action(BaseModel):
@@ -65,6 +73,7 @@ class ActionPlan(BaseModel):
     risk_level: RiskLevel
     requires_confirmation: bool
     summary: str | None = None
+    planning_mode: PlanningMode | None = None
 
 
 class PlanRequest(BaseModel):
@@ -88,6 +97,38 @@ class PlanRequest(BaseModel):
         return value
 
 
+class ReplanRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    schema_version: int = SCHEMA_VERSION_CURRENT
+    session_id: str = Field(min_length=1)
+    transcript: str = Field(min_length=1, max_length=4000)
+    action_plan: ActionPlan
+    failed_step_index: int = Field(ge=0)
+    failure_reason: str | None = Field(default=None, max_length=1000)
+    ax_tree_summary: str | None = None
+    app: AppMetadata | None = None
+    preferences: PlannerPreferences | None = None
+
+    @field_validator("schema_version")
+    @classmethod
+    def schema_version_supported(cls, value: int) -> int:
+        if value < SCHEMA_VERSION_MIN or value > SCHEMA_VERSION_CURRENT:
+            raise ValueError(
+                f"Unsupported schema_version={value}; supported=[{SCHEMA_VERSION_MIN}, {SCHEMA_VERSION_CURRENT}]"
+            )
+        return value
+
+    @model_validator(mode="after")
+    def failed_step_in_plan(self) -> ReplanRequest:
+        if self.failed_step_index >= len(self.action_plan.actions):
+            raise ValueError(
+                f"failed_step_index={self.failed_step_index} is outside the plan "
+                f"({len(self.action_plan.actions)} actions)"
+            )
+        return self
+
+
 class PlanSimulationRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -119,6 +160,42 @@ class PlanSimulationResponse(BaseModel):
     summary: str
     proposed_actions_count: int = 0
     recovery_guidance: str | None = None
+    planning_mode: PlanningMode | None = None
+
+
+class PlanCacheStatsResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    enabled: bool
+    entries: int
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    hit_rate: float
+
+
+class PlanningModeStats(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    plans: int
+    mean_latency_ms: float | None = None
+    verifications: int
+    verify_success_rate: float | None = None
+
+
+class PlannerStatsResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    plan_requests: int
+    coalesced: int
+    idempotent_replays: int
+    simulation_reuses: int
+    cancelled_superseded: int
+    cancelled_disconnected: int
+    replans: int = 0
+    modes: dict[str, PlanningModeStats] = Field(default_factory=dict)
 
 
 class VerifyRequest(BaseModel):
@@ -142,6 +219,16 @@ class VerifyRequest(BaseModel):
         return value
 
 
+class ActionVerification(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    action_id: str
+    status: ActionVerificationStatus
+    confidence: float = Field(ge=0.0, le=1.0)
+    matched: list[str] = Field(default_factory=list)
+    reason: str | None = None
+
+
 class VerifyResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -151,6 +238,41 @@ class VerifyResponse(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0)
     reason: str | None = None
     corrective_actions: list[Action] = Field(default_factory=list)
+    action_results: list[ActionVerification] = Field(default_factory=list)
+
+
+class VerifyStepRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    schema_version: int = SCHEMA_VERSION_CURRENT
+    session_id: str = Field(min_length=1)
+    context: str = Field(max_length=MAX_STEP_CONTEXT_CHARS)
+    action: Action | None = None
+    execution_result: ExecutionStatus = "success"
+    reason: str | None = None
+
+    @field_validator("schema_version")
+    @classmethod
+    def schema_version_supported(cls, value: int) -> int:
+        if value < SCHEMA_VERSION_MIN or value > SCHEMA_VERSION_CURRENT:
+            raise ValueError(
+                f"Unsupported schema_version={value}; supported=[{SCHEMA_VERSION_MIN}, {SCHEMA_VERSION_CURRENT}]"
+            )
+        return value
+
+
+class VerifyStepResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    schema_version: int = SCHEMA_VERSION_CURRENT
+    session_id: str
+    step: int
+    status: StepVerificationStatus
+    confidence: float = Field(ge=0.0, le=1.0)
+    context_delta: float = Field(ge=0.0, le=1.0)
+    reason: str | None = None
+    action_result: ActionVerification | None = None
+    corrective_actions: list[Action] = Field(default_factory=list)
 
 
 class StreamEvent(BaseModel):
@@ -162,6 +284,7 @@ class StreamEvent(BaseModel):
     progress: int | None = Field(default=None, ge=0, le=100)
     step_id: str | None = None
     severity: EventSeverity = "info"
+    action: Action | None = None
     timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 
@@ -173,12 +296,119 @@ class ModelInfo(BaseModel):
     reason: str
 
 
+class ModelRouteStats(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    model: str
+    app: str | None = None
+    requests: int
+    p50_ms: int | None = None
+    p90_ms: int | None = None
+    parse_failure_rate: float | None = None
+    verifications: int
+    verify_success_rate: float | None = None
+
+
+class RouteDecisionInfo(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    app: str | None = None
+    model: str
+    reason: str
+    at: datetime
+
+
 class ModelsResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     schema_version: int = SCHEMA_VERSION_CURRENT
     routing: list[ModelInfo]
     feature_flags: dict[str, str]
+    stats: list[ModelRouteStats] = Field(default_factory=list)
+    recent_decisions: list[RouteDecisionInfo] = Field(default_factory=list)
+
+
+class EventLoopLagStats(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    interval_ms: float
+    samples: int
+    p50_ms: float | None = None
+    p99_ms: float | None = None
+    max_ms: float | None = None
+
+
+class CPUExecutorStats(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    mode: Literal["inline", "thread", "process"]
+    max_workers: int
+    offload_min_chars: int
+    inline_runs: int
+    offloaded_runs: int
+
+
+class EventBusStats(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    sessions: int
+    subscribers: int
+    queued_events: int
+    buffered_events: int
+    published_events: int
+    dropped_events: int
+    coalesced_events: int
+    disconnected_subscribers: int
+    evicted_sessions: int
+
+
+class RuntimeStatsResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    event_loop_lag: EventLoopLagStats
+    cpu_executor: CPUExecutorStats
+    event_bus: EventBusStats
+
+
+class ChannelRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    id: str = Field(min_length=1, max_length=128)
+    op: str = Field(min_length=1)
+    body: dict[str, Any] = Field(default_factory=dict)
+    idempotency_key: str | None = None
+
+
+class ChannelSubscribeRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    session_id: str = Field(min_length=1)
+    last_event_id: int | None = Field(default=None, ge=0)
+    overflow: EventOverflowPolicy | None = None
+
+
+class ChannelUnsubscribeRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    session_id: str = Field(min_length=1)
+
+
+class ChannelError(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    status_code: int
+    message: str
+    error_code: str
+
+
+class ChannelResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["response"] = "response"
+    id: str | None
+    ok: bool
+    body: dict[str, Any] | None = None
+    error: ChannelError | None = None
 
 
 class TelemetryEvent(BaseModel):
@@ -194,6 +424,88 @@ class TelemetryEvent(BaseModel):
     error_code: str | None = None
 
 
+class TelemetryBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    events: list[TelemetryEvent]
+    # The sample rate the client applied to these events (errors are always sent).
+    sample_rate: float = Field(default=1.0, gt=0.0, le=1.0)
+
+
+class TelemetryBatchResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    status: Literal["accepted"] = "accepted"
+    accepted: int
+    count: int
+    # Fraction of non-error events the client should keep, and how long it should buffer between posts.
+    sample_rate: float = Field(gt=0.0, le=1.0)
+    flush_interval_s: float
+
+
+class TelemetryLogRecord(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    recorded_at: float
+    event: TelemetryEvent
+
+
+class TelemetryLogStats(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    segments: int
+    bytes: int
+    oldest_recorded_at: float | None = None
+    buffered_events: int
+    written_events: int
+    dropped_events: int
+    write_errors: int
+
+
+class TelemetryHistoryResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    events: list[TelemetryLogRecord]
+    log: TelemetryLogStats
+
+
+class TelemetrySummaryGroup(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    stage: str | None = None
+    app: str | None = None
+    action_kind: str | None = None
+    status: str | None = None
+    # Estimated events once client-side sampling is undone; `received` is what actually arrived.
+    count: int
+    received: int
+    errors: int
+    error_rate: float
+    latency_samples: int
+    p50_ms: int | None = None
+    p95_ms: int | None = None
+    p99_ms: int | None = None
+    max_ms: int | None = None
+
+
+class TelemetrySummaryWindow(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    window_s: int
+    count: int
+    groups: list[TelemetrySummaryGroup] = Field(default_factory=list)
+
+
+class TelemetrySummaryResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    group_by: list[str]
+    slot_s: float
+    buffered_events: int
+    total_events: int
+    windows: list[TelemetrySummaryWindow] = Field(default_factory=list)
+
+
 class ProviderValidationRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -218,3 +530,19 @@ class ProviderStatusResponse(BaseModel):
     model_simple: str
     model_complex: str
     health: bool
+
+
+class ProviderUsageResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    provider: ProviderName
+    requests: int
+    cache_hit_requests: int
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int
+    cache_read_input_tokens: int
+    cache_read_ratio: float
+    mean_latency_ms: dict[str, float | None]
+    mean_ttft_ms: dict[str, float | None]
+    hedging: dict[str, int | float]
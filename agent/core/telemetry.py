@@ -0,0 +1,305 @@
+"""Fixed-capacity telemetry buffer with online, windowed latency and error aggregation."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import math
+import time
+from typing import Iterable, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+
+from .config import settings
+from .schemas import (
+    TelemetryEvent,
+    TelemetrySummaryGroup,
+    TelemetrySummaryResponse,
+    TelemetrySummaryWindow,
+)
+
+
+GROUP_BY_FIELDS = ("stage", "app", "action_kind", "status")
+ERROR_STATUSES = frozenset({"failed", "failure", "error"})
+OTHER_SERIES = "(other)"
+
+# Log-linear buckets: exact below 2**_SUB_BUCKET_BITS, then 64 buckets per power of two (< 1.6% error).
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_HALF = 1 << (_SUB_BUCKET_BITS - 1)
+
+# Ingest rate used for batching advice, and the lowest sample rate ever suggested.
+_RATE_WINDOW_S = 60.0
+_MIN_SAMPLE_RATE = 0.01
+
+_EVENT_LIST = TypeAdapter(list[TelemetryEvent])
+
+SeriesKey = tuple[str, str | None, str | None, str]
+
+
+class TelemetryBatchError(ValueError):
+    def __init__(self, message: str, *, status_code: int, error_code: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+def parse_batch(body: bytes) -> list[TelemetryEvent]:
+    """
+    Validate a JSON array or newline-delimited JSON body of telemetry events.
+
+    NDJSON lines are spliced into one array, so either form is validated by a
+    single pydantic call instead of one model validation per request.
+    """
+    payload = body.strip()
+    if not payload:
+        return []
+    if not payload.startswith(b"["):
+        payload = b"[" + b",".join(line for line in payload.splitlines() if line.strip()) + b"]"
+    try:
+        return _EVENT_LIST.validate_json(payload)
+    except ValidationError as exc:
+        message = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'body'}: {error['msg']}" for error in exc.errors()
+        )
+        raise TelemetryBatchError(message, status_code=422, error_code="invalid_telemetry_batch") from exc
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of non-negative integer latencies.
+
+    Recording is O(1) and memory grows with the number of distinct buckets
+    (a few hundred at most), not with the number of samples. Percentiles
+    report the highest value of the bucket they fall in.
+    """
+
+    __slots__ = ("counts", "count", "max")
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        value = max(0, value)
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: LatencyHistogram) -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> int | None:
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+
+def _bucket_index(value: int) -> int:
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return shift * _SUB_BUCKET_HALF + (value >> shift)
+
+
+def _bucket_upper(index: int) -> int:
+    if index < 2 * _SUB_BUCKET_HALF:
+        return index
+    shift = index // _SUB_BUCKET_HALF - 1
+    mantissa = index - shift * _SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+@dataclass
+class SeriesStats:
+    count: int = 0
+    errors: int = 0
+    # Events these stand for once client-side sampling is undone (errors are never sampled).
+    weighted: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def merge(self, other: SeriesStats) -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.weighted += other.weighted
+        self.latency.merge(other.latency)
+
+
+@dataclass
+class _Slot:
+    index: int
+    series: dict[SeriesKey, SeriesStats] = field(default_factory=dict)
+    # Events this slot stands for once client-side sampling is undone.
+    represented: float = 0.0
+
+
+class TelemetryStore:
+    """
+    Keep the last `capacity` raw events in a ring buffer and aggregate every
+    event into per-series counters and latency histograms, bucketed into
+    `slot_s`-second slots covering the last `window_s` seconds.
+
+    A series is one (stage, app, action_kind, status) combination; past
+    `max_series` per slot, new combinations are folded into an "(other)"
+    series for their stage and status. Summaries merge the slots in the
+    requested window, so their cost does not depend on the event rate.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int | None = None,
+        slot_s: float | None = None,
+        window_s: float | None = None,
+        max_series: int | None = None,
+    ) -> None:
+        self.capacity = max(1, capacity or settings.telemetry_capacity)
+        self.slot_s = slot_s or settings.telemetry_slot_s
+        self.window_s = window_s or settings.telemetry_window_s
+        self._max_series = max_series or settings.telemetry_max_series
+        self._ring: list[TelemetryEvent | None] = [None] * self.capacity
+        self._written = 0
+        self._slots: list[_Slot | None] = [None] * max(1, math.ceil(self.window_s / self.slot_s))
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    @property
+    def total(self) -> int:
+        return self._written
+
+    def record(self, event: TelemetryEvent, *, now: float | None = None, sample_rate: float = 1.0) -> None:
+        self._ring[self._written % self.capacity] = event
+        self._written += 1
+        slot = self._slot(time.time() if now is None else now)
+        key: SeriesKey = (event.stage, event.app, event.action_kind, event.status)
+        stats = slot.series.get(key)
+        if stats is None:
+            if len(slot.series) >= self._max_series:
+                key = (event.stage, OTHER_SERIES, OTHER_SERIES, event.status)
+                stats = slot.series.get(key)
+            if stats is None:
+                stats = slot.series[key] = SeriesStats()
+        weight = 1.0
+        stats.count += 1
+        if event.error_code or event.status.lower() in ERROR_STATUSES:
+            stats.errors += 1
+        else:
+            weight = 1.0 / sample_rate
+        stats.weighted += weight
+        slot.represented += weight
+        if event.latency_ms is not None:
+            stats.latency.record(event.latency_ms)
+
+    def recent(self, limit: int) -> list[TelemetryEvent]:
+        """The newest `limit` events, oldest first."""
+        count = min(limit, len(self))
+        start = self._written - count
+        return [self._ring[index % self.capacity] for index in range(start, self._written)]  # type: ignore[misc]
+
+    def summary(
+        self, windows_s: Iterable[int], group_by: Iterable[str] = ("stage",), *, now: float | None = None
+    ) -> TelemetrySummaryResponse:
+        group_by = list(group_by)
+        now = time.time() if now is None else now
+        windows: list[TelemetrySummaryWindow] = []
+        for window_s in windows_s:
+            groups = self.window_groups(window_s, group_by, now=now)
+            windows.append(
+                TelemetrySummaryWindow(
+                    window_s=window_s,
+                    count=round(sum(stats.weighted for stats in groups.values())),
+                    groups=[
+                        _summary_group(dict(zip(group_by, key)), stats)
+                        for key, stats in sorted(groups.items(), key=lambda item: -item[1].weighted)
+                    ],
+                )
+            )
+        return TelemetrySummaryResponse(
+            group_by=group_by,
+            slot_s=self.slot_s,
+            buffered_events=len(self),
+            total_events=self.total,
+            windows=windows,
+        )
+
+    def window_groups(
+        self, window_s: float, group_by: Iterable[str] = ("stage",), *, now: float | None = None
+    ) -> dict[tuple[str | None, ...], SeriesStats]:
+        """Merge the series of the slots within `window_s` into groups keyed by the `group_by` fields."""
+        positions = [GROUP_BY_FIELDS.index(name) for name in group_by]
+        groups: dict[tuple[str | None, ...], SeriesStats] = {}
+        for slot in self._slots_within(window_s, time.time() if now is None else now):
+            for key, stats in slot.series.items():
+                group_key = tuple(key[position] for position in positions)
+                merged = groups.get(group_key)
+                if merged is None:
+                    merged = groups[group_key] = SeriesStats()
+                merged.merge(stats)
+        return groups
+
+    def ingest_rate(self, *, now: float | None = None) -> float:
+        """Events per second over the last minute, counting each sampled event for the ones it stands for."""
+        window_s = min(_RATE_WINDOW_S, self.window_s)
+        slots = self._slots_within(window_s, time.time() if now is None else now)
+        return sum(slot.represented for slot in slots) / window_s
+
+    def batching_advice(self, *, now: float | None = None) -> tuple[float, float]:
+        """
+        The (sample_rate, flush_interval_s) clients should use next.
+
+        Below `telemetry_target_events_per_s` clients send everything every
+        `telemetry_flush_interval_s`; above it, both back off in proportion
+        to the overload.
+        """
+        target = settings.telemetry_target_events_per_s
+        load = self.ingest_rate(now=now) / target if target > 0 else 0.0
+        if load <= 1.0:
+            return 1.0, settings.telemetry_flush_interval_s
+        sample_rate = max(_MIN_SAMPLE_RATE, round(1.0 / load, 3))
+        flush_interval_s = min(settings.telemetry_max_flush_interval_s, settings.telemetry_flush_interval_s * load)
+        return sample_rate, round(flush_interval_s, 1)
+
+    def _slots_within(self, window_s: float, now: float) -> Iterator[_Slot]:
+        current = self._slot_index(now)
+        span = min(len(self._slots), max(1, math.ceil(window_s / self.slot_s)))
+        for index in range(current - span + 1, current + 1):
+            slot = self._slots[index % len(self._slots)]
+            if slot is not None and slot.index == index:
+                yield slot
+
+    def _slot_index(self, now: float) -> int:
+        return int(now // self.slot_s)
+
+    def _slot(self, now: float) -> _Slot:
+        index = self._slot_index(now)
+        position = index % len(self._slots)
+        slot = self._slots[position]
+        if slot is None or slot.index != index:
+            slot = self._slots[position] = _Slot(index=index)
+        return slot
+
+
+def _summary_group(fields: dict[str, str | None], stats: SeriesStats) -> TelemetrySummaryGroup:
+    latency = stats.latency
+    return TelemetrySummaryGroup(
+        **fields,
+        count=round(stats.weighted),
+        received=stats.count,
+        errors=stats.errors,
+        error_rate=round(stats.errors / stats.weighted, 4) if stats.weighted else 0.0,
+        latency_samples=latency.count,
+        p50_ms=latency.percentile(50),
+        p95_ms=latency.percentile(95),
+        p99_ms=latency.percentile(99),
+        max_ms=latency.max if latency.count else None,
+    )
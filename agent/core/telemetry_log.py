@@ -0,0 +1,302 @@
+"""Durable, append-only telemetry log: compressed frames in rotating segment files."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass, field
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+import time
+from typing import BinaryIO
+import zlib
+
+from .config import settings
+from .schemas import TelemetryEvent, TelemetryLogRecord, TelemetryLogStats
+
+
+# Frame header: magic, compressed payload length, event count, first and last recorded_at.
+_FRAME = struct.Struct("<4sIIdd")
+_FRAME_MAGIC = b"OTL1"
+_SEGMENT_SUFFIX = ".tlog"
+
+
+@dataclass(frozen=True)
+class _Frame:
+    offset: int
+    length: int
+    count: int
+    first_at: float
+    last_at: float
+
+
+@dataclass
+class _Segment:
+    path: Path
+    sequence: int
+    created_at: float
+    size: int = 0
+    frames: list[_Frame] = field(default_factory=list)
+
+    @property
+    def first_at(self) -> float:
+        return self.frames[0].first_at if self.frames else self.created_at
+
+    @property
+    def last_at(self) -> float:
+        return self.frames[-1].last_at if self.frames else self.created_at
+
+
+class TelemetryLog:
+    """
+    Append-only telemetry history that survives sidecar restarts.
+
+    `append` only buffers in memory; a background task hands the buffer to a
+    worker thread every `flush_interval_s`, which writes it as one
+    zlib-compressed frame of `recorded_at event-json` lines. Segments roll
+    over by size and age, and whole segments are deleted once the log
+    exceeds `max_bytes` or they are older than `retention_s`.
+
+    The time index is just each frame's header (first/last recorded_at,
+    offset, length), rebuilt on open by scanning headers. Range reads
+    memory-map only the overlapping segments and decompress only the
+    overlapping frames; a read with `limit` works back from the newest frame
+    and stops as soon as it has enough. A torn frame at the end of a segment
+    (crash mid-write) is ignored.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        *,
+        flush_interval_s: float | None = None,
+        segment_bytes: int | None = None,
+        segment_s: float | None = None,
+        max_bytes: int | None = None,
+        retention_s: float | None = None,
+        max_pending: int | None = None,
+    ) -> None:
+        self.directory = directory or settings.data_dir / "telemetry"
+        self.flush_interval_s = flush_interval_s or settings.telemetry_log_flush_s
+        self.segment_bytes = segment_bytes or settings.telemetry_log_segment_bytes
+        self.segment_s = segment_s or settings.telemetry_log_segment_s
+        self.max_bytes = max_bytes or settings.telemetry_log_max_bytes
+        self.retention_s = retention_s or settings.telemetry_log_retention_s
+        self._max_pending = max_pending or settings.telemetry_log_max_pending
+        self._pending: list[tuple[float, TelemetryEvent]] = []
+        # `_lock` guards the pending buffer and segment index; `_write_lock` serializes flushes.
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._segments: list[_Segment] | None = None
+        self._active: BinaryIO | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.written_events = 0
+        self.dropped_events = 0
+        self.write_errors = 0
+
+    def append(self, event: TelemetryEvent, *, now: float | None = None) -> None:
+        """Buffer one event; never touches the disk."""
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                # The writer is falling behind (or the disk is failing): shed the oldest.
+                del self._pending[0]
+                self.dropped_events += 1
+            self._pending.append((time.time() if now is None else now, event))
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._write_periodically())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await asyncio.to_thread(self.close)
+
+    def flush(self, *, now: float | None = None) -> int:
+        """Write everything buffered as one frame; returns the number of events written."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                self._write_frame(batch, time.time() if now is None else now)
+            except OSError:
+                self.write_errors += 1
+                self.dropped_events += len(batch)
+                self._close_active()
+                return 0
+            self.written_events += len(batch)
+            return len(batch)
+
+    def close(self) -> None:
+        self.flush()
+        with self._write_lock:
+            self._close_active()
+
+    def read(
+        self, *, since: float | None = None, until: float | None = None, limit: int | None = None
+    ) -> list[TelemetryLogRecord]:
+        """Events recorded within [since, until], oldest first; with `limit`, the newest `limit` of them."""
+        low = float("-inf") if since is None else since
+        high = float("inf") if until is None else until
+        with self._lock:
+            segments = [
+                (segment.path, [frame for frame in segment.frames if frame.last_at >= low and frame.first_at <= high])
+                for segment in self._index()
+                if segment.last_at >= low and segment.first_at <= high
+            ]
+            pending = [(at, event) for at, event in self._pending if low <= at <= high]
+        if limit is not None and limit <= 0:
+            return []
+        records = [TelemetryLogRecord(recorded_at=at, event=event) for at, event in pending]
+        # Walk newest-first and stop once `limit` records are in hand, so a limited read
+        # never decompresses the older frames it would throw away.
+        for path, frames in reversed(segments):
+            remaining = None if limit is None else limit - len(records)
+            if remaining is not None and remaining <= 0:
+                break
+            if frames:
+                records[:0] = _read_frames(path, frames, low, high, limit=remaining)
+        return records if limit is None else records[-limit:]
+
+    def stats(self) -> TelemetryLogStats:
+        with self._lock:
+            segments = self._index()
+            return TelemetryLogStats(
+                segments=len(segments),
+                bytes=sum(segment.size for segment in segments),
+                oldest_recorded_at=next((s.first_at for s in segments if s.frames), None),
+                buffered_events=len(self._pending),
+                written_events=self.written_events,
+                dropped_events=self.dropped_events,
+                write_errors=self.write_errors,
+            )
+
+    async def _write_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            if self._pending:
+                await asyncio.to_thread(self.flush)
+
+    def _write_frame(self, batch: list[tuple[float, TelemetryEvent]], now: float) -> None:
+        lines = b"".join(f"{at:.3f} ".encode() + event.model_dump_json().encode() + b"\n" for at, event in batch)
+        payload = zlib.compress(lines)
+        first_at = min(at for at, _ in batch)
+        last_at = max(at for at, _ in batch)
+        with self._lock:
+            segments = self._index()
+            active = segments[-1] if self._active is not None and segments else None
+        if active is None or active.size >= self.segment_bytes or now - active.created_at >= self.segment_s:
+            active = self._roll(now)
+        frame = _Frame(active.size, len(payload), len(batch), first_at, last_at)
+        handle = self._active
+        assert handle is not None
+        handle.write(_FRAME.pack(_FRAME_MAGIC, frame.length, frame.count, first_at, last_at) + payload)
+        handle.flush()
+        # Index the frame only once it is fully written, so readers never map a partial one.
+        with self._lock:
+            active.frames.append(frame)
+            active.size += _FRAME.size + len(payload)
+        self._enforce_retention(now)
+
+    def _roll(self, now: float) -> _Segment:
+        self._close_active()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            segments = self._index()
+            sequence = segments[-1].sequence + 1 if segments else 1
+            path = self.directory / f"{sequence:010d}{_SEGMENT_SUFFIX}"
+            segment = _Segment(path=path, sequence=sequence, created_at=now)
+            self._active = segment.path.open("ab")
+            segments.append(segment)
+        return segment
+
+    def _close_active(self) -> None:
+        active, self._active = self._active, None
+        if active is not None:
+            with suppress(OSError):
+                active.flush()
+                os.fsync(active.fileno())
+            active.close()
+
+    def _enforce_retention(self, now: float) -> None:
+        with self._lock:
+            segments = self._index()
+            expired: list[_Segment] = []
+            # Never delete the segment being written.
+            while len(segments) > 1 and (
+                now - segments[0].last_at > self.retention_s or sum(s.size for s in segments) > self.max_bytes
+            ):
+                expired.append(segments.pop(0))
+        for segment in expired:
+            with suppress(FileNotFoundError):
+                segment.path.unlink()
+
+    def _index(self) -> list[_Segment]:
+        """The segment index, scanned from disk on first use. Callers hold `_lock`."""
+        if self._segments is None:
+            self._segments = _scan(self.directory)
+        return self._segments
+
+
+def _scan(directory: Path) -> list[_Segment]:
+    segments: list[_Segment] = []
+    if not directory.is_dir():
+        return segments
+    for path in sorted(directory.glob(f"*{_SEGMENT_SUFFIX}")):
+        try:
+            sequence = int(path.stem)
+            stat = path.stat()
+        except (ValueError, OSError):
+            continue
+        segment = _Segment(path=path, sequence=sequence, created_at=stat.st_mtime)
+        with path.open("rb") as handle:
+            offset = 0
+            while True:
+                header = handle.read(_FRAME.size)
+                if len(header) < _FRAME.size:
+                    break
+                magic, length, count, first_at, last_at = _FRAME.unpack(header)
+                if magic != _FRAME_MAGIC or offset + _FRAME.size + length > stat.st_size:
+                    break
+                segment.frames.append(_Frame(offset, length, count, first_at, last_at))
+                offset += _FRAME.size + length
+                handle.seek(offset)
+        segment.size = offset
+        segments.append(segment)
+    return segments
+
+
+def _read_frames(
+    path: Path, frames: list[_Frame], low: float, high: float, *, limit: int | None = None
+) -> list[TelemetryLogRecord]:
+    """Records from `frames`, oldest first; with `limit`, decodes newest-first only until it has that many."""
+    chunks: list[list[TelemetryLogRecord]] = []
+    collected = 0
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        # Deleted by retention since the index was copied.
+        return []
+    with handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for frame in reversed(frames):
+            if limit is not None and collected >= limit:
+                break
+            start = frame.offset + _FRAME.size
+            chunk: list[TelemetryLogRecord] = []
+            for line in zlib.decompress(mapped[start : start + frame.length]).splitlines():
+                stamp, _, raw = line.partition(b" ")
+                recorded_at = float(stamp)
+                if low <= recorded_at <= high:
+                    chunk.append(
+                        TelemetryLogRecord(recorded_at=recorded_at, event=TelemetryEvent.model_validate_json(raw))
+                    )
+            chunks.append(chunk)
+            collected += len(chunk)
+    return [record for chunk in reversed(chunks) for record in chunk]
@@ -1,27 +1,176 @@
 from __future__ import annotations
 
-from difflib import SequenceMatcher
+from dataclasses import dataclass
 
-from core.config import SCHEMA_VERSION_CURRENT
-from core.schemas import VerifyRequest, VerifyResponse
+from core.config import SCHEMA_VERSION_CURRENT, settings
+from core.context_delta import context_delta
+from core.cpu_executor import CPUExecutor
+from core.request_dedup import TTLStore
+from core.schemas import (
+    Action,
+    ActionVerification,
+    VerifyRequest,
+    VerifyResponse,
+    VerifyStepRequest,
+    VerifyStepResponse,
+)
+from macos_use_adapter.ax_diff import ParsedNodes, match_expected_outcomes, match_outcomes, parse_ax_nodes
+
+
+@dataclass
+class StepBaseline:
+    """The latest context seen for a session, kept parsed so the next step only parses its own."""
+
+    context: str
+    nodes: ParsedNodes
+    step: int = 0
 
 
 class VerifierService:
-    """Deterministic verifier baseline with corrective hints."""
+    """
+    Deterministic verifier with per-action outcome checks and corrective hints.
+
+    When the plan carries `expected_outcome`s and both contexts are present,
+    each outcome is matched against the AX elements that changed; the first
+    unmet outcome pinpoints the failed step, and correction resumes there
+    instead of re-running the whole plan.
+    """
+
+    def __init__(self, cpu_executor: CPUExecutor | None = None) -> None:
+        self._cpu_executor = cpu_executor or CPUExecutor()
+        self._step_baselines: TTLStore[StepBaseline] = TTLStore(
+            ttl_s=settings.step_verify_ttl_s,
+            capacity=settings.step_verify_sessions,
+        )
 
     async def verify(self, request: VerifyRequest) -> VerifyResponse:
+        # The plan is over; step-wise state for the session is no longer needed.
+        self._step_baselines.pop(request.session_id)
+        # Diffing large contexts is CPU-bound; keep it off the event loop that serves SSE.
+        size = len(request.before_context or "") + len(request.after_context or "")
+        return await self._cpu_executor.run(self._evaluate, request, size=size)
+
+    async def verify_step(self, request: VerifyStepRequest) -> VerifyStepResponse:
+        """
+        Verify one executed action against the context the session last posted.
+
+        The first call (without an action) only stores the baseline. Each
+        later call diffs its context against the stored one, returns a verdict
+        for that step, and becomes the baseline for the next step. Baselines
+        are bounded per sidecar and expire, so an abandoned session costs
+        nothing for long.
+        """
+        baseline = self._step_baselines.get(request.session_id)
+        response, next_baseline = await self._cpu_executor.run(
+            self._evaluate_step, request, baseline, size=len(request.context)
+        )
+        self._step_baselines.put(request.session_id, next_baseline)
+        return response
+
+    @staticmethod
+    def _evaluate_step(
+        request: VerifyStepRequest, baseline: StepBaseline | None
+    ) -> tuple[VerifyStepResponse, StepBaseline]:
+        context = request.context.strip()
+        nodes = parse_ax_nodes(context)
+        action = request.action
+        if action is None or baseline is None:
+            if action is None:
+                reason = "Baseline context stored"
+            else:
+                reason = "No stored context for this session (expired or evicted); baseline reset"
+            response = VerifyStepResponse(
+                schema_version=SCHEMA_VERSION_CURRENT,
+                session_id=request.session_id,
+                step=0,
+                status="baseline" if action is None else "unverified",
+                confidence=0.0,
+                context_delta=0.0,
+                reason=reason,
+            )
+            return response, StepBaseline(context=context, nodes=nodes)
+
+        step = baseline.step + 1
+        delta_score = VerifierService._context_delta(baseline.context, context)
+        result: ActionVerification | None = None
+        if request.execution_result != "success":
+            status, confidence = "failure", 0.55
+            reason = request.reason or VerifierService._default_failure_reason(request.execution_result, delta_score)
+        else:
+            if action.expected_outcome:
+                match = match_outcomes([action.expected_outcome], baseline.nodes, nodes)[0]
+                result = ActionVerification(
+                    action_id=action.id,
+                    status=match.status,
+                    confidence=match.confidence,
+                    matched=match.matched,
+                    reason=match.reason,
+                )
+            if result is not None and result.status != "unverified":
+                status, confidence, reason = result.status, result.confidence, result.reason
+            elif delta_score >= 0.01:
+                status, confidence = "success", 0.9 if delta_score > 0.05 else 0.75
+                reason = f"Context changed after the step (delta {delta_score:.2f})"
+            else:
+                # Some steps (waits, focus changes) leave no trace in the AX summary.
+                status, confidence = "unverified", 0.0
+                reason = f"No observable context change ({delta_score:.2f})"
+
+        response = VerifyStepResponse(
+            schema_version=SCHEMA_VERSION_CURRENT,
+            session_id=request.session_id,
+            step=step,
+            status=status,
+            confidence=confidence,
+            context_delta=round(delta_score, 4),
+            reason=reason,
+            action_result=result,
+            corrective_actions=[action.model_copy(update={"id": f"retry_{action.id}"})] if status == "failure" else [],
+        )
+        return response, StepBaseline(context=context, nodes=nodes, step=step)
+
+    @staticmethod
+    def _evaluate(request: VerifyRequest) -> VerifyResponse:
         before_context = (request.before_context or "").strip()
         after_context = (request.after_context or "").strip()
-        delta_score = self._context_delta(before_context, after_context)
+        delta_score = VerifierService._context_delta(before_context, after_context)
+        actions = request.action_plan.actions
+        action_results = VerifierService._check_outcomes(actions, before_context, after_context)
+        verified = [result for result in action_results if result.status != "unverified"]
+        first_failed = next(
+            (index for index, result in enumerate(action_results) if result.status == "failure"), None
+        )
 
-        if request.execution_result == "success" and delta_score >= 0.01:
+        if request.execution_result == "success" and first_failed is None and (verified or delta_score >= 0.01):
+            if verified:
+                confidence = min(result.confidence for result in verified)
+                reason = f"All {len(verified)} expected outcomes observed (context delta {delta_score:.2f})"
+            else:
+                confidence = 0.9 if delta_score > 0.05 else 0.75
+                reason = f"Execution reported success with context delta {delta_score:.2f}"
             return VerifyResponse(
                 schema_version=SCHEMA_VERSION_CURRENT,
                 session_id=request.session_id,
                 status="success",
-                confidence=0.9 if delta_score > 0.05 else 0.75,
-                reason=f"Execution reported success with context delta {delta_score:.2f}",
+                confidence=confidence,
+                reason=reason,
                 corrective_actions=[],
+                action_results=action_results,
+            )
+
+        if first_failed is not None:
+            failed = action_results[first_failed]
+            return VerifyResponse(
+                schema_version=SCHEMA_VERSION_CURRENT,
+                session_id=request.session_id,
+                status="failure",
+                confidence=failed.confidence,
+                reason=request.reason or f"Action {failed.action_id}: {failed.reason}",
+                # Resume from the failed step; the steps before it already took effect.
+                corrective_actions=[
+                    action.model_copy(update={"id": f"retry_{action.id}"}) for action in actions[first_failed:]
+                ],
+                action_results=action_results,
             )
 
         corrective_actions = []
@@ -37,10 +186,27 @@ class VerifierService:
             session_id=request.session_id,
             status="failure",
             confidence=0.55 if request.execution_result != "success" else 0.45,
-            reason=request.reason or self._default_failure_reason(request.execution_result, delta_score),
+            reason=request.reason or VerifierService._default_failure_reason(request.execution_result, delta_score),
             corrective_actions=corrective_actions,
+            action_results=action_results,
         )
 
+    @staticmethod
+    def _check_outcomes(actions: list[Action], before: str, after: str) -> list[ActionVerification]:
+        if not before or not after or not any(action.expected_outcome for action in actions):
+            return []
+        matches = match_expected_outcomes([action.expected_outcome for action in actions], before, after)
+        return [
+            ActionVerification(
+                action_id=action.id,
+                status=match.status,
+                confidence=match.confidence,
+                matched=match.matched,
+                reason=match.reason,
+            )
+            for action, match in zip(actions, matches)
+        ]
+
     @staticmethod
     def _context_delta(before: str, after: str) -> float:
         if not before and not after:
@@ -49,8 +215,7 @@ class VerifierService:
             return 0.0
         if not before and after:
             return 1.0
-        ratio = SequenceMatcher(a=before, b=after).ratio()
-        return max(0.0, 1.0 - ratio)
+        return context_delta(before, after)
 
     @staticmethod
     def _default_failure_reason(execution_result: str, delta_score: float) -> str:
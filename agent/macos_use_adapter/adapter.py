@@ -1,17 +1,36 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from functools import partial
 import json
-from pathlib import Path
 import re
-import sys
-from typing import Any
+import time
+from typing import Any, Awaitable, Callable
 
 import httpx
 
 from core.config import settings
-from core.schemas import Action
+from core.cpu_executor import CPUExecutor
+from core.schemas import Action, PlanningMode
+from .ax_context import compress_ax_summary
+from .hedging import HedgeStats, is_usable_plan, run_hedged
+from .http_pool import ProviderConnectionPool
+from .intent_engine import LocalIntentEngine
+from .json_extract import ExtractedPayload, extract_json_object
+from .model_router import ModelRouter, RouteDecision
+from .stream_parser import ActionStreamParser
+from .usage import ProviderUsage, ProviderUsageStats
+from .vendor_rules import VendorRules, load_vendor_rules
+
+
+# Rough output size used to turn streamed characters into a progress fraction.
+_CHARS_PER_TOKEN_ESTIMATE = 4
+
+ActionCallback = Callable[[Action, float], Awaitable[None]]
+
+_ALLOWED_ACTION_KINDS = frozenset(
+    {"click", "type", "key_combo", "scroll", "open_app", "run_applescript", "select_menu_item", "wait"}
+)
 
 
 @dataclass
@@ -21,6 +40,74 @@ class AdapterResult:
     summary: str
     warnings: list[str]
     recovery_guidance: str | None = None
+    time_to_first_action_ms: int | None = None
+    usage: ProviderUsage | None = None
+    model: str | None = None
+
+
+@dataclass(frozen=True)
+class RecoveryContext:
+    """The executed prefix of a plan and the step that failed, for replanning only the suffix."""
+
+    completed: tuple[Action, ...]
+    remaining: tuple[Action, ...]
+    failure_reason: str | None = None
+
+    @property
+    def failed(self) -> Action:
+        return self.remaining[0]
+
+
+@dataclass(frozen=True)
+class PlanningProfile:
+    """Per-request planning knobs; the fast mode trades context and headroom for latency."""
+
+    mode: PlanningMode
+    max_tokens: int
+    ax_context_tokens: int
+    timeout_s: float
+    compact_rules: bool
+    local_min_confidence: float
+    fast_model: bool
+
+
+def planning_profile(low_latency: bool) -> PlanningProfile:
+    if low_latency:
+        return PlanningProfile(
+            mode="fast",
+            max_tokens=settings.fast_max_tokens,
+            ax_context_tokens=settings.fast_ax_context_tokens,
+            timeout_s=settings.fast_timeout_s,
+            compact_rules=True,
+            local_min_confidence=settings.fast_local_intent_min_confidence,
+            fast_model=True,
+        )
+    return PlanningProfile(
+        mode="standard",
+        max_tokens=900,
+        ax_context_tokens=settings.ax_context_budget_tokens,
+        timeout_s=24.0,
+        compact_rules=False,
+        local_min_confidence=settings.local_intent_min_confidence,
+        fast_model=False,
+    )
+
+
+# Replaces the vendor rules excerpt in fast mode: a fraction of the tokens, same hard limits.
+_COMPACT_RULES = (
+    "Safety rules: never send, post, delete, purchase or submit unless the user explicitly asked; "
+    "mark such actions destructive=true. Prefer keyboard shortcuts and menu items over clicks. "
+    "If the target is ambiguous, return a single wait action with expected_outcome explaining why.\n"
+)
+
+
+@dataclass
+class _ProviderReply:
+    text: str | None
+    usage: ProviderUsage
+    ttft_ms: int | None = None
+    time_to_first_action_ms: int | None = None
+    streamed_actions: list[Action] = field(default_factory=list)
 
 
 @dataclass
@@ -45,21 +132,19 @@ class MacOSUseAdapter:
     deterministic fallback plan when provider output is unparsable.
     """
 
-    def __init__(self) -> None:
-        self._vendor_loaded = False
-        self._important_rules = ""
-        self._load_vendor_prompt_rules()
-
-    _allowed_action_kinds = {
-        "click",
-        "type",
-        "key_combo",
-        "scroll",
-        "open_app",
-        "run_applescript",
-        "select_menu_item",
-        "wait",
-    }
+    def __init__(
+        self,
+        http_pool: ProviderConnectionPool | None = None,
+        cpu_executor: CPUExecutor | None = None,
+    ) -> None:
+        self._vendor_rules: VendorRules | None = None
+        self._http_pool = http_pool or ProviderConnectionPool()
+        self._cpu_executor = cpu_executor or CPUExecutor()
+        self._usage_stats = ProviderUsageStats()
+        self._intent_engine = LocalIntentEngine()
+        self._hedge_stats = HedgeStats()
+        self._router = ModelRouter()
+        self._static_instructions_text: dict[str, str] = {}
 
     @property
     def provider_name(self) -> str:
@@ -68,6 +153,13 @@ class MacOSUseAdapter:
     def current_api_key(self) -> str | None:
         return settings.provider_api_key()
 
+    async def startup(self) -> None:
+        if settings.enable_remote_llm and settings.provider_prewarm:
+            await self._http_pool.start()
+
+    async def shutdown(self) -> None:
+        await self._http_pool.aclose()
+
     async def validate_provider_key(self, api_key: str) -> ProviderValidationResult:
         key = api_key.strip()
         if not key:
@@ -84,8 +176,7 @@ class MacOSUseAdapter:
             "anthropic-version": "2023-06-01",
         }
         try:
-            async with httpx.AsyncClient(timeout=12.0) as client:
-                response = await client.get(url, headers=headers)
+            response = await self._http_pool.client().get(url, headers=headers, timeout=12.0)
         except httpx.RequestError:
             return ProviderValidationResult(valid=False, reason="Network error while validating key")
 
@@ -107,46 +198,65 @@ class MacOSUseAdapter:
 
         return ProviderValidationResult(valid=False, reason=f"Provider rejected key ({response.status_code})")
 
-    def _load_vendor_prompt_rules(self) -> None:
-        vendor_path = settings.vendor_macos_use
-        if not vendor_path.exists():
-            return
+    def _loaded_vendor_rules(self) -> VendorRules:
+        # Deferred to the first prompt so vendor loading stays off the startup path.
+        if self._vendor_rules is None:
+            self._vendor_rules = load_vendor_rules()
+        return self._vendor_rules
 
-        sys.path.insert(0, str(vendor_path))
-        try:
-            from mlx_use.agent.prompts import SystemPrompt  # type: ignore
-
-            prompt = SystemPrompt(
-                action_description=(
-                    "open_app, click, type, key_combo, scroll, run_applescript, select_menu_item, wait"
-                ),
-                current_date=datetime.now(),
-                max_actions_per_step=4,
+    def require_api_key(self) -> str:
+        key = self.current_api_key()
+        if not key:
+            raise ProviderConfigurationError(
+                "Anthropic API key not configured. Please add your key in Orange settings.",
+                status_code=400,
+                error_code="missing_api_key",
             )
-            self._important_rules = prompt.important_rules()
-            self._vendor_loaded = True
-        except Exception:
-            self._important_rules = self._load_rules_from_source(vendor_path)
-            self._vendor_loaded = bool(self._important_rules)
-        finally:
-            if str(vendor_path) in sys.path:
-                sys.path.remove(str(vendor_path))
+        if not key.startswith("sk-ant-"):
+            raise ProviderConfigurationError(
+                "Anthropic API key format is invalid.",
+                status_code=401,
+                error_code="invalid_api_key_format",
+            )
+        return key
 
-    @staticmethod
-    def _load_rules_from_source(vendor_path: Path) -> str:
-        prompt_file = vendor_path / "mlx_use" / "agent" / "prompts.py"
-        if not prompt_file.exists():
-            return ""
-
-        content = prompt_file.read_text(encoding="utf-8")
-        match = re.search(
-            r"def important_rules\\(self\\) -> str:\\n\\s+\"\"\".*?\"\"\"\\n\\s+text = \"\"\"(.*?)\"\"\"",
-            content,
-            flags=re.DOTALL,
+    def select_model(
+        self,
+        transcript: str,
+        *,
+        active_app_name: str | None,
+        preferred_model: str | None = None,
+        profile: PlanningProfile | None = None,
+    ) -> str:
+        return self._router.choose(
+            transcript,
+            app=active_app_name,
+            preferred_model=preferred_model,
+            fast_only=bool(profile and profile.fast_model),
+        ).model
+
+    def record_verification(self, *, model: str, active_app_name: str | None, success: bool) -> None:
+        self._router.record_verification(model, active_app_name, success=success)
+
+    def routing_snapshot(self) -> tuple[list[dict[str, Any]], list[RouteDecision]]:
+        return self._router.snapshot(), self._router.recent_decisions()
+
+    def plan_locally(
+        self, *, transcript: str, active_app_name: str | None, profile: PlanningProfile | None = None
+    ) -> AdapterResult | None:
+        """Answer trivial commands from the local intent grammar; None means ask the provider."""
+        if not settings.local_intents_enabled:
+            return None
+        match = self._intent_engine.match(transcript, app_name=active_app_name)
+        min_confidence = profile.local_min_confidence if profile else settings.local_intent_min_confidence
+        if match is None or match.confidence < min_confidence:
+            return None
+        return AdapterResult(
+            actions=match.actions,
+            confidence=match.confidence,
+            summary=match.summary,
+            warnings=[],
         )
-        if not match:
-            return ""
-        return match.group(1).strip()
 
     async def plan_actions(
         self,
@@ -154,30 +264,129 @@ class MacOSUseAdapter:
         transcript: str,
         active_app_name: str | None,
         _ax_tree_summary: str | None,
+        on_action: ActionCallback | None = None,
+        allow_local: bool = True,
+        race_model_tiers: bool = False,
+        preferred_model: str | None = None,
+        profile: PlanningProfile | None = None,
     ) -> AdapterResult:
+        profile = profile or planning_profile(low_latency=False)
         if not settings.enable_remote_llm:
-            return self._deterministic_plan(transcript=transcript, app_name=active_app_name, warnings=["Remote planner disabled"])
+            local_result = (
+                self.plan_locally(transcript=transcript, active_app_name=active_app_name, profile=profile)
+                if allow_local
+                else None
+            )
+            return local_result or self._deterministic_plan(
+                transcript=transcript, app_name=active_app_name, warnings=["Remote planner disabled"]
+            )
 
-        key = self.current_api_key()
-        if not key:
-            raise ProviderConfigurationError(
-                "Anthropic API key not configured. Please add your key in Orange settings.",
-                status_code=400,
-                error_code="missing_api_key",
+        key = self.require_api_key()
+        if allow_local:
+            local_result = self.plan_locally(transcript=transcript, active_app_name=active_app_name, profile=profile)
+            if local_result is not None:
+                return local_result
+
+        decision = self._router.choose(
+            transcript, app=active_app_name, preferred_model=preferred_model, fast_only=profile.fast_model
+        )
+        self._router.note_decision(decision)
+        primary_model = decision.model
+        race = race_model_tiers or settings.race_model_tiers
+        if settings.hedge_mode == "off" and not race:
+            return await self._plan_with_anthropic(
+                transcript=transcript,
+                active_app_name=active_app_name,
+                ax_tree_summary=_ax_tree_summary,
+                api_key=key,
+                on_action=on_action,
+                model=primary_model,
+                profile=profile,
             )
-        if not key.startswith("sk-ant-"):
-            raise ProviderConfigurationError(
-                "Anthropic API key format is invalid.",
-                status_code=401,
-                error_code="invalid_api_key_format",
+
+        if race or settings.hedge_mode == "tier":
+            hedge_model = settings.model_complex if primary_model == settings.model_simple else settings.model_simple
+        else:
+            hedge_model = primary_model
+
+        async def attempt(model: str, attempt_on_action: ActionCallback | None) -> AdapterResult:
+            return await self._plan_with_anthropic(
+                transcript=transcript,
+                active_app_name=active_app_name,
+                ax_tree_summary=_ax_tree_summary,
+                api_key=key,
+                on_action=attempt_on_action,
+                model=model,
+                profile=profile,
             )
 
-        return await self._plan_with_anthropic(
+        return await run_hedged(
+            attempt,
+            primary_model=primary_model,
+            hedge_model=hedge_model,
+            hedge_after_s=None if race else self._hedge_delay_s(primary_model),
+            on_action=on_action,
+            stats=self._hedge_stats,
+        )
+
+    async def replan_actions(
+        self,
+        *,
+        transcript: str,
+        active_app_name: str | None,
+        ax_tree_summary: str | None,
+        recovery: RecoveryContext,
+        on_action: ActionCallback | None = None,
+        preferred_model: str | None = None,
+        profile: PlanningProfile | None = None,
+    ) -> AdapterResult:
+        """
+        Ask the provider for the actions that replace a failed plan suffix.
+
+        The system blocks are the same as for a full plan; only the completed
+        steps, the failed step and the current AX context are new. Without a usable provider answer the
+        failed step and the rest of the original plan are retried as-is.
+        """
+        profile = profile or planning_profile(low_latency=False)
+        if not settings.enable_remote_llm:
+            return self._retry_remaining(recovery, warnings=["Remote planner disabled"])
+
+        key = self.require_api_key()
+        decision = self._router.choose(
+            transcript, app=active_app_name, preferred_model=preferred_model, fast_only=profile.fast_model
+        )
+        self._router.note_decision(decision)
+        result = await self._plan_with_anthropic(
             transcript=transcript,
             active_app_name=active_app_name,
-            ax_tree_summary=_ax_tree_summary,
+            ax_tree_summary=ax_tree_summary,
             api_key=key,
+            on_action=on_action,
+            model=decision.model,
+            profile=profile,
+            recovery=recovery,
         )
+        if result.actions and result.recovery_guidance is None:
+            return result
+        return self._retry_remaining(recovery, warnings=result.warnings or ["Provider returned no usable replan"])
+
+    @staticmethod
+    def _retry_remaining(recovery: RecoveryContext, *, warnings: list[str]) -> AdapterResult:
+        return AdapterResult(
+            actions=[action.model_copy() for action in recovery.remaining],
+            confidence=0.5,
+            summary=f"Retry from failed step {recovery.failed.id}",
+            warnings=warnings,
+            recovery_guidance="Replanning was unavailable; retrying the failed step and the rest of the plan.",
+        )
+
+    def _hedge_delay_s(self, model: str) -> float:
+        """Hedge once a request is slower than the model's observed p90."""
+        window = self._router.latency_window(model)
+        if len(window) < settings.hedge_min_samples:
+            return settings.hedge_default_delay_ms / 1000
+        p90 = window.percentile(90) or settings.hedge_default_delay_ms
+        return max(settings.hedge_min_delay_ms, p90) / 1000
 
     async def _plan_with_anthropic(
         self,
@@ -186,19 +395,28 @@ class MacOSUseAdapter:
         active_app_name: str | None,
         ax_tree_summary: str | None,
         api_key: str,
+        on_action: ActionCallback | None = None,
+        model: str | None = None,
+        profile: PlanningProfile | None = None,
+        recovery: RecoveryContext | None = None,
     ) -> AdapterResult:
-        model = self._select_model(transcript, active_app_name=active_app_name)
-        prompt = self._build_provider_prompt(
+        profile = profile or planning_profile(low_latency=False)
+        model = model or self._select_model(transcript, active_app_name=active_app_name)
+        prompt = await self._build_provider_prompt(
             transcript=transcript,
             active_app_name=active_app_name,
             ax_tree_summary=ax_tree_summary,
+            profile=profile,
+            recovery=recovery,
         )
+        # A replacement suffix is a few actions; do not reserve a full plan's output budget.
+        max_tokens = min(profile.max_tokens, settings.replan_max_tokens) if recovery else profile.max_tokens
 
         payload: dict[str, Any] = {
             "model": model,
             "temperature": 0,
-            "max_tokens": 900,
-            "system": "You are Orange planner. Return only valid JSON. Do not include markdown.",
+            "max_tokens": max_tokens,
+            "system": self._build_system_blocks(active_app_name, profile=profile),
             "messages": [
                 {"role": "user", "content": prompt},
             ],
@@ -211,43 +429,153 @@ class MacOSUseAdapter:
             "content-type": "application/json",
         }
 
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=24.0) as client:
-                response = await client.post(url, headers=headers, json=payload)
+            if on_action is None:
+                response = await self._http_pool.client().post(
+                    url, headers=headers, json=payload, timeout=profile.timeout_s
+                )
+                self._raise_for_provider_status(response.status_code)
+                body = response.json()
+                usage = ProviderUsage()
+                usage.update(body.get("usage"))
+                reply = _ProviderReply(text=self._extract_text_content(body), usage=usage)
+            else:
+                payload["stream"] = True
+                reply = await self._stream_provider_text(
+                    url=url,
+                    headers=headers,
+                    payload=payload,
+                    on_action=on_action,
+                    timeout_s=profile.timeout_s,
+                )
         except httpx.RequestError as exc:
             raise ProviderConfigurationError(
                 f"Network error while contacting Anthropic: {exc.__class__.__name__}",
                 status_code=503,
                 error_code="provider_network_error",
             ) from exc
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        self._usage_stats.record(reply.usage, latency_ms=latency_ms, ttft_ms=reply.ttft_ms)
+
+        # JSON extraction and action validation are CPU-bound; large replies run off the event loop.
+        parsed = (
+            await self._cpu_executor.run(parse_provider_text, reply.text, size=len(reply.text))
+            if reply.text
+            else None
+        )
+        result = self._result_from_provider_text(
+            reply.text,
+            transcript=transcript,
+            active_app_name=active_app_name,
+            streamed_actions=reply.streamed_actions,
+            parsed=parsed,
+        )
+        self._router.record_plan(model, active_app_name, latency_ms=latency_ms, parsed=is_usable_plan(result))
+        result.time_to_first_action_ms = reply.time_to_first_action_ms
+        result.usage = reply.usage
+        result.model = model
+        return result
 
-        if response.status_code in {401, 403}:
+    async def _stream_provider_text(
+        self,
+        *,
+        url: str,
+        headers: dict[str, str],
+        payload: dict[str, Any],
+        on_action: ActionCallback,
+        timeout_s: float = 24.0,
+    ) -> _ProviderReply:
+        """
+        Consume a `stream=true` Messages response, handing each completed
+        action to `on_action` while the rest of the plan is still generating.
+        """
+        parser = ActionStreamParser()
+        reply = _ProviderReply(text=None, usage=ProviderUsage())
+        started = time.perf_counter()
+        output_budget_chars = max(1, int(payload["max_tokens"]) * _CHARS_PER_TOKEN_ESTIMATE)
+
+        async with self._http_pool.client().stream("POST", url, headers=headers, json=payload, timeout=timeout_s) as response:
+            self._raise_for_provider_status(response.status_code)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    event = json.loads(line[5:].strip())
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(event, dict):
+                    continue
+                if event.get("type") == "error":
+                    raise ProviderConfigurationError(
+                        "Anthropic stream reported an error.",
+                        status_code=502,
+                        error_code="provider_bad_response",
+                    )
+                if event.get("type") == "message_start" and isinstance(event.get("message"), dict):
+                    reply.usage.update(event["message"].get("usage"))
+                    continue
+                if event.get("type") == "message_delta":
+                    reply.usage.update(event.get("usage"))
+                    continue
+                delta = event.get("delta")
+                if event.get("type") != "content_block_delta" or not isinstance(delta, dict):
+                    continue
+                chunk = delta.get("text")
+                if delta.get("type") != "text_delta" or not isinstance(chunk, str):
+                    continue
+                if reply.ttft_ms is None:
+                    reply.ttft_ms = int((time.perf_counter() - started) * 1000)
+                for position, raw in parser.feed(chunk):
+                    # The raw position, as coerce_actions uses for the final plan: dropping an
+                    # invalid action must not shift the default ids of the ones after it.
+                    action, _ = coerce_action(raw, position)
+                    if action is None:
+                        continue
+                    reply.streamed_actions.append(action)
+                    if reply.time_to_first_action_ms is None:
+                        reply.time_to_first_action_ms = int((time.perf_counter() - started) * 1000)
+                    await on_action(action, min(1.0, len(parser.text) / output_budget_chars))
+
+        reply.text = parser.text.strip() or None
+        return reply
+
+    @staticmethod
+    def _raise_for_provider_status(status_code: int) -> None:
+        if status_code in {401, 403}:
             raise ProviderConfigurationError(
                 "Anthropic API key is invalid or unauthorized.",
                 status_code=401,
                 error_code="invalid_api_key",
             )
-        if response.status_code == 429:
+        if status_code == 429:
             raise ProviderConfigurationError(
                 "Anthropic quota or rate limit exceeded.",
                 status_code=429,
                 error_code="provider_quota_exceeded",
             )
-        if response.status_code >= 500:
+        if status_code >= 500:
             raise ProviderConfigurationError(
                 "Anthropic service is temporarily unavailable.",
                 status_code=503,
                 error_code="provider_unavailable",
             )
-        if response.status_code >= 300:
+        if status_code >= 300:
             raise ProviderConfigurationError(
-                f"Anthropic returned unexpected status {response.status_code}.",
+                f"Anthropic returned unexpected status {status_code}.",
                 status_code=502,
                 error_code="provider_bad_response",
             )
 
-        body = response.json()
-        content_text = self._extract_text_content(body)
+    def _result_from_provider_text(
+        self,
+        content_text: str | None,
+        *,
+        transcript: str,
+        active_app_name: str | None,
+        streamed_actions: list[Action],
+        parsed: ParsedProviderText | None = None,
+    ) -> AdapterResult:
         if not content_text:
             return self._deterministic_plan(
                 transcript=transcript,
@@ -255,15 +583,25 @@ class MacOSUseAdapter:
                 warnings=["Provider returned empty content"],
             )
 
-        parsed_payload = self._extract_json_payload(content_text)
-        if parsed_payload is None:
+        parsed = parsed or parse_provider_text(content_text)
+        extracted = parsed.extracted
+        if extracted is None or (extracted.truncated and len(streamed_actions) > extracted.salvaged_actions):
+            if streamed_actions:
+                # Actions already went out on the event stream; keep the plan consistent with them.
+                return AdapterResult(
+                    actions=streamed_actions,
+                    confidence=0.6,
+                    summary="Anthropic generated plan (incomplete response)",
+                    warnings=[f"Provider response was truncated; kept {len(streamed_actions)} streamed actions"],
+                )
             return self._deterministic_plan(
                 transcript=transcript,
                 app_name=active_app_name,
                 warnings=["Provider response was not valid JSON"],
             )
 
-        actions, warnings = self._coerce_actions(parsed_payload.get("actions", []))
+        parsed_payload = extracted.payload
+        actions, warnings = parsed.actions, list(parsed.warnings)
         if not actions:
             warnings = warnings or ["Provider returned no valid actions"]
             return AdapterResult(
@@ -283,6 +621,13 @@ class MacOSUseAdapter:
 
         confidence = self._clamp_confidence(parsed_payload.get("confidence"))
         summary = str(parsed_payload.get("summary") or "Anthropic generated plan")
+        if extracted.truncated:
+            # The tail of the plan is missing; what was kept is sound but may be incomplete.
+            confidence = min(confidence, 0.6)
+            warnings.append(
+                f"Provider response was truncated; salvaged {extracted.salvaged_actions} complete actions "
+                f"({extracted.discarded_chars} trailing characters dropped)"
+            )
         return AdapterResult(actions=actions, confidence=confidence, summary=summary, warnings=warnings)
 
     def _extract_text_content(self, payload: dict[str, Any]) -> str | None:
@@ -296,88 +641,83 @@ class MacOSUseAdapter:
         joined = "\n".join(parts).strip()
         return joined or None
 
-    def _extract_json_payload(self, text: str) -> dict[str, Any] | None:
-        stripped = text.strip()
-        try:
-            parsed = json.loads(stripped)
-            if isinstance(parsed, dict):
-                return parsed
-        except json.JSONDecodeError:
-            pass
-
-        match = re.search(r"\{[\s\S]*\}", stripped)
-        if not match:
-            return None
-        try:
-            parsed = json.loads(match.group(0))
-            if isinstance(parsed, dict):
-                return parsed
-        except json.JSONDecodeError:
-            return None
-        return None
-
-    def _coerce_actions(self, raw_actions: list[dict[str, Any]]) -> tuple[list[Action], list[str]]:
-        actions: list[Action] = []
-        warnings: list[str] = []
-        for idx, raw in enumerate(raw_actions, start=1):
-            if not isinstance(raw, dict):
-                warnings.append(f"Action #{idx} is not an object")
-                continue
-            kind = str(raw.get("kind") or "").strip()
-            if kind not in self._allowed_action_kinds:
-                warnings.append(f"Rejected unknown action kind '{kind or 'missing'}' at index {idx}")
-                continue
-            try:
-                actions.append(
-                    Action(
-                        id=str(raw.get("id") or f"a{idx}"),
-                        kind=kind,  # type: ignore[arg-type]
-                        target=cast_optional_str(raw.get("target")),
-                        text=cast_optional_str(raw.get("text")),
-                        key_combo=cast_optional_str(raw.get("key_combo")),
-                        app_bundle_id=cast_optional_str(raw.get("app_bundle_id")),
-                        timeout_ms=cast_int(raw.get("timeout_ms"), default=3000),
-                        destructive=bool(raw.get("destructive", False)),
-                        expected_outcome=cast_optional_str(raw.get("expected_outcome")),
-                    )
-                )
-            except Exception as exc:
-                warnings.append(f"Rejected invalid action at index {idx}: {exc}")
-                continue
-        return actions, warnings
+    def _build_system_blocks(
+        self, active_app_name: str | None, *, profile: PlanningProfile | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Stable instructions, ordered most-shared first: the planner rules are
+        identical on every call, the app pack only changes with the frontmost
+        app. No cache breakpoint is set: even with the vendored rules excerpt
+        the prefix is a few KB, under the provider's minimum cacheable prompt
+        of 1024 tokens (2048 for Haiku), where a breakpoint is ignored.
+        """
+        app_pack = self._app_prompt_pack(active_app_name or "Unknown")
+        compact = bool(profile and profile.compact_rules)
+        return [
+            {"type": "text", "text": self._static_instructions(compact=compact)},
+            {"type": "text", "text": f"App-specific guidance: {app_pack}"},
+        ]
+
+    def _static_instructions(self, *, compact: bool = False) -> str:
+        cache_key = "compact" if compact else "full"
+        text = self._static_instructions_text.get(cache_key)
+        if text is None:
+            rules = _COMPACT_RULES if compact else f"Safety rules excerpt: {self._loaded_vendor_rules().rules[:2400]}\n"
+            text = self._static_instructions_text[cache_key] = (
+                "You are Orange planner. Return only valid JSON. Do not include markdown.\n"
+                "Plan safe macOS actions for the user request.\n"
+                "Return strictly JSON with shape: "
+                '{"summary":"...", "confidence":0.0-1.0, "actions":[{"id":"a1","kind":"open_app|click|type|key_combo|scroll|run_applescript|select_menu_item|wait","target":null,"text":null,"key_combo":null,"app_bundle_id":null,"timeout_ms":3000,"destructive":false,"expected_outcome":null}]}\n'
+                "Use the fewest actions needed.\n"
+                f"{rules}"
+            )
+        return text
 
-    def _build_provider_prompt(
+    async def _build_provider_prompt(
         self,
         *,
         transcript: str,
         active_app_name: str | None,
         ax_tree_summary: str | None,
+        profile: PlanningProfile | None = None,
+        recovery: RecoveryContext | None = None,
     ) -> str:
         app_name = active_app_name or "Unknown"
-        ax_preview = (ax_tree_summary or "")[:3500]
-        app_pack = self._app_prompt_pack(app_name)
-        vendor_rules = self._important_rules[:2400] if self._important_rules else ""
-        return (
-            "Plan safe macOS actions for this user request.\n"
-            "Return strictly JSON with shape: "
-            '{"summary":"...", "confidence":0.0-1.0, "actions":[{"id":"a1","kind":"open_app|click|type|key_combo|scroll|run_applescript|select_menu_item|wait","target":null,"text":null,"key_combo":null,"app_bundle_id":null,"timeout_ms":3000,"destructive":false,"expected_outcome":null}]}\n'
-            "Use the fewest actions needed.\n"
+        ax_tokens = profile.ax_context_tokens if profile else settings.ax_context_budget_tokens
+        query = transcript
+        if recovery is not None:
+            # Keep the AX nodes the failed step was aiming at, not just the ones the transcript names.
+            failed = recovery.failed
+            query = " ".join(part for part in (transcript, failed.target, failed.expected_outcome) if part)
+        summary = ax_tree_summary or ""
+        # BM25 over a large tree takes tens of milliseconds; offload it like provider output parsing.
+        ax_preview = await self._cpu_executor.run(
+            partial(compress_ax_summary, budget_chars=ax_tokens * _CHARS_PER_TOKEN_ESTIMATE),
+            summary,
+            query,
+            size=len(summary),
+        )
+        prompt = (
             f"Active app: {app_name}\n"
             f"User transcript: {transcript}\n"
             f"AX summary: {ax_preview}\n"
-            f"App-specific guidance: {app_pack}\n"
-            f"Safety rules excerpt: {vendor_rules}\n"
+        )
+        if recovery is None:
+            return prompt
+        completed = "\n".join(_compact_action(action) for action in recovery.completed) or "(none)"
+        remaining = "\n".join(_compact_action(action) for action in recovery.remaining)
+        return (
+            f"{prompt}"
+            f"Completed steps (already executed, do not repeat):\n{completed}\n"
+            f"Failed step: {_compact_action(recovery.failed)}\n"
+            f"Failure reason: {recovery.failure_reason or 'expected outcome not observed'}\n"
+            f"Original remaining steps:\n{remaining}\n"
+            "Return only the actions that finish the request from the current AX state, "
+            f"numbered from a{len(recovery.completed) + 1}.\n"
         )
 
     def _select_model(self, transcript: str, *, active_app_name: str | None) -> str:
-        if active_app_name:
-            override = settings.model_overrides.get(active_app_name.lower())
-            if override:
-                return override
-        complexity_markers = [" and ", " then ", "after", "before", "reply", "send", "purchase"]
-        lower = transcript.lower()
-        is_complex = len(lower.split()) > 10 or any(marker in lower for marker in complexity_markers)
-        return settings.model_complex if is_complex else settings.model_simple
+        return self._router.choose(transcript, app=active_app_name).model
 
     def _app_prompt_pack(self, app_name: str) -> str:
         key = app_name.lower()
@@ -459,13 +799,78 @@ class MacOSUseAdapter:
         tail = key[-4:] if len(key) >= 4 else "****"
         return f"••••{tail}"
 
+    def usage_snapshot(self) -> dict[str, Any]:
+        return {**self._usage_stats.snapshot(), "hedging": self._hedge_stats.snapshot()}
+
     @property
     def vendor_loaded(self) -> bool:
-        return self._vendor_loaded
+        return self._loaded_vendor_rules().loaded
 
     @property
     def vendor_rules(self) -> str:
-        return self._important_rules
+        return self._loaded_vendor_rules().rules
+
+
+@dataclass
+class ParsedProviderText:
+    extracted: ExtractedPayload | None
+    actions: list[Action] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+
+def parse_provider_text(content_text: str) -> ParsedProviderText:
+    """
+    Extract the plan object and validate its actions. Pure and module-level so
+    CPUExecutor can run it in a worker thread or process.
+    """
+    extracted = extract_json_object(content_text)
+    if extracted is None:
+        return ParsedProviderText(extracted=None)
+    actions, warnings = coerce_actions(extracted.payload.get("actions", []))
+    return ParsedProviderText(extracted=extracted, actions=actions, warnings=warnings)
+
+
+def _compact_action(action: Action) -> str:
+    return json.dumps(action.model_dump(mode="json", exclude_none=True), separators=(",", ":"))
+
+
+def coerce_actions(raw_actions: Any) -> tuple[list[Action], list[str]]:
+    actions: list[Action] = []
+    warnings: list[str] = []
+    if not isinstance(raw_actions, list):
+        return actions, warnings
+    for idx, raw in enumerate(raw_actions, start=1):
+        action, warning = coerce_action(raw, idx)
+        if action is not None:
+            actions.append(action)
+        if warning is not None:
+            warnings.append(warning)
+    return actions, warnings
+
+
+def coerce_action(raw: Any, idx: int) -> tuple[Action | None, str | None]:
+    if not isinstance(raw, dict):
+        return None, f"Action #{idx} is not an object"
+    kind = str(raw.get("kind") or "").strip()
+    if kind not in _ALLOWED_ACTION_KINDS:
+        return None, f"Rejected unknown action kind '{kind or 'missing'}' at index {idx}"
+    try:
+        return (
+            Action(
+                id=str(raw.get("id") or f"a{idx}"),
+                kind=kind,  # type: ignore[arg-type]
+                target=cast_optional_str(raw.get("target")),
+                text=cast_optional_str(raw.get("text")),
+                key_combo=cast_optional_str(raw.get("key_combo")),
+                app_bundle_id=cast_optional_str(raw.get("app_bundle_id")),
+                timeout_ms=cast_int(raw.get("timeout_ms"), default=3000),
+                destructive=bool(raw.get("destructive", False)),
+                expected_outcome=cast_optional_str(raw.get("expected_outcome")),
+            ),
+            None,
+        )
+    except Exception as exc:
+        return None, f"Rejected invalid action at index {idx}: {exc}"
 
 
 
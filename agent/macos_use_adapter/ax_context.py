@@ -0,0 +1,189 @@
+"""Relevance-ranked compression of accessibility tree summaries."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+import math
+import re
+
+
+# One element per line: `[12] depth=3 role=AXButton title="Send" value="" ...` as
+# written by the desktop AccessibilityReader, or an indented `AXRole: text` line.
+_HEADER_RE = re.compile(r"\[\d+\] depth=(\d+) role=(\S+)")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+MAX_LINE_CHARS = 320
+
+# Elements the planner can act on are worth more than layout containers.
+_ROLE_PRIORS = {
+    "AXButton": 0.6,
+    "AXTextField": 0.7,
+    "AXTextArea": 0.7,
+    "AXSearchField": 0.7,
+    "AXComboBox": 0.5,
+    "AXMenuItem": 0.5,
+    "AXMenuButton": 0.5,
+    "AXPopUpButton": 0.5,
+    "AXLink": 0.5,
+    "AXCheckBox": 0.4,
+    "AXRadioButton": 0.4,
+    "AXTab": 0.4,
+    "AXRow": 0.3,
+    "AXCell": 0.3,
+    "AXStaticText": 0.2,
+    "AXHeading": 0.3,
+    "AXWindow": 0.2,
+}
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from i in into is it me my of on or please the then this to "
+    "up with you your".split()
+)
+
+# BM25 parameters.
+_K1 = 1.2
+_B = 0.75
+
+
+@dataclass(slots=True)
+class AXTree:
+    """Parsed summary stored column-wise; element `i` is line `lines[i]`."""
+
+    lines: list[str] = field(default_factory=list)
+    offsets: list[int] = field(default_factory=list)
+    depths: list[int] = field(default_factory=list)
+    parents: list[int] = field(default_factory=list)
+    priors: list[float] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(token) > len(suffix) + 2 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def _query_terms(transcript: str) -> set[str]:
+    return {_stem(token) for token in _TOKEN_RE.findall(transcript.lower()) if token not in _STOPWORDS}
+
+
+def parse_ax_summary(summary: str) -> AXTree:
+    """Parse elements with their depth, parent, and a role/focus prior."""
+    tree = AXTree()
+    lines, offsets, depths, parents, priors = tree.lines, tree.offsets, tree.depths, tree.parents, tree.priors
+    stack: list[int] = []
+    offset = 0
+    for raw_line in summary.split("\n"):
+        line_offset = offset
+        offset += len(raw_line) + 1
+        line = raw_line.rstrip()
+        if not line:
+            continue
+        header = _HEADER_RE.match(line)
+        if header is not None:
+            depth = int(header.group(1))
+            prior = _ROLE_PRIORS.get(header.group(2), 0.0)
+            if line.count('=""') >= 3:
+                prior -= 0.5
+        else:
+            stripped = line.lstrip()
+            depth = (len(line) - len(stripped)) // 2
+            line = stripped
+            prior = _ROLE_PRIORS.get(line.partition(":")[0], 0.0) if line.startswith("AX") else 0.0
+        if "focused=true" in line or "AXFocused" in line:
+            prior += 3.0
+        if "enabled=false" in line:
+            prior -= 0.3
+        if len(line) > MAX_LINE_CHARS:
+            line = line[: MAX_LINE_CHARS - 3] + "..."
+
+        while stack and depths[stack[-1]] >= depth:
+            stack.pop()
+        parents.append(stack[-1] if stack else -1)
+        stack.append(len(lines))
+        lines.append(line)
+        offsets.append(line_offset)
+        depths.append(depth)
+        priors.append(prior)
+    return tree
+
+
+def _scores(tree: AXTree, summary: str, query: set[str]) -> list[float]:
+    """BM25 of each element against the query, plus its prior."""
+    scores = list(tree.priors)
+    count = len(tree)
+    if not query or not count:
+        return scores
+    # Stemmed query terms match as word prefixes; str.find keeps the scan in C.
+    text = summary.lower()
+    offsets = tree.offsets
+    term_freq: dict[int, dict[str, int]] = {}
+    for term in query:
+        position = text.find(term)
+        while position != -1:
+            if position == 0 or not text[position - 1].isalnum():
+                index = bisect_right(offsets, position) - 1
+                counts = term_freq.setdefault(index, {})
+                counts[term] = counts.get(term, 0) + 1
+            position = text.find(term, position + len(term))
+
+    doc_freq = dict.fromkeys(query, 0)
+    for counts in term_freq.values():
+        for term in counts:
+            doc_freq[term] += 1
+    idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+    average_length = sum(map(len, tree.lines)) / count
+
+    for index, counts in term_freq.items():
+        length_norm = _K1 * (1 - _B + _B * len(tree.lines[index]) / average_length)
+        for term, tf in counts.items():
+            scores[index] += idf[term] * tf * (_K1 + 1) / (tf + length_norm)
+    return scores
+
+
+def compress_ax_summary(summary: str, transcript: str, *, budget_chars: int) -> str:
+    """
+    Keep the elements most relevant to `transcript` within `budget_chars`.
+
+    Elements are scored with BM25 against the transcript plus role and focus
+    priors, then packed best-first together with their ancestors so the
+    planner still sees where each element lives. Kept lines stay in their
+    original order. Summaries that already fit are returned unchanged.
+    """
+    if len(summary) <= budget_chars:
+        return summary
+    tree = parse_ax_summary(summary)
+    if not tree:
+        return ""
+    scores = _scores(tree, summary, _query_terms(transcript))
+    # The top of the tree (window, toolbars) frames everything else.
+    for index, depth in enumerate(tree.depths):
+        if depth <= 1:
+            scores[index] += 1.0
+
+    lines, parents = tree.lines, tree.parents
+    cheapest = min(map(len, lines)) + 1
+    selected: set[int] = set()
+    used = 0
+    for index in sorted(range(len(tree)), key=lambda item: (-scores[item], item)):
+        if budget_chars - used < cheapest:
+            break
+        cost = 0
+        chain: list[int] = []
+        node = index
+        while node != -1 and node not in selected:
+            chain.append(node)
+            cost += len(lines[node]) + 1
+            node = parents[node]
+        if chain and used + cost <= budget_chars:
+            selected.update(chain)
+            used += cost
+
+    kept = [lines[index] for index in sorted(selected)]
+    omitted = len(tree) - len(kept)
+    if omitted:
+        kept.append(f"... {omitted} less relevant elements omitted")
+    return "\n".join(kept)
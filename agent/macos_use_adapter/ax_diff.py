@@ -0,0 +1,329 @@
+"""Node-level diff of before/after AX contexts and expected-outcome matching."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import re
+
+from .ax_context import _query_terms, parse_ax_summary
+
+
+# The desktop app sends `app=..., window=..., url=..., ax=<summary>` as verify context.
+_DIGEST_RE = re.compile(r"app=(.*?), window=(.*?), url=(.*?), ax=")
+_INDEX_RE = re.compile(r"\[\d+\] ")
+_ROLE_RE = re.compile(r"role=(\S+)")
+_ROLE_WORD_RE = re.compile(r"[A-Z][a-z]+")
+# Titles are not escaped by the reader, so a value ends at the quote that precedes the next key.
+_ATTR_RE = re.compile(r'(title|value|description)="(.*?)"(?= \w+=|$)')
+
+# Words that describe how an outcome shows up rather than what should change.
+_OUTCOME_FILLER = frozenset(
+    "appear show shown visible display now should becom successfully get will has have been was "
+    "frontmost focus active open launch load".split()
+)
+
+# A deleted element is itself evidence for "closed" or "dismissed", whatever its content.
+_DELETION_TERMS = frozenset(_query_terms("close closed closes dismissed disappeared removed hidden gone"))
+
+MATCH_THRESHOLD = 0.5
+MAX_MATCHED_LABELS = 3
+# Role words ("window", "button") are shared by every element of that role; they add to a
+# match but never make one on their own.
+ROLE_TERM_WEIGHT = 0.25
+
+
+@dataclass(frozen=True, slots=True)
+class AXNode:
+    role: str
+    title: str = ""
+    value: str = ""
+    description: str = ""
+
+    @property
+    def label(self) -> str:
+        text = self.title or self.description or self.value
+        return f'{self.role} "{text}"' if text else self.role
+
+    def terms(self) -> set[str]:
+        return self.content_terms() | self.role_terms()
+
+    def content_terms(self) -> set[str]:
+        return _query_terms(f"{self.title} {self.value} {self.description}")
+
+    def role_terms(self) -> set[str]:
+        role = self.role.lower()
+        # Outcomes name elements by role words: AXTextField is a "text field".
+        terms = _query_terms(" ".join(_ROLE_WORD_RE.findall(self.role)))
+        terms.add(role)
+        terms.add(role.removeprefix("ax"))
+        return terms
+
+
+@dataclass(slots=True)
+class AXDiff:
+    inserted: list[AXNode] = field(default_factory=list)
+    deleted: list[AXNode] = field(default_factory=list)
+    updated: list[tuple[AXNode, AXNode]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.inserted) + len(self.deleted) + len(self.updated)
+
+    def changed_nodes(self) -> list[tuple[str, AXNode]]:
+        return (
+            [("inserted", node) for node in self.inserted]
+            + [("deleted", node) for node in self.deleted]
+            + [("updated", after) for _, after in self.updated]
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class OutcomeMatch:
+    status: str
+    confidence: float
+    matched: list[str] = field(default_factory=list)
+    reason: str | None = None
+
+
+ParsedNodes = list[tuple[int, int, int, AXNode]]
+
+
+def parse_ax_nodes(context: str) -> ParsedNodes:
+    """
+    Parse a context into `(role path, identity, content, node)` in document order.
+
+    The role path hashes the roles from the root down to the node; identity
+    adds the node's title, so an element keeps its identity when its value
+    changes or when elements are inserted before it. Content covers every
+    attribute except the element counter, which shifts whenever the tree
+    above it changes. Keys are stable digests rather than `hash()`, whose
+    string seed differs per process: a step baseline parsed in one process
+    pool worker must match the next step parsed in another.
+    """
+    nodes: ParsedNodes = []
+    summary = context
+    digest = _DIGEST_RE.match(context)
+    if digest is not None:
+        app, window, url = (part.strip() for part in digest.groups())
+        for role, value in (("App", app), ("Window", window), ("URL", url)):
+            node = AXNode(role=role, title=value)
+            path = _key(0, role)
+            nodes.append((path, path, _key(value), node))
+        summary = context[digest.end() :]
+
+    tree = parse_ax_summary(summary)
+    paths: list[int] = []
+    for line, parent in zip(tree.lines, tree.parents):
+        role_match = _ROLE_RE.search(line)
+        if role_match is not None:
+            attrs = dict(_ATTR_RE.findall(line))
+            node = AXNode(
+                role=role_match.group(1),
+                title=attrs.get("title", ""),
+                value=attrs.get("value", ""),
+                description=attrs.get("description", ""),
+            )
+        else:
+            role, _, text = line.partition(":")
+            node = AXNode(role=role.strip(), title=text.strip()) if text else AXNode(role="Text", title=line)
+        path = _key(paths[parent] if parent >= 0 else 0, node.role)
+        paths.append(path)
+        nodes.append((path, _key(path, node.title), _key(_INDEX_RE.sub("", line, count=1)), node))
+    return nodes
+
+
+def _key(*parts: int | str) -> int:
+    material = "\x1f".join(str(part) for part in parts).encode("utf-8", errors="surrogatepass")
+    return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "little")
+
+
+def diff_ax_contexts(before: str, after: str) -> AXDiff:
+    """
+    Inserted, deleted and updated elements between two contexts.
+
+    Elements are paired by identity hash (repeated identities pair in order).
+    Leftovers on both sides that share a role path are then paired in order
+    as updates, which covers renamed elements such as a window whose title
+    changed. Nothing is string-diffed.
+    """
+    return _diff(parse_ax_nodes(before), parse_ax_nodes(after))
+
+
+def _diff(before: ParsedNodes, after: ParsedNodes) -> AXDiff:
+    before_nodes = _keyed(before)
+    after_nodes = _keyed(after)
+    diff = AXDiff()
+    removed: dict[int, list[AXNode]] = {}
+    added: dict[int, list[AXNode]] = {}
+    for key, (content, node) in before_nodes.items():
+        other = after_nodes.get(key)
+        if other is None:
+            removed.setdefault(key[0], []).append(node)
+        elif other[0] != content:
+            diff.updated.append((node, other[1]))
+    for key, (_, node) in after_nodes.items():
+        if key not in before_nodes:
+            added.setdefault(key[0], []).append(node)
+
+    for path, nodes in added.items():
+        previous = removed.pop(path, [])
+        paired = min(len(previous), len(nodes))
+        diff.updated.extend(zip(previous[:paired], nodes[:paired]))
+        diff.inserted.extend(nodes[paired:])
+        diff.deleted.extend(previous[paired:])
+    for nodes in removed.values():
+        diff.deleted.extend(nodes)
+    return diff
+
+
+def _keyed(nodes: ParsedNodes) -> dict[tuple[int, int, int], tuple[int, AXNode]]:
+    # Keys are (role path, identity, occurrence); the role path groups leftovers for the rename pass.
+    keyed: dict[tuple[int, int, int], tuple[int, AXNode]] = {}
+    seen: dict[int, int] = {}
+    for path, identity, content, node in nodes:
+        occurrence = seen.get(identity, 0)
+        seen[identity] = occurrence + 1
+        keyed[(path, identity, occurrence)] = (content, node)
+    return keyed
+
+
+class ChangeIndex:
+    """
+    Inverted index from terms to the `(change kind, node)` entries that mention them.
+
+    Each posting records whether the term is only the node's role, so that
+    "Compose window opened" is not confirmed by whichever window changed.
+    """
+
+    def __init__(self, nodes: list[tuple[str, AXNode]]) -> None:
+        self._nodes = nodes
+        self._postings: dict[str, list[tuple[int, float]]] = {}
+        for position, (kind, node) in enumerate(nodes):
+            content = node.content_terms()
+            if kind == "deleted":
+                content |= _DELETION_TERMS
+            for term in content:
+                self._postings.setdefault(term, []).append((position, 1.0))
+            for term in node.role_terms() - content:
+                self._postings.setdefault(term, []).append((position, ROLE_TERM_WEIGHT))
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._postings
+
+    def covers(self, terms: set[str]) -> bool:
+        """
+        Every term is present, and each one found only as a role word is on an
+        element that also matches content: a "compose window" needs a window
+        about composing, not any window next to a Compose button.
+        """
+        content: set[int] = set()
+        role_only: list[list[tuple[int, float]]] = []
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                return False
+            if any(weight == 1.0 for _, weight in postings):
+                content.update(position for position, weight in postings if weight == 1.0)
+            else:
+                role_only.append(postings)
+        return bool(content) and all(any(position in content for position, _ in postings) for postings in role_only)
+
+    def match(self, terms: set[str]) -> tuple[float, list[str]]:
+        """
+        Weighted share of `terms` found, best single node first, and labels of the
+        nodes that matched; zero unless some term matched an element's content.
+        """
+        if not terms:
+            return 0.0, []
+        hits: dict[int, float] = {}
+        found = 0.0
+        # A term that is only ever a role word also counts for less in the total.
+        total = 0.0
+        content_matched = False
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                total += 1.0
+                continue
+            term_weight = max(weight for _, weight in postings)
+            content_matched = content_matched or term_weight == 1.0
+            found += term_weight
+            total += term_weight
+            for position, weight in postings:
+                hits[position] = hits.get(position, 0.0) + weight
+        if not content_matched:
+            return 0.0, []
+        best = max(hits.values())
+        # Several changed nodes together can also satisfy an outcome, at a discount.
+        score = max(best / total, 0.8 * found / total)
+        ranked = sorted(hits, key=lambda position: (-hits[position], position))[:MAX_MATCHED_LABELS]
+        return score, [f"{self._nodes[position][0]} {self._nodes[position][1].label}" for position in ranked]
+
+
+def outcome_terms(expected_outcome: str) -> set[str]:
+    terms = _query_terms(expected_outcome)
+    return terms - _OUTCOME_FILLER or terms
+
+
+def match_expected_outcomes(outcomes: list[str | None], before: str, after: str) -> list[OutcomeMatch]:
+    """
+    Check each expected outcome against what changed between the contexts.
+
+    An outcome whose terms are found on inserted, deleted or updated
+    elements is a success; role words such as "window" count for little,
+    and never on their own. One the after context already shows in full (the
+    app was frontmost before the plan ran) is a weaker success. Otherwise the
+    step failed, unless none of its terms appear in either context: the AX
+    tree cannot observe it, so it stays "unverified", like empty outcomes.
+    """
+    return match_outcomes(outcomes, parse_ax_nodes(before), parse_ax_nodes(after))
+
+
+def match_outcomes(outcomes: list[str | None], before_nodes: ParsedNodes, after_nodes: ParsedNodes) -> list[OutcomeMatch]:
+    """`match_expected_outcomes` for contexts that were already parsed."""
+    diff = _diff(before_nodes, after_nodes)
+    changes = ChangeIndex(diff.changed_nodes())
+    current: ChangeIndex | None = None
+    previous: ChangeIndex | None = None
+    results: list[OutcomeMatch] = []
+    for outcome in outcomes:
+        terms = outcome_terms(outcome) if outcome else set()
+        if not terms:
+            results.append(OutcomeMatch(status="unverified", confidence=0.0))
+            continue
+        score, matched = changes.match(terms)
+        if score >= MATCH_THRESHOLD:
+            results.append(
+                OutcomeMatch(
+                    status="success",
+                    confidence=round(0.6 + 0.35 * min(score, 1.0), 2),
+                    matched=matched,
+                    reason=f"Observed on changed elements: {', '.join(matched)}",
+                )
+            )
+            continue
+        if current is None or previous is None:
+            current = ChangeIndex([("present", node) for *_, node in after_nodes])
+            previous = ChangeIndex([("previous", node) for *_, node in before_nodes])
+        if current.covers(terms):
+            _, matched = current.match(terms)
+            results.append(
+                OutcomeMatch(
+                    status="success",
+                    confidence=0.55,
+                    matched=matched,
+                    reason=f"Already shown, without a matching change: {', '.join(matched)}",
+                )
+            )
+        elif any(term in current or term in previous for term in terms):
+            results.append(
+                OutcomeMatch(
+                    status="failure",
+                    confidence=round(0.85 if not diff else 0.6 + 0.25 * (1 - score), 2),
+                    reason=f"Expected outcome not observed: {outcome}",
+                )
+            )
+        else:
+            results.append(
+                OutcomeMatch(status="unverified", confidence=0.0, reason="Outcome is not observable in the AX tree")
+            )
+    return results
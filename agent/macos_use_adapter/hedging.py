@@ -0,0 +1,150 @@
+"""Hedged and raced provider requests."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from core.schemas import Action
+
+if TYPE_CHECKING:
+    from .adapter import ActionCallback, AdapterResult
+
+
+Attempt = Callable[[str, "ActionCallback | None"], Awaitable["AdapterResult"]]
+
+
+class LatencyWindow:
+    """Rolling window of recent latencies for one model."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[int] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency_ms: int) -> None:
+        self._samples.append(latency_ms)
+
+    def percentile(self, pct: float) -> int | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+
+class HedgeStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.hedged = 0
+        self.raced = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        extra_requests = self.hedged + self.raced
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "raced": self.raced,
+            "hedge_wins": self.hedge_wins,
+            "cancelled": self.cancelled,
+            "hedge_rate": round(extra_requests / self.requests, 4) if self.requests else 0.0,
+            "hedge_win_rate": round(self.hedge_wins / extra_requests, 4) if extra_requests else 0.0,
+        }
+
+
+def is_usable_plan(result: AdapterResult) -> bool:
+    """A plan worth returning: parsed cleanly and not a fallback placeholder."""
+    return bool(result.actions) and not result.warnings and result.recovery_guidance is None
+
+
+async def run_hedged(
+    attempt: Attempt,
+    *,
+    primary_model: str,
+    hedge_model: str,
+    hedge_after_s: float | None,
+    on_action: ActionCallback | None,
+    stats: HedgeStats,
+) -> AdapterResult:
+    """
+    Run `attempt(primary_model)`; if it has not answered (nor started
+    streaming) after `hedge_after_s` seconds start `attempt(hedge_model)`
+    too (None races both immediately).
+
+    The first usable plan wins and the other request is cancelled. With
+    streaming, the first request to emit an action owns the event stream:
+    its actions have already reached the client, so it wins outright.
+    """
+    stats.requests += 1
+    owner: list[int] = []
+    tasks: list[asyncio.Task[AdapterResult]] = []
+
+    def gated(index: int) -> ActionCallback | None:
+        if on_action is None:
+            return None
+
+        async def forward(action: Action, fraction: float) -> None:
+            if not owner:
+                owner.append(index)
+                for other, task in enumerate(tasks):
+                    if other != index:
+                        task.cancel()
+            if owner[0] == index:
+                await on_action(action, fraction)
+
+        return forward
+
+    def launch(model: str) -> None:
+        tasks.append(asyncio.create_task(attempt(model, gated(len(tasks)))))
+
+    launch(primary_model)
+    if hedge_after_s is None:
+        stats.raced += 1
+        launch(hedge_model)
+    else:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after_s)
+        # A primary that is already streaming owns the event stream; a hedge could never win.
+        if not done and not owner:
+            stats.hedged += 1
+            launch(hedge_model)
+
+    fallback: AdapterResult | None = None
+    first_error: BaseException | None = None
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.index):
+                if task.cancelled():
+                    continue
+                error = task.exception()
+                if error is not None:
+                    first_error = first_error or error
+                    continue
+                result = task.result()
+                index = tasks.index(task)
+                if owner and owner[0] != index:
+                    continue
+                if is_usable_plan(result) or (owner and owner[0] == index):
+                    if index > 0:
+                        stats.hedge_wins += 1
+                    return result
+                if fallback is None or index == 0:
+                    fallback = result
+    finally:
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            with suppress(asyncio.CancelledError, Exception):
+                await task
+        stats.cancelled += sum(1 for task in tasks if task.cancelled())
+
+    if fallback is not None:
+        return fallback
+    if first_error is None:
+        raise RuntimeError("Hedged provider requests produced no result")
+    raise first_error
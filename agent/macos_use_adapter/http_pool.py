@@ -0,0 +1,91 @@
+"""Long-lived HTTP/2 connection pool shared by all provider calls."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+import time
+
+import httpx
+
+from core.config import settings
+
+
+class ProviderConnectionPool:
+    """
+    One pooled `httpx.AsyncClient` per sidecar process.
+
+    The client is created lazily on first use so request handlers never pay
+    for setup twice, and `start()` warms the connection in the background
+    ahead of the first voice command. While idle, a background task
+    re-touches the provider so keep-alive connections are not reaped
+    between utterances.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str | None = None,
+        keepalive_interval_s: float | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._base_url = (base_url or settings.anthropic_api_base).rstrip("/")
+        self._keepalive_interval_s = (
+            settings.provider_keepalive_interval_s if keepalive_interval_s is None else keepalive_interval_s
+        )
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._keepalive_task: asyncio.Task[None] | None = None
+        self._last_used = 0.0
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=settings.provider_max_connections,
+                    max_keepalive_connections=settings.provider_max_connections,
+                    keepalive_expiry=settings.provider_keepalive_expiry_s,
+                ),
+                timeout=httpx.Timeout(24.0, connect=5.0),
+            )
+        self._last_used = time.monotonic()
+        return self._client
+
+    async def start(self) -> None:
+        """Create the client and warm it in the background; never waits on the network."""
+        self.client()
+        if self._keepalive_task is None:
+            # Startup (and /health) must not wait on DNS/TLS to the provider, or hang when offline.
+            self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+    async def warm(self) -> bool:
+        """Open a connection (DNS, TCP, TLS, HTTP/2 preface) without spending tokens."""
+        try:
+            await self.client().head(f"{self._base_url}/v1/models", timeout=5.0)
+        except httpx.HTTPError:
+            return False
+        return True
+
+    async def aclose(self) -> None:
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._keepalive_task
+            self._keepalive_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _keepalive_loop(self) -> None:
+        await self.warm()
+        if self._keepalive_interval_s <= 0:
+            return
+        while True:
+            await asyncio.sleep(self._keepalive_interval_s)
+            if time.monotonic() - self._last_used >= self._keepalive_interval_s:
+                await self.warm()
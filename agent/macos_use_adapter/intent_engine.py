@@ -0,0 +1,426 @@
+"""Local fast-path planner for common single-step commands."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import Callable
+
+from core.schemas import Action
+
+
+_LEADING_FILLER_RE = re.compile(
+    r"^(?:(?:hey|ok|okay)\s+orange[,\s]+)?(?:(?:please|can you|could you|would you|will you|go ahead and)\s+)*",
+    re.IGNORECASE,
+)
+_TRAILING_FILLER_RE = re.compile(r"(?:\s+(?:please|for me|now|thanks|thank you))+$", re.IGNORECASE)
+_MULTI_STEP_RE = re.compile(r"\b(?:and|then|after|before|also)\b|[,;]")
+_URL_RE = re.compile(
+    r"^(?:(?P<scheme>https?://)\S+|(?P<www>www\.)?(?:[a-z0-9-]+\.)+(?P<tld>[a-z]{2,})(?:/\S*)?)$", re.IGNORECASE
+)
+# A dotted name without a scheme is a URL only with "www." or one of these TLDs, and
+# never when it ends in a file extension: "readme.md" is a file, not a Moldovan site.
+_URL_TLDS = {
+    "ai", "au", "ca", "co", "com", "de", "dev", "edu", "es", "eu", "fr", "gov", "in", "info", "io",
+    "it", "jp", "me", "net", "nl", "org", "tv", "uk", "us", "xyz",
+}
+_FILE_EXTENSIONS = {
+    "app", "csv", "doc", "docx", "gif", "h", "heic", "html", "jpeg", "jpg", "js", "json", "key", "log",
+    "md", "mov", "mp3", "mp4", "numbers", "pages", "pdf", "png", "ppt", "pptx", "py", "rtf", "sh", "swift",
+    "ts", "txt", "xls", "xlsx", "yaml", "yml", "zip",
+}
+
+KNOWN_APPS = {
+    "activity monitor": "Activity Monitor",
+    "app store": "App Store",
+    "arc": "Arc",
+    "calculator": "Calculator",
+    "calendar": "Calendar",
+    "chrome": "Google Chrome",
+    "discord": "Discord",
+    "facetime": "FaceTime",
+    "finder": "Finder",
+    "firefox": "Firefox",
+    "google chrome": "Google Chrome",
+    "iterm": "iTerm",
+    "keynote": "Keynote",
+    "mail": "Mail",
+    "maps": "Maps",
+    "messages": "Messages",
+    "microsoft excel": "Microsoft Excel",
+    "microsoft word": "Microsoft Word",
+    "music": "Music",
+    "notes": "Notes",
+    "notion": "Notion",
+    "numbers": "Numbers",
+    "pages": "Pages",
+    "photos": "Photos",
+    "preview": "Preview",
+    "reminders": "Reminders",
+    "safari": "Safari",
+    "slack": "Slack",
+    "spotify": "Spotify",
+    "system settings": "System Settings",
+    "terminal": "Terminal",
+    "textedit": "TextEdit",
+    "visual studio code": "Visual Studio Code",
+    "vs code": "Visual Studio Code",
+    "xcode": "Xcode",
+    "zoom": "zoom.us",
+}
+BROWSERS = {"Safari", "Google Chrome", "Arc", "Firefox"}
+_NON_APP_WORDS = {
+    "my", "your", "this", "that", "it", "new", "last", "latest", "recent", "first", "next", "previous",
+    "file", "folder", "document", "email", "message", "link", "page", "tab", "window", "settings", "inbox",
+}
+
+# Shortcuts that work in (almost) every app.
+GLOBAL_SHORTCUTS = {
+    "copy": ("cmd+c", "Selection copied"),
+    "paste": ("cmd+v", "Clipboard pasted"),
+    "cut": ("cmd+x", "Selection cut"),
+    "undo": ("cmd+z", "Last change undone"),
+    "redo": ("cmd+shift+z", "Last change redone"),
+    "select all": ("cmd+a", "Everything selected"),
+    "save": ("cmd+s", "Document saved"),
+    "find": ("cmd+f", "Find bar focused"),
+    "new tab": ("cmd+t", "New tab opened"),
+    "close tab": ("cmd+w", "Tab closed"),
+    "reopen closed tab": ("cmd+shift+t", "Closed tab reopened"),
+    "next tab": ("ctrl+tab", "Next tab focused"),
+    "previous tab": ("ctrl+shift+tab", "Previous tab focused"),
+    "new window": ("cmd+n", "New window opened"),
+    "close window": ("cmd+w", "Window closed"),
+    "minimize window": ("cmd+m", "Window minimized"),
+    "hide app": ("cmd+h", "App hidden"),
+    "full screen": ("ctrl+cmd+f", "Window toggled full screen"),
+    "reload page": ("cmd+r", "Page reloaded"),
+}
+_SHORTCUT_ALIASES = {
+    "copy that": "copy",
+    "copy this": "copy",
+    "copy it": "copy",
+    "copy the selection": "copy",
+    "paste it": "paste",
+    "paste that": "paste",
+    "paste here": "paste",
+    "cut that": "cut",
+    "undo that": "undo",
+    "redo that": "redo",
+    "select everything": "select all",
+    "save this": "save",
+    "save the file": "save",
+    "save the document": "save",
+    "open a new tab": "new tab",
+    "open new tab": "new tab",
+    "new browser tab": "new tab",
+    "close this tab": "close tab",
+    "close the tab": "close tab",
+    "reopen the last tab": "reopen closed tab",
+    "reopen last tab": "reopen closed tab",
+    "next tab": "next tab",
+    "previous tab": "previous tab",
+    "go to the next tab": "next tab",
+    "go to the previous tab": "previous tab",
+    "open a new window": "new window",
+    "open new window": "new window",
+    "close this window": "close window",
+    "close the window": "close window",
+    # A bare "close" means the window in front, never the whole app.
+    "close": "close window",
+    "close it": "close window",
+    "close this": "close window",
+    "close that": "close window",
+    "minimize": "minimize window",
+    "minimize this window": "minimize window",
+    "minimize the window": "minimize window",
+    "hide this app": "hide app",
+    "hide": "hide app",
+    "enter full screen": "full screen",
+    "toggle full screen": "full screen",
+    "go full screen": "full screen",
+    "reload": "reload page",
+    "refresh": "reload page",
+    "refresh the page": "reload page",
+    "refresh page": "reload page",
+    "reload the page": "reload page",
+    "reload this page": "reload page",
+    "refresh this page": "reload page",
+    "search this page": "find",
+    "find on page": "find",
+}
+
+# Per-app shortcuts; keys are lower-cased app names as reported by the desktop client.
+APP_SHORTCUTS: dict[str, dict[str, tuple[str, str]]] = {
+    "finder": {
+        "new folder": ("cmd+shift+n", "New folder created"),
+        "go to downloads": ("cmd+alt+l", "Downloads folder shown"),
+        "go to applications": ("cmd+shift+a", "Applications folder shown"),
+        "go to desktop": ("cmd+shift+d", "Desktop folder shown"),
+        "go to home": ("cmd+shift+h", "Home folder shown"),
+        "show info": ("cmd+i", "Info window shown"),
+    },
+    "mail": {
+        "new message": ("cmd+n", "Compose window opened"),
+        "compose": ("cmd+n", "Compose window opened"),
+        "check mail": ("cmd+shift+n", "Mailboxes refreshed"),
+    },
+    "slack": {
+        "quick switcher": ("cmd+k", "Quick switcher open"),
+        "jump to conversation": ("cmd+k", "Quick switcher open"),
+        "show unread": ("cmd+shift+a", "All unreads shown"),
+        "show threads": ("cmd+shift+t", "Threads shown"),
+    },
+    "safari": {
+        "focus address bar": ("cmd+l", "Address bar focused"),
+        "bookmark this page": ("cmd+d", "Bookmark dialog open"),
+        "show history": ("cmd+y", "History shown"),
+    },
+    "google chrome": {
+        "focus address bar": ("cmd+l", "Omnibox focused"),
+        "bookmark this page": ("cmd+d", "Bookmark dialog open"),
+        "show history": ("cmd+y", "History shown"),
+        "show downloads": ("cmd+shift+j", "Downloads shown"),
+    },
+    "notes": {
+        "new note": ("cmd+n", "New note created"),
+    },
+    "terminal": {
+        "clear": ("cmd+k", "Terminal cleared"),
+        "clear screen": ("cmd+k", "Terminal cleared"),
+    },
+}
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: str
+    actions: list[Action]
+    confidence: float
+    summary: str
+
+
+# Builders get the rule's match over the lower-cased command, the command with its
+# original casing (same offsets), and the frontmost app.
+_Builder = Callable[[re.Match[str], str, str | None], IntentMatch | None]
+
+
+class LocalIntentEngine:
+    """
+    Compiled grammar of common intents, dispatched on the leading verb.
+
+    Each rule is a pre-compiled anchored regex; only the rules registered
+    for the first word of the normalized command are tried, so a match
+    costs a dictionary lookup plus a handful of regex attempts.
+    Multi-step commands ("... and then ...") never match and always fall
+    through to the remote planner.
+    """
+
+    def __init__(self) -> None:
+        self._rules: dict[str, list[tuple[re.Pattern[str], _Builder]]] = {}
+        self._shortcut_phrases = {**{phrase: phrase for phrase in GLOBAL_SHORTCUTS}, **_SHORTCUT_ALIASES}
+        self._register(("open", "launch", "start", "activate"), r"(?:open|launch|start|activate)\s+(?:up\s+)?(?P<target>.+)", self._open)
+        self._register(("switch", "bring"), r"(?:switch\s+(?:over\s+)?to|bring\s+up)\s+(?P<target>.+)", self._open)
+        self._register(("go", "navigate", "visit", "browse", "load"), r"(?:go|navigate|browse)\s+to\s+(?P<target>.+)|(?:visit|load)\s+(?P<url>.+)", self._navigate_or_open)
+        self._register(("quit", "exit", "close"), r"(?:quit|exit|close)(?:\s+(?P<target>.+))?", self._quit)
+        self._register(("scroll",), r"scroll(?:\s+(?P<direction>up|down|left|right))?(?:\s+(?:by\s+)?(?P<amount>a\s+(?:little|bit|lot)|a\s+little\s+bit|\d+))?", self._scroll)
+        self._register(("page",), r"page\s+(?P<direction>up|down)", self._scroll)
+        self._register(("choose", "select", "click"), r"(?:choose|select|click)\s+(?:the\s+)?(?P<menu>[a-z]+)\s+menu\s+(?:item\s+)?(?P<item>.+)", self._menu)
+        self._register(("choose", "select", "click"), r"(?:choose|select|click)\s+(?:the\s+)?(?P<path>[^>]+?\s*>\s*.+)", self._menu)
+
+    def match(self, transcript: str, *, app_name: str | None) -> IntentMatch | None:
+        source = _strip_filler(transcript)
+        text = source.lower()
+        if len(text) != len(source):
+            # Lower-casing changed the length (rare non-ASCII input); offsets would not line up.
+            source = text
+        if not text or _MULTI_STEP_RE.search(text):
+            return None
+        app_key = (app_name or "").strip().lower()
+
+        shortcut = self._match_shortcut(text, app_key)
+        if shortcut is not None:
+            return shortcut
+
+        head = text.split(" ", 1)[0]
+        for pattern, builder in self._rules.get(head, ()):
+            found = pattern.fullmatch(text)
+            if found is None:
+                continue
+            result = builder(found, source, app_name)
+            if result is not None:
+                return result
+        return None
+
+    @staticmethod
+    def normalize(transcript: str) -> str:
+        return _strip_filler(transcript).lower()
+
+    def _register(self, heads: tuple[str, ...], pattern: str, builder: _Builder) -> None:
+        compiled = re.compile(pattern)
+        for head in heads:
+            self._rules.setdefault(head, []).append((compiled, builder))
+
+    def _match_shortcut(self, text: str, app_key: str) -> IntentMatch | None:
+        app_shortcut = APP_SHORTCUTS.get(app_key, {}).get(text)
+        if app_shortcut is not None:
+            combo, outcome = app_shortcut
+            return _key_combo_match(f"app_shortcut:{text}", combo, outcome, confidence=0.95)
+        phrase = self._shortcut_phrases.get(text)
+        if phrase is None:
+            return None
+        combo, outcome = GLOBAL_SHORTCUTS[phrase]
+        return _key_combo_match(f"shortcut:{phrase}", combo, outcome, confidence=0.93)
+
+    def _open(self, found: re.Match[str], source: str, app_name: str | None) -> IntentMatch | None:
+        target = _strip_article(found.group("target"))
+        if _is_url(target):
+            return self._navigate(_original(found, source, "target"), app_name)
+        return _open_app_match(target)
+
+    def _navigate_or_open(self, found: re.Match[str], source: str, app_name: str | None) -> IntentMatch | None:
+        group = "target" if found.group("target") else "url"
+        target = _strip_article(found.group(group) or "")
+        if _is_url(target):
+            return self._navigate(_original(found, source, group), app_name)
+        if found.group("target") and _canonical_app(target) is not None:
+            return _open_app_match(target)
+        return None
+
+    def _navigate(self, raw_url: str, app_name: str | None) -> IntentMatch:
+        url = raw_url if raw_url.lower().startswith("http") else f"https://{raw_url}"
+        browser = app_name if app_name in BROWSERS else "Safari"
+        return IntentMatch(
+            intent="navigate",
+            actions=[
+                Action(id="a1", kind="open_app", target=browser, expected_outcome=f"{browser} is frontmost"),
+                Action(id="a2", kind="key_combo", key_combo="cmd+l", expected_outcome="Address bar focused"),
+                Action(id="a3", kind="type", text=url, expected_outcome=f"URL entered: {url}"),
+                Action(id="a4", kind="key_combo", key_combo="enter", expected_outcome="Page loads"),
+            ],
+            confidence=0.93,
+            summary=f"Navigate to {url}",
+        )
+
+    def _quit(self, found: re.Match[str], _source: str, _app_name: str | None) -> IntentMatch | None:
+        # Only a named app quits locally; "quit", "exit it" or "close this app" may mean
+        # the window, a dialog or the app, and the provider sees the screen to tell.
+        canonical = _canonical_app(_strip_article(found.group("target") or ""))
+        if canonical is None:
+            return None
+        return IntentMatch(
+            intent="quit_app",
+            actions=[
+                Action(id="a1", kind="open_app", target=canonical, expected_outcome=f"{canonical} is frontmost"),
+                Action(id="a2", kind="key_combo", key_combo="cmd+q", expected_outcome=f"{canonical} quit"),
+            ],
+            confidence=0.92,
+            summary=f"Quit {canonical}",
+        )
+
+    def _scroll(self, found: re.Match[str], _source: str, _app_name: str | None) -> IntentMatch:
+        direction = found.group("direction") or "down"
+        amount = found.groupdict().get("amount") or ""
+        if amount.isdigit():
+            magnitude = min(int(amount), 50)
+        elif "lot" in amount:
+            magnitude = 20
+        elif amount:
+            magnitude = 4
+        else:
+            magnitude = 8
+        return IntentMatch(
+            intent="scroll",
+            actions=[
+                Action(id="a1", kind="scroll", target=f"{direction} {magnitude}", expected_outcome=f"Content scrolled {direction}")
+            ],
+            confidence=0.95,
+            summary=f"Scroll {direction}",
+        )
+
+    def _menu(self, found: re.Match[str], _source: str, _app_name: str | None) -> IntentMatch | None:
+        groups = found.groupdict()
+        if groups.get("path"):
+            parts = [part.strip() for part in groups["path"].split(">") if part.strip()]
+        else:
+            parts = [groups["menu"], groups["item"].strip()]
+        if len(parts) < 2:
+            return None
+        path = " > ".join(part.title() if part.islower() else part for part in parts)
+        return IntentMatch(
+            intent="menu_item",
+            actions=[
+                Action(id="a1", kind="select_menu_item", target=path, expected_outcome=f"Menu item {path} chosen")
+            ],
+            confidence=0.88,
+            summary=f"Choose {path}",
+        )
+
+
+def _strip_filler(transcript: str) -> str:
+    text = " ".join(transcript.split()).strip(" .!?")
+    text = _LEADING_FILLER_RE.sub("", text)
+    return _TRAILING_FILLER_RE.sub("", text).strip(" .!?")
+
+
+def _is_url(target: str) -> bool:
+    found = _URL_RE.match(target)
+    if found is None:
+        return False
+    if found.group("scheme"):
+        return True
+    tld = found.group("tld").lower()
+    if tld in _FILE_EXTENSIONS:
+        return False
+    return bool(found.group("www")) or tld in _URL_TLDS
+
+
+def _canonical_app(name: str) -> str | None:
+    key = name.strip().lower()
+    if key.endswith(" app"):
+        key = key[:-4].strip()
+    return KNOWN_APPS.get(key)
+
+
+def _open_app_match(target: str) -> IntentMatch | None:
+    canonical = _canonical_app(target)
+    if canonical is not None:
+        name, confidence = canonical, 0.95
+    else:
+        words = target.split()
+        if (
+            not words
+            or len(words) > 2
+            or any(word in _NON_APP_WORDS or not word.replace("-", "").isalnum() for word in words)
+        ):
+            return None
+        # Unknown but app-shaped name ("recording", "over", "dark mode" look the same);
+        # scored below both local thresholds, so the provider decides.
+        name, confidence = " ".join(word.capitalize() for word in words), 0.8
+    return IntentMatch(
+        intent="open_app",
+        actions=[Action(id="a1", kind="open_app", target=name, expected_outcome=f"{name} is frontmost")],
+        confidence=confidence,
+        summary=f"Open {name}",
+    )
+
+
+def _key_combo_match(intent: str, combo: str, outcome: str, *, confidence: float) -> IntentMatch:
+    return IntentMatch(
+        intent=intent,
+        actions=[Action(id="a1", kind="key_combo", key_combo=combo, expected_outcome=outcome)],
+        confidence=confidence,
+        summary=outcome,
+    )
+
+
+def _original(found: re.Match[str], source: str, group: str) -> str:
+    """A matched group as the user wrote it; URL paths are case-sensitive."""
+    return _strip_article(source[found.start(group) : found.end(group)])
+
+
+def _strip_article(text: str) -> str:
+    stripped = text.strip()
+    for article in ("the ", "a ", "an "):
+        if stripped.lower().startswith(article):
+            return stripped[len(article) :]
+    return stripped
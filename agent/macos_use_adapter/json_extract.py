@@ -0,0 +1,173 @@
+"""Locate and repair the planner's JSON object inside free-form model output."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import re
+from typing import Any
+
+
+# Only these characters change scanner state; everything else is skipped by the regex.
+_STRUCTURAL = re.compile(r'[{}\[\]",\\]')
+_CLOSER = {"{": "}", "[": "]"}
+
+# Repair candidates tried (newest first) before giving up; each is one json.loads.
+MAX_REPAIR_ATTEMPTS = 8
+# Restarts after a stray "{" in prose turned out not to open the plan.
+MAX_PROSE_RETRIES = 3
+
+
+@dataclass(slots=True)
+class ExtractedPayload:
+    payload: dict[str, Any]
+    truncated: bool = False
+    salvaged_actions: int = 0
+    discarded_chars: int = 0
+
+
+class JSONObjectExtractor:
+    """
+    Single-pass, string/escape-aware scanner for the outermost JSON object.
+
+    Text before and after the object (prose, code fences) is ignored. While
+    scanning it remembers "cut points" where the object could be closed
+    cleanly: after each complete member of the root object and after each
+    complete element of a top-level array such as `actions`. If the output
+    stops mid-object, the newest cut points are closed and parsed so every
+    fully generated action survives truncation. Text can be fed in chunks;
+    scanning resumes where the previous chunk stopped.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._start = -1
+        self._stack: list[str] = []
+        self._in_string = False
+        self._cuts: list[tuple[int, str]] = []
+        self._complete: dict[str, Any] | None = None
+
+    @property
+    def start(self) -> int:
+        """Offset of the object being scanned, or -1 if none has opened."""
+        return self._start
+
+    def feed(self, chunk: str) -> None:
+        if self._complete is not None:
+            return
+        self._text += chunk
+        text = self._text
+        stack = self._stack
+        cuts = self._cuts
+        search = _STRUCTURAL.search
+        index = self._pos
+        while self._complete is None:
+            match = search(text, index)
+            if match is None:
+                index = len(text)
+                break
+            index = match.start()
+            ch = text[index]
+            if self._start < 0:
+                # Outside any object only an opening brace matters.
+                if ch == "{":
+                    self._start = index
+                    stack.append("}")
+                index += 1
+                continue
+            if self._in_string:
+                if ch == "\\":
+                    if index + 1 >= len(text):
+                        break  # escape split across chunks; resume on the backslash
+                    index += 2
+                    continue
+                if ch == '"':
+                    self._in_string = False
+                index += 1
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                stack.append(_CLOSER[ch])
+            elif ch == "}" or ch == "]":
+                if not stack or stack[-1] != ch:
+                    self._restart_after(index)
+                    index = self._pos
+                    continue
+                stack.pop()
+                if not stack:
+                    self._finish_object(index + 1)
+                    if self._complete is None:
+                        self._restart_after(index)
+                        index = self._pos
+                        continue
+                elif len(stack) <= 2:
+                    cuts.append((index + 1, "".join(reversed(stack))))
+            elif ch == "," and len(stack) <= 2:
+                cuts.append((index, "".join(reversed(stack))))
+            index += 1
+        self._pos = index
+
+    def finish(self) -> ExtractedPayload | None:
+        """Return the complete object, or the best repair of a truncated one."""
+        if self._complete is not None:
+            return ExtractedPayload(payload=self._complete)
+        if self._start < 0:
+            return None
+        text = self._text
+        for cut, closers in reversed(self._cuts[-MAX_REPAIR_ATTEMPTS:]):
+            try:
+                parsed = json.loads(text[self._start : cut] + closers)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                actions = parsed.get("actions")
+                return ExtractedPayload(
+                    payload=parsed,
+                    truncated=True,
+                    salvaged_actions=len(actions) if isinstance(actions, list) else 0,
+                    discarded_chars=len(text.rstrip()) - cut,
+                )
+        return None
+
+    def _finish_object(self, end: int) -> None:
+        try:
+            parsed = json.loads(self._text[self._start : end])
+        except json.JSONDecodeError:
+            parsed = None
+        # Prose such as "{like this}" can balance without being JSON; the caller keeps looking.
+        if isinstance(parsed, dict):
+            self._complete = parsed
+
+    def _restart_after(self, position: int) -> None:
+        self._pos = position + 1
+        self._start = -1
+        self._stack.clear()
+        self._in_string = False
+        self._cuts.clear()
+
+
+def extract_json_object(text: str) -> ExtractedPayload | None:
+    """
+    Extract the planner object from `text`. If an unmatched brace in leading
+    prose swallowed the real object, retry from the next brace a few times.
+    """
+    # Fast path: the outermost braces usually already delimit valid JSON.
+    first, last = text.find("{"), text.rfind("}")
+    if 0 <= first < last:
+        try:
+            parsed = json.loads(text[first : last + 1])
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict):
+            return ExtractedPayload(payload=parsed)
+
+    offset = 0
+    for _ in range(MAX_PROSE_RETRIES + 1):
+        extractor = JSONObjectExtractor()
+        extractor.feed(text[offset:] if offset else text)
+        result = extractor.finish()
+        if result is not None or extractor.start < 0:
+            return result
+        offset += extractor.start + 1
+    return None
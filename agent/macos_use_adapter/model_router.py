@@ -0,0 +1,224 @@
+"""Adaptive model selection from live latency, parse and verification statistics."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import time
+from typing import Any
+
+from core.config import settings
+
+from .hedging import LatencyWindow
+
+
+_COMPLEXITY_MARKERS = (" and ", " then ", "after", "before", "reply", "send", "purchase")
+MAX_DECISIONS = 50
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    model: str
+    reason: str
+    app: str | None = None
+    at: float = 0.0
+
+
+class RouteStats:
+    """
+    Rolling outcome statistics for one model (optionally scoped to one app).
+
+    `requests` and `verifications` count everything ever recorded; the rates
+    and latencies used for routing cover only the last `router_window`
+    outcomes, so old failures age out once the model gets traffic again.
+    """
+
+    def __init__(self) -> None:
+        # The same window bounds latency, so a model escalated for being slow can recover too
+        # (but never below what the hedge delay needs).
+        self.latency = LatencyWindow(max(settings.router_window, settings.hedge_min_samples))
+        self.requests = 0
+        self.verifications = 0
+        self.escalations = 0
+        self._parsed: deque[bool] = deque(maxlen=max(1, settings.router_window))
+        self._verified: deque[bool] = deque(maxlen=max(1, settings.router_window))
+
+    @property
+    def samples(self) -> int:
+        return len(self._parsed)
+
+    @property
+    def success_rate(self) -> float | None:
+        """Share of recent plans that parsed cleanly and, when verified, succeeded."""
+        if not self._parsed:
+            return None
+        parse_rate = sum(self._parsed) / len(self._parsed)
+        if not self._verified:
+            return parse_rate
+        return parse_rate * sum(self._verified) / len(self._verified)
+
+    def record_plan(self, latency_ms: int, *, parsed: bool) -> None:
+        self.requests += 1
+        self.latency.record(latency_ms)
+        self._parsed.append(parsed)
+
+    def record_verification(self, *, success: bool) -> None:
+        self.verifications += 1
+        self._verified.append(success)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "p50_ms": self.latency.percentile(50),
+            "p90_ms": self.latency.percentile(90),
+            "parse_failure_rate": (
+                round(1 - sum(self._parsed) / len(self._parsed), 4) if self._parsed else None
+            ),
+            "verifications": self.verifications,
+            "verify_success_rate": (
+                round(sum(self._verified) / len(self._verified), 4) if self._verified else None
+            ),
+        }
+
+
+class ModelRouter:
+    """
+    Pick the cheapest model that meets the latency and success targets.
+
+    Models are tried in cost order (simple tier, then complex tier). Stats for
+    the active app are used once they have enough samples, otherwise the
+    model's stats across all apps; a model without enough data keeps the
+    static word-count/keyword heuristic, or the cheapest model in low-latency
+    mode. An escalation is never final: every `router_probe_every`-th request
+    that skips a cheaper model is sent to it anyway, and its windowed stats
+    take it back once it meets the targets again. An explicit
+    `preferred_model` or an `ORANGE_MODEL_OVERRIDES` entry always wins.
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[tuple[str, str | None], RouteStats] = {}
+        self._decisions: deque[RouteDecision] = deque(maxlen=MAX_DECISIONS)
+
+    def stats_for(self, model: str, app: str | None = None) -> RouteStats:
+        key = (model, _app_key(app))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = RouteStats()
+        return stats
+
+    def record_plan(self, model: str, app: str | None, *, latency_ms: int, parsed: bool) -> None:
+        for stats in self._scopes(model, app):
+            stats.record_plan(latency_ms, parsed=parsed)
+
+    def record_verification(self, model: str, app: str | None, *, success: bool) -> None:
+        for stats in self._scopes(model, app):
+            stats.record_verification(success=success)
+
+    def choose(
+        self,
+        transcript: str,
+        *,
+        app: str | None,
+        preferred_model: str | None = None,
+        fast_only: bool = False,
+    ) -> RouteDecision:
+        if preferred_model:
+            return RouteDecision(model=preferred_model, reason="preferred_model", app=app)
+        if app:
+            override = settings.model_overrides.get(app.lower())
+            if override:
+                return RouteDecision(model=override, reason="App-specific override", app=app)
+
+        default = settings.model_complex if _is_complex(transcript) else settings.model_simple
+        if fast_only:
+            # Low latency starts from the cheapest model; measured misses can still escalate it.
+            default = settings.model_simple
+        if not settings.adaptive_routing:
+            return RouteDecision(model=default, reason="low_latency mode" if fast_only else "Static heuristic", app=app)
+
+        candidates = [settings.model_simple, settings.model_complex]
+        measured: list[tuple[str, RouteStats]] = []
+        for model in dict.fromkeys(candidates):
+            stats = self._measured(model, app)
+            if stats is None:
+                # Untested models are only tried as the heuristic's own pick, or as an
+                # escalation past a cheaper model that is known to miss the targets.
+                if measured:
+                    return self._escalate(
+                        RouteDecision(model=model, reason="Escalated: cheaper model misses targets", app=app), measured
+                    )
+                if model == default:
+                    return RouteDecision(model=model, reason="Heuristic (not enough samples yet)", app=app)
+                continue
+            measured.append((model, stats))
+            if self._meets_targets(stats):
+                return self._escalate(
+                    RouteDecision(model=model, reason="Cheapest model meeting latency/success targets", app=app),
+                    measured,
+                )
+
+        if not measured:
+            return RouteDecision(model=default, reason="Heuristic (not enough samples yet)", app=app)
+        model, _ = max(measured, key=lambda item: (item[1].success_rate or 0.0, -(item[1].latency.percentile(90) or 0)))
+        return self._escalate(
+            RouteDecision(model=model, reason="No model meets targets; best observed success rate", app=app), measured
+        )
+
+    def note_decision(self, decision: RouteDecision) -> None:
+        self._decisions.append(
+            RouteDecision(model=decision.model, reason=decision.reason, app=decision.app, at=time.time())
+        )
+
+    def recent_decisions(self) -> list[RouteDecision]:
+        return list(reversed(self._decisions))
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {"model": model, "app": app, **stats.snapshot()}
+            for (model, app), stats in sorted(self._stats.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        ]
+
+    def latency_window(self, model: str) -> LatencyWindow:
+        return self.stats_for(model).latency
+
+    def _scopes(self, model: str, app: str | None) -> list[RouteStats]:
+        scopes = [self.stats_for(model)]
+        if _app_key(app) is not None:
+            scopes.append(self.stats_for(model, app))
+        return scopes
+
+    def _measured(self, model: str, app: str | None) -> RouteStats | None:
+        for stats in (self._stats.get((model, _app_key(app))), self._stats.get((model, None))):
+            if stats is not None and stats.samples >= settings.router_min_samples:
+                return stats
+        return None
+
+    @staticmethod
+    def _escalate(decision: RouteDecision, measured: list[tuple[str, RouteStats]]) -> RouteDecision:
+        """Send every `router_probe_every`-th request that skips the cheapest measured model back to it."""
+        cheapest, stats = measured[0]
+        if decision.model == cheapest or settings.router_probe_every <= 0:
+            return decision
+        stats.escalations += 1
+        if stats.escalations % settings.router_probe_every:
+            return decision
+        return RouteDecision(model=cheapest, reason="Probe: retrying cheaper model", app=decision.app)
+
+    @staticmethod
+    def _meets_targets(stats: RouteStats) -> bool:
+        p90 = stats.latency.percentile(90)
+        success = stats.success_rate
+        return (
+            p90 is not None
+            and p90 <= settings.router_latency_target_ms
+            and success is not None
+            and success >= settings.router_success_target
+        )
+
+
+def _is_complex(transcript: str) -> bool:
+    lower = transcript.lower()
+    return len(lower.split()) > 10 or any(marker in lower for marker in _COMPLEXITY_MARKERS)
+
+
+def _app_key(app: str | None) -> str | None:
+    return app.strip().lower() if app and app.strip() else None
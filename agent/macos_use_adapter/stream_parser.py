@@ -0,0 +1,94 @@
+"""Incremental parsing of streamed planner output."""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class ActionStreamParser:
+    """
+    Emit each object of the top-level `actions` array as soon as it closes,
+    with its 1-based position in the array (non-object entries count too).
+
+    Text is fed in arbitrary chunks (as delivered by `text_delta` events).
+    The scanner is string/escape aware and resumes where the previous chunk
+    stopped, so the total work is linear in the length of the response.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_key: str | None = None
+        self._expect_actions = False
+        self._actions_depth: int | None = None
+        self._actions_closed = False
+        self._object_start = -1
+        self._elements = 0
+        self._expect_element = False
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> list[tuple[int, dict[str, Any]]]:
+        self._text += chunk
+        text = self._text
+        completed: list[tuple[int, dict[str, Any]]] = []
+        index = self._pos
+        length = len(text)
+        while index < length:
+            ch = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._actions_depth is None:
+                        self._last_key = text[self._string_start + 1 : index]
+                index += 1
+                continue
+
+            if self._expect_element and not ch.isspace() and ch not in ",]":
+                self._elements += 1
+                self._expect_element = False
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = index
+                self._expect_actions = False
+            elif ch == ":":
+                self._expect_actions = self._depth == 1 and self._last_key == "actions"
+            elif ch == "{" or ch == "[":
+                if ch == "[" and self._expect_actions and not self._actions_closed:
+                    self._actions_depth = self._depth + 1
+                    self._expect_element = True
+                elif ch == "{" and self._actions_depth is not None and self._depth == self._actions_depth:
+                    self._object_start = index
+                self._depth += 1
+                self._expect_actions = False
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if ch == "}" and self._object_start >= 0 and self._depth == self._actions_depth:
+                    try:
+                        parsed = json.loads(text[self._object_start : index + 1])
+                    except json.JSONDecodeError:
+                        parsed = None
+                    if isinstance(parsed, dict):
+                        completed.append((self._elements, parsed))
+                    self._object_start = -1
+                elif ch == "]" and self._actions_depth is not None and self._depth == self._actions_depth - 1:
+                    self._actions_depth = None
+                    self._actions_closed = True
+            elif ch == "," and self._actions_depth is not None and self._depth == self._actions_depth:
+                self._expect_element = True
+            elif not ch.isspace():
+                self._expect_actions = False
+            index += 1
+        self._pos = index
+        return completed
@@ -0,0 +1,68 @@
+"""Provider token usage and latency accounting."""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any
+
+
+@dataclass
+class ProviderUsage:
+    """Token counts from a Messages API `usage` object."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    def update(self, payload: Any) -> None:
+        # Streaming sends usage in `message_start` and cumulative output in `message_delta`.
+        if not isinstance(payload, dict):
+            return
+        for item in fields(self):
+            value = payload.get(item.name)
+            if isinstance(value, int):
+                setattr(self, item.name, value)
+
+
+class ProviderUsageStats:
+    """Running totals that make prompt-cache savings visible per sidecar process."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.cache_hit_requests = 0
+        self.totals = ProviderUsage()
+        self._latency_ms = {"cached": [0, 0], "uncached": [0, 0]}
+        self._ttft_ms = {"cached": [0, 0], "uncached": [0, 0]}
+
+    def record(self, usage: ProviderUsage, *, latency_ms: int, ttft_ms: int | None) -> None:
+        self.requests += 1
+        for item in fields(usage):
+            setattr(self.totals, item.name, getattr(self.totals, item.name) + getattr(usage, item.name))
+        bucket = "cached" if usage.cache_read_input_tokens > 0 else "uncached"
+        if bucket == "cached":
+            self.cache_hit_requests += 1
+        self._latency_ms[bucket][0] += latency_ms
+        self._latency_ms[bucket][1] += 1
+        if ttft_ms is not None:
+            self._ttft_ms[bucket][0] += ttft_ms
+            self._ttft_ms[bucket][1] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        prompt_tokens = (
+            self.totals.input_tokens + self.totals.cache_creation_input_tokens + self.totals.cache_read_input_tokens
+        )
+        return {
+            "requests": self.requests,
+            "cache_hit_requests": self.cache_hit_requests,
+            "input_tokens": self.totals.input_tokens,
+            "output_tokens": self.totals.output_tokens,
+            "cache_creation_input_tokens": self.totals.cache_creation_input_tokens,
+            "cache_read_input_tokens": self.totals.cache_read_input_tokens,
+            "cache_read_ratio": round(self.totals.cache_read_input_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+            "mean_latency_ms": {bucket: _mean(total) for bucket, total in self._latency_ms.items()},
+            "mean_ttft_ms": {bucket: _mean(total) for bucket, total in self._ttft_ms.items()},
+        }
+
+
+def _mean(total: list[int]) -> float | None:
+    return round(total[0] / total[1], 1) if total[1] else None
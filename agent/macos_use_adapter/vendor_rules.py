@@ -0,0 +1,131 @@
+"""
+Vendored macOS-use planner rules, precompiled at packaging time.
+
+Importing `mlx_use.agent.prompts` (or scanning its source) is slow and used to
+sit on the sidecar's startup path. `build_sidecar.sh` now runs
+
+    python -m macos_use_adapter.vendor_rules --output macos_use_adapter/vendor_rules.json
+
+and the adapter reads that artifact the first time it builds a prompt. The
+artifact is keyed by `vendor/macos-use.commit`; a stale one is ignored and
+the rules are compiled from the vendor checkout instead.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import re
+import sys
+
+from core.config import settings
+
+
+ARTIFACT_VERSION = 1
+DEFAULT_ARTIFACT_PATH = Path(__file__).with_name("vendor_rules.json")
+
+
+@dataclass(frozen=True)
+class VendorRules:
+    rules: str
+    loaded: bool
+    source: str
+    commit: str | None = None
+
+
+def vendor_commit(vendor_path: Path | None = None) -> str | None:
+    vendor_path = vendor_path or settings.vendor_macos_use
+    commit_file = vendor_path.with_name(f"{vendor_path.name}.commit")
+    try:
+        return commit_file.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def compile_vendor_rules(vendor_path: Path | None = None) -> VendorRules:
+    """Build the rules from the vendor checkout: import SystemPrompt, else scan its source."""
+    vendor_path = vendor_path or settings.vendor_macos_use
+    commit = vendor_commit(vendor_path)
+    if not vendor_path.exists():
+        return VendorRules(rules="", loaded=False, source="missing", commit=commit)
+
+    sys.path.insert(0, str(vendor_path))
+    try:
+        from mlx_use.agent.prompts import SystemPrompt  # type: ignore
+
+        prompt = SystemPrompt(
+            action_description=(
+                "open_app, click, type, key_combo, scroll, run_applescript, select_menu_item, wait"
+            ),
+            current_date=datetime.now(),
+            max_actions_per_step=4,
+        )
+        return VendorRules(rules=prompt.important_rules(), loaded=True, source="import", commit=commit)
+    except Exception:
+        rules = _rules_from_source(vendor_path)
+        return VendorRules(rules=rules, loaded=bool(rules), source="source", commit=commit)
+    finally:
+        if str(vendor_path) in sys.path:
+            sys.path.remove(str(vendor_path))
+
+
+def _rules_from_source(vendor_path: Path) -> str:
+    prompt_file = vendor_path / "mlx_use" / "agent" / "prompts.py"
+    if not prompt_file.exists():
+        return ""
+
+    content = prompt_file.read_text(encoding="utf-8")
+    match = re.search(
+        r"def important_rules\(self\) -> str:\n\s+\"\"\".*?\"\"\"\n\s+text = \"\"\"(.*?)\"\"\"",
+        content,
+        flags=re.DOTALL,
+    )
+    if not match:
+        return ""
+    return match.group(1).strip()
+
+
+def write_artifact(rules: VendorRules, path: Path = DEFAULT_ARTIFACT_PATH) -> None:
+    payload = {"v": ARTIFACT_VERSION, "commit": rules.commit, "source": rules.source, "rules": rules.rules}
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path: Path = DEFAULT_ARTIFACT_PATH, *, expected_commit: str | None = None) -> VendorRules | None:
+    """
+    Load a prebuilt artifact. When the vendor commit is known (source checkouts)
+    it must match; packaged builds ship without the vendor tree and trust it.
+    """
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("v") != ARTIFACT_VERSION:
+        return None
+    if expected_commit is not None and payload.get("commit") != expected_commit:
+        return None
+    rules = payload.get("rules")
+    if not isinstance(rules, str):
+        return None
+    return VendorRules(rules=rules, loaded=bool(rules), source="artifact", commit=payload.get("commit"))
+
+
+def load_vendor_rules(artifact_path: Path = DEFAULT_ARTIFACT_PATH) -> VendorRules:
+    return read_artifact(artifact_path, expected_commit=vendor_commit()) or compile_vendor_rules()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompile vendored macOS-use planner rules")
+    parser.add_argument("--output", type=Path, default=DEFAULT_ARTIFACT_PATH)
+    args = parser.parse_args()
+    rules = compile_vendor_rules()
+    write_artifact(rules, args.output)
+    print(f"[vendor-rules] {rules.source} rules ({len(rules.rules)} chars) for {rules.commit} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 
 import uvicorn
 from app.main import app as fastapi_app
@@ -22,4 +23,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # Frozen builds re-enter here in ORANGE_CPU_EXECUTOR=process workers.
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,6 @@
+"""AX summary lines in the format the desktop app's reader emits, for tests."""
+from __future__ import annotations
+
+
+def ax_line(index: int, depth: int, role: str, title: str, value: str = "", *, extra: str = "") -> str:
+    return f'[{index}] depth={depth} role={role} title="{title}" value="{value}" enabled=true description=""{extra}'
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+
+# Keep sidecar state (plan cache, telemetry) out of the real app support folder.
+os.environ.setdefault("ORANGE_DATA_DIR", tempfile.mkdtemp(prefix="orange-sidecar-tests-"))
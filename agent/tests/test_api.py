@@ -50,7 +50,7 @@ def test_plan_invalid_key_format(monkeypatch) -> None:
 def test_plan_returns_actions_with_valid_key(monkeypatch) -> None:
     monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-plan-key")
 
-    async def fake_plan_with_anthropic(*, transcript: str, active_app_name: str | None, ax_tree_summary: str | None, api_key: str) -> AdapterResult:  # noqa: ARG001
+    async def fake_plan_with_anthropic(*, transcript: str, active_app_name: str | None, ax_tree_summary: str | None, api_key: str, **_: object) -> AdapterResult:  # noqa: ARG001
         return AdapterResult(
             actions=[Action(id="a1", kind="open_app", target="Safari", expected_outcome="Safari opened")],
             confidence=0.9,
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+
+from core.cpu_executor import CPUExecutor
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.ax_context import compress_ax_summary, parse_ax_summary
+from tests.ax_lines import ax_line
+
+
+def _mail_summary(rows: int = 400) -> str:
+    lines = [
+        ax_line(1, 0, "AXWindow", "Inbox"),
+        ax_line(2, 1, "AXToolbar", "Toolbar"),
+        ax_line(3, 1, "AXTable", "Messages"),
+    ]
+    for index in range(4, rows):
+        lines.append(ax_line(index, 2, "AXRow", f"Weekly newsletter issue {index}"))
+        if index == rows - 20:
+            lines.append(ax_line(9000, 3, "AXStaticText", "Dentist appointment confirmation"))
+    lines.append(ax_line(9001, 1, "AXTextField", "Search", extra=" focused=true"))
+    return "\n".join(lines)
+
+
+def test_compression_keeps_relevant_element_with_ancestors_within_budget() -> None:
+    summary = _mail_summary()
+    compressed = compress_ax_summary(summary, "open the dentist appointment email", budget_chars=2000)
+
+    assert len(compressed) <= 2000 + 60
+    kept = compressed.splitlines()
+    assert any("Dentist appointment" in line for line in kept)
+    # Ancestors of the match come along, and original order is preserved.
+    assert kept[0].startswith("[1] depth=0 role=AXWindow")
+    assert any('title="Messages"' in line for line in kept)
+    assert kept.index(next(line for line in kept if "Dentist" in line)) < kept.index(
+        next(line for line in kept if "focused=true" in line)
+    )
+    assert kept[-1].endswith("less relevant elements omitted")
+    assert "Dentist" not in summary[:2000]
+
+
+def test_short_summary_is_unchanged_and_indented_summaries_parse() -> None:
+    assert compress_ax_summary("AXTextArea: Message #general", "reply thanks", budget_chars=3600) == (
+        "AXTextArea: Message #general"
+    )
+    tree = parse_ax_summary("AXWindow: Notes\n  AXList: Folders\n    AXRow: Groceries\n  AXButton: New Note")
+    assert tree.depths == [0, 1, 2, 1]
+    assert tree.parents == [-1, 0, 1, 0]
+    assert tree.priors[3] > tree.priors[1]
+
+
+def test_provider_prompt_uses_ranked_ax_context() -> None:
+    executor = CPUExecutor(mode="thread", max_workers=1, offload_min_chars=4096)
+    adapter = MacOSUseAdapter(cpu_executor=executor)
+
+    async def build(summary: str) -> str:
+        return await adapter._build_provider_prompt(
+            transcript="open the dentist appointment email", active_app_name="Mail", ax_tree_summary=summary
+        )
+
+    try:
+        prompt = asyncio.run(build(_mail_summary(rows=1200)))
+        assert executor.offloaded_runs == 1
+        asyncio.run(build("AXTextArea: Message #general"))
+        assert executor.offloaded_runs == 1 and executor.inline_runs == 1
+    finally:
+        executor.shutdown()
+    assert "Dentist appointment confirmation" in prompt
+    assert len(prompt) < 4200
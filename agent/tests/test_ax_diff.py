@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+
+from core.schemas import Action, ActionPlan, VerifyRequest
+from core.verifier_service import VerifierService
+from macos_use_adapter.ax_diff import diff_ax_contexts, match_expected_outcomes
+from tests.ax_lines import ax_line
+
+
+def _digest(window: str, lines: list[str]) -> str:
+    return f"app=Mail, window={window}, url=n/a, ax=" + "\n".join(lines)
+
+
+BEFORE = _digest(
+    "Inbox",
+    [
+        ax_line(1, 0, "AXWindow", "Inbox"),
+        ax_line(2, 1, "AXButton", "Compose"),
+        ax_line(3, 1, "AXTextField", "Search"),
+    ],
+)
+AFTER = _digest(
+    "New Message",
+    [
+        ax_line(1, 0, "AXWindow", "New Message"),
+        ax_line(2, 1, "AXTextField", "To", "bob@example.com"),
+        ax_line(3, 1, "AXButton", "Compose"),
+        ax_line(4, 1, "AXTextField", "Search", "invoices"),
+    ],
+)
+
+
+def test_diff_pairs_elements_by_identity_not_position() -> None:
+    diff = diff_ax_contexts(BEFORE, AFTER)
+
+    assert [node.title for node in diff.inserted] == ["To"]
+    assert diff.deleted == []
+    updated = {(before.title, after.title, after.value) for before, after in diff.updated}
+    # Compose moved from [2] to [3] but did not change; Search gained a value; the window was renamed.
+    assert ("Search", "Search", "invoices") in updated
+    assert ("Inbox", "New Message", "") in updated
+    assert not any(after.title == "Compose" for _, after in diff.updated)
+    assert len(diff_ax_contexts(AFTER, AFTER)) == 0
+
+
+def test_expected_outcomes_are_matched_per_action() -> None:
+    results = match_expected_outcomes(
+        [
+            "New message window appears",
+            "To field contains bob@example.com",
+            "Mail is frontmost",
+            "Search results for receipts",
+            "Calendar event created",
+            None,
+        ],
+        BEFORE,
+        AFTER,
+    )
+
+    statuses = [result.status for result in results]
+    assert statuses == ["success", "success", "success", "failure", "unverified", "unverified"]
+    assert any("New Message" in label for label in results[0].matched)
+    assert results[1].matched[0].startswith("inserted AXTextField")
+    # Already frontmost before the plan ran: accepted, with lower confidence.
+    assert results[2].confidence < results[0].confidence
+
+
+def test_role_words_alone_do_not_confirm_an_outcome() -> None:
+    inbox = _digest("Inbox", [ax_line(1, 0, "AXWindow", "Inbox"), ax_line(2, 1, "AXButton", "Compose")])
+    untitled_opened = _digest(
+        "Inbox",
+        [
+            ax_line(1, 0, "AXWindow", "Inbox"),
+            ax_line(2, 1, "AXButton", "Compose"),
+            ax_line(3, 0, "AXWindow", "Untitled"),
+        ],
+    )
+    retitled = _digest("Inbox (3)", [ax_line(1, 0, "AXWindow", "Inbox (3)"), ax_line(2, 1, "AXButton", "Compose")])
+    closed = _digest("Inbox", [ax_line(2, 0, "AXButton", "Compose")])
+
+    [opened] = match_expected_outcomes(["Compose window opened"], inbox, untitled_opened)
+    assert opened.status != "success"
+    [renamed] = match_expected_outcomes(["Window closed"], inbox, retitled)
+    assert renamed.status != "success"
+    # A deleted window is itself the evidence for "closed".
+    [gone] = match_expected_outcomes(["Window closed"], inbox, closed)
+    assert gone.status == "success"
+
+
+def test_verifier_pinpoints_failed_step_and_resumes_from_it() -> None:
+    plan = ActionPlan(
+        session_id="ax-diff",
+        actions=[
+            Action(id="a1", kind="click", target="Compose", expected_outcome="New message window appears"),
+            Action(id="a2", kind="type", text="bob@example.com", expected_outcome="To field contains bob@example.com"),
+            Action(id="a3", kind="type", text="Invoices", expected_outcome="Subject set to Quarterly invoices"),
+            Action(id="a4", kind="key_combo", key_combo="cmd+enter", expected_outcome="Sent folder lists the message"),
+        ],
+        confidence=0.8,
+        risk_level="low",
+        requires_confirmation=False,
+    )
+    request = VerifyRequest(
+        session_id="ax-diff",
+        action_plan=plan,
+        execution_result="success",
+        before_context=BEFORE,
+        after_context=AFTER,
+    )
+
+    response = asyncio.run(VerifierService().verify(request))
+
+    assert response.status == "failure"
+    assert [result.status for result in response.action_results] == ["success", "success", "failure", "failure"]
+    assert response.reason is not None and response.reason.startswith("Action a3:")
+    assert [action.id for action in response.corrective_actions] == ["retry_a3", "retry_a4"]
+
+
+def test_verifier_succeeds_when_all_outcomes_observed() -> None:
+    plan = ActionPlan(
+        session_id="ax-diff",
+        actions=[Action(id="a1", kind="click", target="Compose", expected_outcome="New message window appears")],
+        confidence=0.8,
+        risk_level="low",
+        requires_confirmation=False,
+    )
+    request = VerifyRequest(
+        session_id="ax-diff",
+        action_plan=plan,
+        execution_result="success",
+        before_context=BEFORE,
+        after_context=AFTER,
+    )
+
+    response = asyncio.run(VerifierService().verify(request))
+
+    assert response.status == "success"
+    assert response.action_results[0].action_id == "a1"
+    assert response.confidence >= 0.9
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from core import planner_service as planner_module
+
+
+client = TestClient(app)
+
+
+def _receive_until(websocket, request_id: str) -> tuple[dict, list[dict]]:
+    events: list[dict] = []
+    while True:
+        frame = websocket.receive_json()
+        if frame["type"] == "response" and frame["id"] == request_id:
+            return frame, events
+        events.append(frame)
+
+
+def test_channel_multiplexes_requests_and_session_events(monkeypatch) -> None:
+    monkeypatch.setattr(planner_module, "settings", replace(planner_module.settings, enable_remote_llm=False))
+
+    with client.websocket_connect("/v1/channel") as websocket:
+        websocket.send_json({"id": "sub-1", "op": "subscribe", "body": {"session_id": "ws-a"}})
+        ack, _ = _receive_until(websocket, "sub-1")
+        assert ack["ok"] is True
+
+        websocket.send_json({"id": "plan-1", "op": "plan", "body": {"session_id": "ws-a", "transcript": "open Safari"}})
+        websocket.send_json(
+            {"id": "tel-1", "op": "telemetry", "body": {"session_id": "ws-b", "stage": "plan", "status": "ok"}}
+        )
+        frames: list[dict] = []
+        responses: dict[str, dict] = {}
+        while len(responses) < 2 or not any(
+            frame["type"] == "event" and frame["event"]["event"] == "planning_completed" for frame in frames
+        ):
+            frame = websocket.receive_json()
+            if frame["type"] == "response":
+                responses[frame["id"]] = frame
+            else:
+                frames.append(frame)
+
+        plan = responses["plan-1"]
+        assert plan["ok"] is True and plan["body"]["actions"][0]["kind"] == "open_app"
+        assert responses["tel-1"]["body"]["status"] == "accepted"
+        names = [frame["event"]["event"] for frame in frames]
+        assert names[0] == "planning_started" and "planning_completed" in names
+        event_ids = [frame["event_id"] for frame in frames]
+        assert event_ids == sorted(event_ids)
+        assert all(frame["event"]["session_id"] == "ws-a" for frame in frames)
+
+        # A later subscriber on the same connection resumes after the last id it saw.
+        websocket.send_json(
+            {"id": "sub-2", "op": "subscribe", "body": {"session_id": "ws-a", "last_event_id": event_ids[-2]}}
+        )
+        _receive_until(websocket, "sub-2")
+        replayed = websocket.receive_json()
+        assert replayed["event_id"] == event_ids[-1]
+
+        websocket.send_json({"id": "unsub-1", "op": "unsubscribe", "body": {"session_id": "ws-a"}})
+        unsubscribed, _ = _receive_until(websocket, "unsub-1")
+        assert unsubscribed["body"]["subscribed"] is True
+
+
+def test_channel_reports_errors_per_request_and_keeps_the_connection() -> None:
+    with client.websocket_connect("/v1/channel") as websocket:
+        websocket.send_json({"id": "bad-op", "op": "plan.unknown", "body": {}})
+        unknown, _ = _receive_until(websocket, "bad-op")
+        assert unknown["ok"] is False and unknown["error"]["error_code"] == "unknown_op"
+
+        websocket.send_json({"id": "bad-body", "op": "verify", "body": {"session_id": "ws-c"}})
+        invalid, _ = _receive_until(websocket, "bad-body")
+        assert invalid["error"]["status_code"] == 422 and "action_plan" in invalid["error"]["message"]
+
+        websocket.send_text("not json")
+        malformed = websocket.receive_json()
+        assert malformed["id"] is None and malformed["error"]["error_code"] == "invalid_request"
+
+        websocket.send_json(
+            {"id": "step-1", "op": "verify.step", "body": {"session_id": "ws-c", "context": "[1] role=AXWindow"}}
+        )
+        step, _ = _receive_until(websocket, "step-1")
+        assert step["ok"] is True and step["body"]["status"] == "baseline"
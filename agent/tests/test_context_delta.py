@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+from difflib import SequenceMatcher
+import random
+import time
+
+from core.context_delta import context_delta
+from core.schemas import ActionPlan, VerifyRequest
+from core.verifier_service import VerifierService
+
+
+ROLES = ["AXButton", "AXTextField", "AXStaticText", "AXRow", "AXCell", "AXMenuItem"]
+
+
+def _context(rng: random.Random, lines: int) -> list[str]:
+    return [
+        f'{"  " * rng.randint(0, 4)}[{index}] depth={rng.randint(0, 4)} role={rng.choice(ROLES)} '
+        f'title="{rng.choice(["Send", "Save", "Inbox", "Subject", "Draft"])} {rng.randint(0, 999)}" '
+        f'value="{rng.randint(0, 99_999)}"'
+        for index in range(lines)
+    ]
+
+
+def _mutated(rng: random.Random, lines: list[str], fraction: float, mode: str) -> list[str]:
+    lines = list(lines)
+    for _ in range(max(1, int(len(lines) * fraction))):
+        index = rng.randrange(len(lines))
+        if mode == "edit":
+            lines[index] = lines[index].replace('value="', 'value="x')
+        elif mode == "delete":
+            lines.pop(index)
+        elif mode == "insert":
+            lines.insert(index, _context(rng, 1)[0])
+        else:
+            lines[index] = _context(rng, 1)[0]
+    return lines
+
+
+def _corpus() -> list[tuple[str, str]]:
+    rng = random.Random(7)
+    pairs = []
+    for size in (8, 40, 120):
+        for fraction in (0.02, 0.1, 0.3, 0.6):
+            for mode in ("edit", "delete", "insert", "replace"):
+                before = _context(rng, size)
+                pairs.append(("\n".join(before), "\n".join(_mutated(rng, before, fraction, mode))))
+    return pairs
+
+
+def test_delta_is_calibrated_against_sequence_matcher() -> None:
+    for before, after in _corpus():
+        expected = 1 - SequenceMatcher(a=before, b=after, autojunk=False).ratio()
+        estimate = context_delta(before, after)
+        if expected <= 0.06:
+            assert abs(estimate - expected) <= 0.02, (expected, estimate)
+        # The verifier's thresholds (0.01 for "changed", 0.05 for high confidence) agree.
+        assert (estimate >= 0.01) == (expected >= 0.01) or abs(expected - 0.01) < 0.003
+        if expected > 0.08:
+            assert estimate > 0.05
+
+
+def test_identical_and_disjoint_contexts() -> None:
+    context = "\n".join(_context(random.Random(1), 200))
+    assert context_delta(context, context) == 0.0
+    assert context_delta(context, "") == 1.0
+    assert context_delta("Inbox", "Sent") > 0.5
+
+
+def test_runtime_is_bounded_for_large_rewritten_contexts() -> None:
+    rng = random.Random(3)
+    before = "\n".join(_context(rng, 8000))
+    after = "\n".join(_context(rng, 8000))
+    assert len(before) > 400_000
+
+    started = time.perf_counter()
+    delta = context_delta(before, after)
+    elapsed = time.perf_counter() - started
+
+    assert delta > 0.05
+    assert elapsed < 0.5
+
+
+def test_verifier_detects_single_value_change_in_large_context() -> None:
+    before = "\n".join(_context(random.Random(5), 2000))
+    after = before.replace('value="', 'value="Sent ', 1)
+    plan = ActionPlan(session_id="delta", actions=[], confidence=0.8, risk_level="low", requires_confirmation=False)
+
+    def verify(after_context: str) -> str:
+        request = VerifyRequest(
+            session_id="delta",
+            action_plan=plan,
+            execution_result="success",
+            before_context=before,
+            after_context=after_context,
+        )
+        return asyncio.run(VerifierService().verify(request)).status
+
+    assert verify(before) == "failure"
+    # One edited value out of 2000 elements stays below the 0.01 "changed" threshold, as it did with difflib.
+    assert verify(after) == "failure"
+    assert verify("\n".join(_mutated(random.Random(6), before.split("\n"), 0.2, "replace"))) == "success"
+
+
+def test_edit_past_the_clipped_span_of_a_long_line_counts() -> None:
+    rng = random.Random(3)
+    lines = _context(rng, 10)
+    text = " ".join(f"word{index}" for index in range(80))
+    before = "\n".join([*lines, f'[10] depth=1 role=AXTextArea value="{text}"'])
+    after = "\n".join([*lines, f'[10] depth=1 role=AXTextArea value="{text} and a reply appended here"'])
+
+    expected = 1 - SequenceMatcher(a=before, b=after, autojunk=False).ratio()
+    estimate = context_delta(before, after)
+    assert expected > 0.01
+    assert abs(estimate - expected) <= 0.005, (expected, estimate)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from core.cpu_executor import CPUExecutor, LoopLagMonitor
+from core.schemas import Action, ActionPlan, VerifyRequest
+from core.verifier_service import VerifierService
+from macos_use_adapter.adapter import parse_provider_text
+
+
+def _spin(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+def test_small_inputs_stay_inline_and_large_ones_are_offloaded() -> None:
+    executor = CPUExecutor(mode="thread", max_workers=1, offload_min_chars=1000)
+
+    async def scenario() -> tuple[int, int, int]:
+        return (
+            threading.get_ident(),
+            await executor.run(threading.get_ident, size=10),
+            await executor.run(threading.get_ident, size=5000),
+        )
+
+    try:
+        loop_thread, small, large = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert small == loop_thread
+    assert large != loop_thread
+    assert executor.snapshot()["inline_runs"] == 1
+    assert executor.snapshot()["offloaded_runs"] == 1
+
+
+def test_offloading_keeps_event_loop_lag_low() -> None:
+    async def max_lag(mode: str) -> float:
+        executor = CPUExecutor(mode=mode, max_workers=1, offload_min_chars=0)
+        monitor = LoopLagMonitor(interval_s=0.005)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        await executor.run(_spin, 0.3, size=1)
+        await asyncio.sleep(0.02)  # let the probe record the late wake-up
+        await monitor.stop()
+        executor.shutdown()
+        return monitor.snapshot()["max_ms"]
+
+    inline_lag = asyncio.run(max_lag("inline"))
+    threaded_lag = asyncio.run(max_lag("thread"))
+
+    assert inline_lag >= 200
+    assert threaded_lag < inline_lag / 2
+
+
+def test_verifier_and_provider_parsing_run_in_process_pool() -> None:
+    executor = CPUExecutor(mode="process", max_workers=1, offload_min_chars=0)
+    plan = ActionPlan(
+        session_id="process-pool",
+        actions=[Action(id="a1", kind="click", target="Compose", expected_outcome="Compose window opens")],
+        confidence=0.8,
+        risk_level="low",
+        requires_confirmation=False,
+    )
+    request = VerifyRequest(
+        session_id="process-pool",
+        action_plan=plan,
+        execution_result="success",
+        before_context='[1] depth=0 role=AXWindow title="Inbox" value=""',
+        after_context='[1] depth=0 role=AXWindow title="Compose" value=""',
+    )
+    text = '{"summary":"s","confidence":0.8,"actions":[{"id":"a1","kind":"click","target":"Send"}]}'
+
+    async def scenario() -> tuple[str, int]:
+        response = await VerifierService(cpu_executor=executor).verify(request)
+        parsed = await executor.run(parse_provider_text, text, size=len(text))
+        return response.status, len(parsed.actions)
+
+    try:
+        status, parsed_actions = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert status == "success"
+    assert parsed_actions == 1
+    assert executor.offloaded_runs == 2
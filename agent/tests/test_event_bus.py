@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+
+from core.event_bus import EventBus
+from core.schemas import Action, StreamEvent
+
+
+def _progress(index: int) -> StreamEvent:
+    return StreamEvent(session_id="s", event="planning_progress", message=f"p{index}", progress=index)
+
+
+def _action(index: int) -> StreamEvent:
+    action = Action(id=f"a{index}", kind="wait")
+    return StreamEvent(session_id="s", event="planning_action", message=f"a{index}", action=action)
+
+
+async def _received_by_slow_subscriber(policy: str, events: list[StreamEvent]) -> tuple[list[str], dict[str, int]]:
+    bus = EventBus(queue_size=3, replay_events=0, overflow_policy=policy)
+    stream = bus.subscribe("s")
+    # Register the subscriber, then publish everything before it gets to read.
+    first = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    for event in events:
+        await bus.publish(event)
+    received: list[str] = []
+    pending = first
+    while True:
+        try:
+            received.append((await asyncio.wait_for(pending, timeout=0.05)).event.message)
+        except (StopAsyncIteration, asyncio.TimeoutError):
+            break
+        pending = asyncio.ensure_future(anext(stream))
+    snapshot = bus.snapshot()
+    await stream.aclose()
+    return received, snapshot
+
+
+def test_overflow_policies_bound_the_queue_and_count_what_was_lost() -> None:
+    events = [_progress(0), _action(1), _progress(2), _progress(3), _action(4), _progress(5)]
+
+    dropped, dropped_stats = asyncio.run(_received_by_slow_subscriber("drop_oldest", events))
+    assert dropped == ["p3", "a4", "p5"]
+    assert dropped_stats["dropped_events"] == 3
+
+    coalesced, coalesced_stats = asyncio.run(_received_by_slow_subscriber("coalesce", events))
+    # Actions are never coalesced away; superseded progress is.
+    assert coalesced == ["a1", "a4", "p5"]
+    assert coalesced_stats["coalesced_events"] == 3 and coalesced_stats["dropped_events"] == 0
+
+    disconnected, disconnected_stats = asyncio.run(_received_by_slow_subscriber("disconnect", events))
+    # The stream ends; the client reconnects with Last-Event-ID instead of silently missing events.
+    assert disconnected == []
+    assert disconnected_stats["disconnected_subscribers"] == 1
+    assert disconnected_stats["dropped_events"] == 4
+
+
+def test_idle_sessions_are_evicted_and_counters_track_subscribers() -> None:
+    async def scenario() -> tuple[dict[str, int], dict[str, int]]:
+        bus = EventBus(idle_ttl_s=0)
+        stream = bus.subscribe("watched")
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        await bus.publish(StreamEvent(session_id="abandoned", event="planning_started", message="m"))
+        await bus.publish(StreamEvent(session_id="watched", event="planning_started", message="m"))
+        await pending
+        await bus.publish(StreamEvent(session_id="watched", event="planning_generated", message="m"))
+        live = bus.snapshot()
+        await stream.aclose()
+        await bus.publish(StreamEvent(session_id="other", event="planning_started", message="m"))
+        return live, bus.snapshot()
+
+    live, after = asyncio.run(scenario())
+
+    assert live["subscribers"] == 1 and live["queued_events"] == 1
+    assert live["sessions"] == 1  # "abandoned" had nobody listening and went idle
+    assert after["subscribers"] == 0
+    assert after["sessions"] == 1 and after["evicted_sessions"] == 2
+
+
+def test_events_are_encoded_once_and_idle_streams_get_heartbeats(monkeypatch) -> None:
+    encodes = 0
+    original = StreamEvent.model_dump_json
+
+    def counting_dump_json(self, **kwargs):
+        nonlocal encodes
+        encodes += 1
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(StreamEvent, "model_dump_json", counting_dump_json)
+
+    async def scenario() -> tuple[list[bytes], list[bytes]]:
+        bus = EventBus()
+        streams = [bus.stream_sse("s", heartbeat_s=0) for _ in range(3)]
+        firsts = [asyncio.ensure_future(anext(stream)) for stream in streams]
+        await asyncio.sleep(0)
+        await bus.publish(_action(1))
+        frames = list(await asyncio.gather(*firsts))
+        for stream in streams:
+            await stream.aclose()
+
+        idle = bus.stream_sse("s", last_event_id=bus.last_event_id, heartbeat_s=0.01)
+        beats = [await asyncio.wait_for(anext(idle), timeout=1) for _ in range(2)]
+        await idle.aclose()
+        return frames, beats
+
+    frames, beats = asyncio.run(scenario())
+
+    assert encodes == 1
+    assert frames[0] is frames[1] is frames[2]
+    assert frames[0].startswith(b"id: 1\nevent: planning_action\ndata: {")
+    assert beats == [b": keepalive\n\n", b": keepalive\n\n"]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+
+from app import main
+from core.event_bus import EventBus
+from core.schemas import StreamEvent
+
+
+def _event(session_id: str, name: str, message: str = "") -> StreamEvent:
+    return StreamEvent(session_id=session_id, event=name, message=message or name)
+
+
+async def _take(stream, count: int) -> list:
+    items = [await asyncio.wait_for(anext(stream), timeout=1) for _ in range(count)]
+    await stream.aclose()
+    return items
+
+
+def test_late_subscriber_replays_the_session_and_resumes_from_last_event_id() -> None:
+    bus = EventBus()
+
+    async def scenario() -> tuple[list[int], list[str], list[str]]:
+        await bus.publish(_event("s1", "planning_started"))
+        await bus.publish(_event("other", "planning_started"))
+        await bus.publish(_event("s1", "planning_generated"))
+
+        late = await _take(bus.subscribe("s1"), 2)
+
+        resumed_stream = bus.subscribe("s1", last_event_id=late[0].id)
+        first = await asyncio.wait_for(anext(resumed_stream), timeout=1)
+        await bus.publish(_event("s1", "planning_completed"))
+        second = await asyncio.wait_for(anext(resumed_stream), timeout=1)
+        await resumed_stream.aclose()
+        return (
+            [published.id for published in late],
+            [published.event.event for published in late],
+            [first.event.event, second.event.event],
+        )
+
+    ids, late_names, resumed_names = asyncio.run(scenario())
+
+    assert ids == sorted(ids) and ids[0] < ids[1]
+    assert late_names == ["planning_started", "planning_generated"]
+    assert resumed_names == ["planning_generated", "planning_completed"]
+
+
+def test_finished_sessions_are_collected_and_capacity_is_bounded() -> None:
+    async def scenario() -> tuple[int, int, int]:
+        expiring = EventBus(replay_ttl_s=0)
+        await expiring.publish(_event("done", "planning_completed"))
+        await expiring.publish(_event("running", "planning_started"))
+        after_ttl = expiring.buffered_sessions()
+
+        bounded = EventBus(max_sessions=2)
+        listener = bounded.subscribe("watched")
+        await bounded.publish(_event("watched", "planning_started"))
+        await asyncio.wait_for(anext(listener), timeout=1)
+        for session_id in ("a", "b", "c"):
+            await bounded.publish(_event(session_id, "planning_started"))
+        with_listener = bounded.buffered_sessions()
+        replay = await _take(bounded.subscribe("c"), 1)
+        await listener.aclose()
+        return after_ttl, with_listener, len(replay)
+
+    after_ttl, with_listener, replayed = asyncio.run(scenario())
+
+    assert after_ttl == 1
+    # The subscribed session survives eviction; "c" evicted the idle "a" and "b".
+    assert with_listener == 2
+    assert replayed == 1
+
+
+def test_sse_stream_emits_ids_and_honours_last_event_id() -> None:
+    async def scenario() -> list[str]:
+        await main._event_bus.publish(_event("sse-session", "planning_started"))
+        await main._event_bus.publish(_event("sse-session", "planning_completed"))
+        first_id = main._event_bus.last_event_id - 1
+        response = await main.events("sse-session", last_event_id=str(first_id))
+        return await _take(response.body_iterator, 1)
+
+    (chunk,) = asyncio.run(scenario())
+
+    lines = chunk.decode().splitlines()
+    assert lines[0] == f"id: {main._event_bus.last_event_id}"
+    assert lines[1] == "event: planning_completed"
+    assert lines[2].startswith("data: ")
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+
+from core.schemas import Action
+from macos_use_adapter.adapter import AdapterResult
+from macos_use_adapter.hedging import HedgeStats, run_hedged
+
+
+def _result(model: str) -> AdapterResult:
+    return AdapterResult(
+        actions=[Action(id="a1", kind="click", target=model)],
+        confidence=0.9,
+        summary=model,
+        warnings=[],
+        model=model,
+    )
+
+
+def test_hedge_fires_after_delay_and_cancels_slow_primary() -> None:
+    delays = {"slow-model": 1.0, "fast-model": 0.01}
+    finished: list[str] = []
+
+    async def attempt(model: str, _on_action) -> AdapterResult:
+        await asyncio.sleep(delays[model])
+        finished.append(model)
+        return _result(model)
+
+    stats = HedgeStats()
+    result = asyncio.run(
+        run_hedged(attempt, primary_model="slow-model", hedge_model="fast-model", hedge_after_s=0.05, on_action=None, stats=stats)
+    )
+
+    assert result.model == "fast-model"
+    assert finished == ["fast-model"]
+    snapshot = stats.snapshot()
+    assert snapshot["hedged"] == 1 and snapshot["hedge_wins"] == 1 and snapshot["cancelled"] == 1
+
+
+def test_fast_primary_does_not_hedge() -> None:
+    async def attempt(model: str, _on_action) -> AdapterResult:
+        return _result(model)
+
+    stats = HedgeStats()
+    result = asyncio.run(
+        run_hedged(attempt, primary_model="simple", hedge_model="complex", hedge_after_s=0.5, on_action=None, stats=stats)
+    )
+    assert result.model == "simple"
+    assert stats.snapshot()["hedge_rate"] == 0.0
+
+
+def test_race_streams_only_the_first_emitting_request() -> None:
+    published: list[str] = []
+
+    async def on_action(action: Action, _fraction: float) -> None:
+        published.append(action.target or "")
+
+    async def attempt(model: str, attempt_on_action) -> AdapterResult:
+        await asyncio.sleep(0.01 if model == "complex" else 0.05)
+        for idx in range(2):
+            await attempt_on_action(Action(id=f"a{idx}", kind="click", target=model), 0.5)
+            await asyncio.sleep(0.01)
+        return _result(model)
+
+    stats = HedgeStats()
+    result = asyncio.run(
+        run_hedged(attempt, primary_model="simple", hedge_model="complex", hedge_after_s=None, on_action=on_action, stats=stats)
+    )
+
+    assert result.model == "complex"
+    assert published == ["complex", "complex"]
+    assert stats.snapshot()["raced"] == 1 and stats.snapshot()["cancelled"] == 1
+
+
+def test_streaming_primary_is_not_hedged() -> None:
+    published: list[str] = []
+    launched: list[str] = []
+
+    async def on_action(action: Action, _fraction: float) -> None:
+        published.append(action.target or "")
+
+    async def attempt(model: str, attempt_on_action) -> AdapterResult:
+        launched.append(model)
+        await attempt_on_action(Action(id="a1", kind="click", target=model), 0.5)
+        await asyncio.sleep(0.1)
+        return _result(model)
+
+    stats = HedgeStats()
+    result = asyncio.run(
+        run_hedged(attempt, primary_model="simple", hedge_model="complex", hedge_after_s=0.02, on_action=on_action, stats=stats)
+    )
+
+    assert result.model == "simple"
+    assert launched == ["simple"] and published == ["simple"]
+    assert stats.snapshot()["hedged"] == 0
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.http_pool import ProviderConnectionPool
+
+
+def _provider_response(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/v1/messages":
+        return httpx.Response(
+            200,
+            json={
+                "content": [
+                    {
+                        "type": "text",
+                        "text": '{"summary":"Open Safari","confidence":0.9,"actions":[{"id":"a1","kind":"open_app","target":"Safari"}]}',
+                    }
+                ]
+            },
+        )
+    return httpx.Response(200, json={"data": []})
+
+
+def test_adapter_reuses_pooled_client_across_calls() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return _provider_response(request)
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0, transport=httpx.MockTransport(handler))
+    adapter = MacOSUseAdapter(http_pool=pool)
+
+    async def scenario() -> None:
+        first_client = pool.client()
+        result = await adapter._plan_with_anthropic(
+            transcript="open Safari",
+            active_app_name="Finder",
+            ax_tree_summary=None,
+            api_key="sk-ant-test-pool-key",
+        )
+        validation = await adapter.validate_provider_key("sk-ant-test-pool-key")
+        assert pool.client() is first_client
+        assert result.actions[0].target == "Safari"
+        assert validation.valid is True
+        await adapter.shutdown()
+
+    asyncio.run(scenario())
+    assert seen == ["/v1/messages", "/v1/models"]
+
+
+def test_pool_start_warms_and_close_stops_keepalive() -> None:
+    methods: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        methods.append(request.method)
+        return httpx.Response(401)
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0.01, transport=httpx.MockTransport(handler))
+
+    async def scenario() -> None:
+        await pool.start()
+        await asyncio.sleep(0.05)
+        await pool.aclose()
+
+    asyncio.run(scenario())
+    assert methods and set(methods) == {"HEAD"}
+    assert len(methods) >= 2
+
+
+def test_pool_start_does_not_wait_for_the_warm_up_request() -> None:
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(5)
+        return httpx.Response(200)
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0, transport=httpx.MockTransport(slow_handler))
+
+    async def scenario() -> float:
+        started = time.perf_counter()
+        await pool.start()
+        elapsed = time.perf_counter() - started
+        await pool.aclose()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.5
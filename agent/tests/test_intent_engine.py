@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main as app_main
+from app.main import app
+from macos_use_adapter.intent_engine import LocalIntentEngine
+
+
+engine = LocalIntentEngine()
+client = TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("transcript", "app_name", "expected"),
+    [
+        ("Open Slack.", "Finder", [("open_app", "Slack")]),
+        ("please switch to chrome", None, [("open_app", "Google Chrome")]),
+        ("open www.example.pizza", "Safari", [("open_app", "Safari"), ("key_combo", "cmd+l"), ("type", "https://www.example.pizza"), ("key_combo", "enter")]),
+        ("Go to GitHub.com/Foo/Bar.", "Safari", [("open_app", "Safari"), ("key_combo", "cmd+l"), ("type", "https://GitHub.com/Foo/Bar"), ("key_combo", "enter")]),
+        ("go to github.com", "Google Chrome", [("open_app", "Google Chrome"), ("key_combo", "cmd+l"), ("type", "https://github.com"), ("key_combo", "enter")]),
+        ("quit Spotify", None, [("open_app", "Spotify"), ("key_combo", "cmd+q")]),
+        ("close Spotify", None, [("open_app", "Spotify"), ("key_combo", "cmd+q")]),
+        ("close", "Safari", [("key_combo", "cmd+w")]),
+        ("close it", "Safari", [("key_combo", "cmd+w")]),
+        ("close this", "Safari", [("key_combo", "cmd+w")]),
+        ("scroll up a lot", None, [("scroll", "up 20")]),
+        ("scroll down", None, [("scroll", "down 8")]),
+        ("open a new tab", "Safari", [("key_combo", "cmd+t")]),
+        ("copy that", None, [("key_combo", "cmd+c")]),
+        ("undo", None, [("key_combo", "cmd+z")]),
+        ("choose the file menu new window", None, [("select_menu_item", "File > New Window")]),
+        ("new folder", "Finder", [("key_combo", "cmd+shift+n")]),
+    ],
+)
+def test_local_intents_produce_plans(transcript: str, app_name: str | None, expected: list[tuple[str, str]]) -> None:
+    match = engine.match(transcript, app_name=app_name)
+    assert match is not None
+    assert match.confidence >= 0.85
+    assert [(a.kind, a.target or a.key_combo or a.text) for a in match.actions] == expected
+
+
+@pytest.mark.parametrize(
+    "transcript",
+    [
+        "open Safari and go to openai.com",
+        "reply to the last email saying I'll be late",
+        "click the send button",
+        "open my latest email",
+        "new folder",
+        "close the app",
+        "close this app",
+        "quit",
+        "exit",
+        "quit this app",
+        "exit it",
+        "open readme.md",
+        "open report.pdf",
+        "open main.py",
+        "go to notes.txt",
+    ],
+)
+def test_non_trivial_commands_fall_through(transcript: str) -> None:
+    match = engine.match(transcript, app_name="Mail")
+    assert match is None or match.confidence < 0.85
+
+
+def test_plan_endpoint_answers_local_intent_without_provider(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-local-intent")
+
+    async def fail_if_called(**_: object) -> None:
+        raise AssertionError("provider must not be called for local intents")
+
+    monkeypatch.setattr(app_main._planner._adapter, "_plan_with_anthropic", fail_if_called)
+    response = client.post(
+        "/v1/plan",
+        json={"session_id": "session-local", "transcript": "scroll down a little", "app": {"name": "Safari"}},
+    )
+    assert response.status_code == 200
+    assert response.json()["actions"][0]["target"] == "down 4"
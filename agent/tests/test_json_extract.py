@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import random
+
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.json_extract import JSONObjectExtractor, extract_json_object
+
+
+PLAN = {
+    "summary": "Reply in Slack",
+    "confidence": 0.82,
+    "actions": [
+        {"id": "a1", "kind": "open_app", "target": "Slack"},
+        {"id": "a2", "kind": "key_combo", "key_combo": "cmd+k", "expected_outcome": "Quick switcher {open}"},
+        {"id": "a3", "kind": "type", "text": "design-review ] \"channel\" \\ }"},
+        {"id": "a4", "kind": "key_combo", "key_combo": "enter"},
+    ],
+}
+PLAN_TEXT = json.dumps(PLAN)
+
+
+def test_extracts_object_from_prose_and_code_fences() -> None:
+    for wrapped in (
+        PLAN_TEXT,
+        f"Here is the plan:\n```json\n{PLAN_TEXT}\n```\nLet me know!",
+        f"Using {{braces}} in prose and a stray {{ before it: {PLAN_TEXT}",
+    ):
+        result = extract_json_object(wrapped)
+        assert result is not None and not result.truncated
+        assert result.payload == PLAN
+    assert extract_json_object("I cannot help with that.") is None
+
+
+def test_every_truncation_point_salvages_exactly_the_complete_actions() -> None:
+    """Fuzz corpus: cut the plan at every offset, with and without a prose prefix."""
+    ends = [PLAN_TEXT.index(json.dumps(action)) + len(json.dumps(action)) for action in PLAN["actions"]]
+    for prefix in ("", "Sure, here you go:\n```json\n"):
+        for cut in range(len(PLAN_TEXT)):
+            result = extract_json_object(prefix + PLAN_TEXT[:cut])
+            expected = sum(1 for end in ends if end <= cut)
+            if result is None:
+                assert expected == 0
+                continue
+            assert result.truncated
+            actions = result.payload.get("actions", [])
+            assert actions == PLAN["actions"][: len(actions)]
+            assert result.salvaged_actions == len(actions) == expected
+
+
+def test_chunked_feed_matches_single_pass_and_random_noise_never_raises() -> None:
+    rng = random.Random(1234)
+    for _ in range(200):
+        extractor = JSONObjectExtractor()
+        position = 0
+        while position < len(PLAN_TEXT):
+            step = rng.randint(1, 9)
+            extractor.feed(PLAN_TEXT[position : position + step])
+            position += step
+        result = extractor.finish()
+        assert result is not None and result.payload == PLAN
+
+    alphabet = '{}[]",:\\ ab1\n'
+    for _ in range(500):
+        noise = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        result = extract_json_object(noise)
+        assert result is None or isinstance(result.payload, dict)
+
+
+def test_truncated_provider_response_keeps_salvaged_actions() -> None:
+    adapter = MacOSUseAdapter()
+    result = adapter._result_from_provider_text(
+        PLAN_TEXT[: PLAN_TEXT.index('{"id": "a4"') + 12],
+        transcript="reply in the design review channel",
+        active_app_name="Slack",
+        streamed_actions=[],
+    )
+    assert [action.id for action in result.actions] == ["a1", "a2", "a3"]
+    assert result.confidence == 0.6
+    assert result.recovery_guidance is None
+    assert any("salvaged 3 complete actions" in warning for warning in result.warnings)
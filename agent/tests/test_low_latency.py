@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+import json
+
+import httpx
+import pytest
+
+from core import planner_service as planner_module
+from core.config import settings
+from core.event_bus import EventBus
+from core.plan_cache import PlanCache
+from core.planner_service import PlannerService
+from core.schemas import PlanRequest
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.http_pool import ProviderConnectionPool
+from macos_use_adapter.intent_engine import LocalIntentEngine
+
+
+PLAN_TEXT = '{"summary":"Archive","confidence":0.8,"actions":[{"id":"a1","kind":"key_combo","key_combo":"ctrl+cmd+a"}]}'
+LONG_TASK = "reply to the last message from the dentist and then archive the whole thread"
+AX_SUMMARY = "\n".join(
+    f'[{index}] depth=2 role=AXRow title="Newsletter issue {index}" value="" enabled=true description=""'
+    for index in range(1, 400)
+)
+
+
+def _planner(monkeypatch, captured: list[httpx.Request]) -> PlannerService:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-low-latency")
+    monkeypatch.setattr(planner_module, "settings", replace(settings, stream_planning=False))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured.append(request)
+        return httpx.Response(200, json={"content": [{"type": "text", "text": PLAN_TEXT}], "usage": {}})
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0, transport=httpx.MockTransport(handler))
+    return PlannerService(
+        EventBus(),
+        adapter=MacOSUseAdapter(http_pool=pool),
+        plan_cache=PlanCache(capacity=8, ttl_s=60, path=None),
+    )
+
+
+def _plan(planner: PlannerService, session_id: str, transcript: str, *, low_latency: bool, app: str = "Mail"):
+    request = PlanRequest(
+        session_id=session_id,
+        transcript=transcript,
+        app={"name": app},
+        ax_tree_summary=AX_SUMMARY,
+        preferences={"low_latency": low_latency},
+    )
+    return asyncio.run(planner.plan(request))
+
+
+def test_fast_mode_tightens_the_provider_request(monkeypatch) -> None:
+    captured: list[httpx.Request] = []
+    planner = _planner(monkeypatch, captured)
+
+    fast = _plan(planner, "session-fast", LONG_TASK, low_latency=True)
+    standard = _plan(planner, "session-standard", LONG_TASK, low_latency=False)
+
+    assert fast.planning_mode == "fast" and standard.planning_mode == "standard"
+    fast_body, standard_body = (json.loads(request.content) for request in captured)
+    assert fast_body["model"] == settings.model_simple
+    assert standard_body["model"] == settings.model_complex
+    assert fast_body["max_tokens"] < standard_body["max_tokens"]
+    assert "Safety rules excerpt" not in fast_body["system"][0]["text"]
+    assert "Safety rules excerpt" in standard_body["system"][0]["text"]
+    assert len(fast_body["messages"][0]["content"]) < len(standard_body["messages"][0]["content"]) // 2
+    assert captured[0].extensions["timeout"]["read"] < captured[1].extensions["timeout"]["read"]
+
+
+def test_fast_mode_sends_unknown_app_names_to_the_provider_and_reports_per_mode_stats(monkeypatch) -> None:
+    captured: list[httpx.Request] = []
+    planner = _planner(monkeypatch, captured)
+
+    local = _plan(planner, "session-local-fast", "scroll down", low_latency=True, app="Finder")
+    fast = _plan(planner, "session-remote-fast", "open Figma", low_latency=True, app="Finder")
+    standard = _plan(planner, "session-remote-standard", "open Figma", low_latency=False, app="Finder")
+
+    assert local.actions[0].kind == "scroll"
+    assert fast.actions[0].key_combo == "ctrl+cmd+a" and standard.planning_mode == "standard"
+    assert [json.loads(request.content)["max_tokens"] for request in captured] == [settings.fast_max_tokens, 900]
+
+    planner.record_verification("session-local-fast", success=True)
+    modes = planner.planner_stats().modes
+    assert modes["fast"].plans == 2 and modes["standard"].plans == 1
+    assert modes["fast"].verify_success_rate == 1.0
+    assert modes["standard"].verifications == 0
+
+
+@pytest.mark.parametrize("transcript", ["start recording", "start over", "activate dark mode", "open github"])
+def test_fast_mode_does_not_guess_apps_from_verbs(transcript: str) -> None:
+    match = LocalIntentEngine().match(transcript, app_name="Safari")
+    assert match is None or match.confidence < settings.fast_local_intent_min_confidence
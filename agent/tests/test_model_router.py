@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from fastapi.testclient import TestClient
+
+from app import main as app_main
+from app.main import app
+from core.config import settings
+from core.schemas import Action
+from macos_use_adapter import model_router as router_module
+from macos_use_adapter.adapter import AdapterResult
+from macos_use_adapter.model_router import ModelRouter
+
+
+client = TestClient(app)
+SIMPLE = settings.model_simple
+COMPLEX = settings.model_complex
+LONG_TASK = "reply to the last message and then archive the thread"
+
+
+def _routing_settings(monkeypatch, **overrides: object) -> None:
+    monkeypatch.setattr(
+        router_module,
+        "settings",
+        replace(
+            settings, router_min_samples=3, router_latency_target_ms=2000, router_success_target=0.8, **overrides
+        ),
+    )
+
+
+def test_router_uses_heuristic_until_measured_then_cheapest_model_meeting_targets(monkeypatch) -> None:
+    _routing_settings(monkeypatch)
+    router = ModelRouter()
+    assert router.choose("open notes", app="Notes").model == SIMPLE
+    assert router.choose(LONG_TASK, app="Slack").model == COMPLEX
+    assert router.choose(LONG_TASK, app="Slack", preferred_model="custom-model").reason == "preferred_model"
+
+    for _ in range(3):
+        router.record_plan(SIMPLE, "Slack", latency_ms=600, parsed=True)
+    decision = router.choose(LONG_TASK, app="Slack")
+    assert decision.model == SIMPLE and "meeting" in decision.reason
+
+
+def test_router_escalates_when_cheap_model_misses_success_target(monkeypatch) -> None:
+    _routing_settings(monkeypatch)
+    router = ModelRouter()
+    for _ in range(4):
+        router.record_plan(SIMPLE, "Mail", latency_ms=500, parsed=True)
+        router.record_verification(SIMPLE, "Mail", success=False)
+    assert router.choose("archive this", app="Mail").model == COMPLEX
+
+    for _ in range(3):
+        router.record_plan(COMPLEX, "Mail", latency_ms=5000, parsed=True)
+    # Neither meets the targets: fall back to the best observed success rate.
+    decision = router.choose("archive this", app="Mail")
+    assert decision.model == COMPLEX and decision.reason.startswith("No model meets targets")
+
+
+def test_router_probes_the_cheaper_model_and_returns_to_it_once_it_recovers(monkeypatch) -> None:
+    _routing_settings(monkeypatch, router_window=5, router_probe_every=3)
+    router = ModelRouter()
+    for _ in range(5):
+        router.record_plan(SIMPLE, "Mail", latency_ms=500, parsed=False)
+    for _ in range(3):
+        router.record_plan(COMPLEX, "Mail", latency_ms=900, parsed=True)
+
+    chosen: list[str] = []
+    for _ in range(30):
+        decision = router.choose("archive this", app="Mail")
+        chosen.append(decision.model)
+        if decision.model == SIMPLE and decision.reason.startswith("Probe"):
+            # The cheap model has recovered: its probes now succeed.
+            router.record_plan(SIMPLE, "Mail", latency_ms=400, parsed=True)
+        elif decision.model == COMPLEX:
+            router.record_plan(COMPLEX, "Mail", latency_ms=900, parsed=True)
+
+    assert chosen[:3] == [COMPLEX, COMPLEX, SIMPLE]
+    decision = router.choose("archive this", app="Mail")
+    assert decision.model == SIMPLE and "meeting" in decision.reason
+
+
+def test_low_latency_prefers_the_cheapest_model_without_bypassing_overrides_or_stats(monkeypatch) -> None:
+    monkeypatch.setattr(
+        router_module,
+        "settings",
+        replace(
+            settings,
+            router_min_samples=3,
+            router_latency_target_ms=2000,
+            router_success_target=0.8,
+            model_overrides_raw="xcode:override-model",
+        ),
+    )
+    router = ModelRouter()
+    assert router.choose(LONG_TASK, app="Slack", fast_only=True).model == SIMPLE
+    assert router.choose("build the project", app="Xcode", fast_only=True).model == "override-model"
+
+    for _ in range(3):
+        router.record_plan(SIMPLE, "Slack", latency_ms=500, parsed=False)
+    decision = router.choose(LONG_TASK, app="Slack", fast_only=True)
+    assert decision.model == COMPLEX and decision.reason.startswith("Escalated")
+
+
+def test_preferred_model_and_verify_feedback_surface_in_models_endpoint(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-router")
+    models_used: list[str | None] = []
+
+    async def fake_plan_with_anthropic(*, model: str | None = None, **_: object) -> AdapterResult:
+        models_used.append(model)
+        app_main._planner._adapter._router.record_plan(model, "Numbers", latency_ms=321, parsed=True)
+        return AdapterResult(
+            actions=[Action(id="a1", kind="type", text="=SUM(A1:A9)")],
+            confidence=0.8,
+            summary="Sum column",
+            warnings=[],
+            model=model,
+        )
+
+    monkeypatch.setattr(app_main._planner._adapter, "_plan_with_anthropic", fake_plan_with_anthropic)
+    payload = {
+        "session_id": "session-router",
+        "transcript": "sum the first column for the router test",
+        "app": {"name": "Numbers"},
+        "preferences": {"preferred_model": "claude-router-test"},
+    }
+    plan = client.post("/v1/plan", json=payload)
+    assert plan.status_code == 200
+    assert models_used == ["claude-router-test"]
+
+    verify = client.post(
+        "/v1/verify",
+        json={
+            "session_id": "session-router",
+            "action_plan": plan.json(),
+            "execution_result": "success",
+            "before_context": "A10: empty",
+            "after_context": "A10: 4,512",
+        },
+    )
+    assert verify.json()["status"] == "success"
+
+    body = client.get("/v1/models").json()
+    stats = next(item for item in body["stats"] if item["model"] == "claude-router-test" and item["app"] == "numbers")
+    assert stats["verifications"] == 1 and stats["verify_success_rate"] == 1.0
+    assert body["recent_decisions"][0]["reason"] == "preferred_model"
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main as app_main
+from app.main import app
+from core.plan_cache import PlanCache, plan_cache_key
+from core.schemas import Action
+from macos_use_adapter.adapter import AdapterResult
+
+
+client = TestClient(app)
+
+
+def _key(transcript: str, ax: str | None = None) -> str:
+    return plan_cache_key(transcript=transcript, app_key="com.tinyspeck.slackmacgap", model="m", ax_tree_summary=ax)
+
+
+def test_cache_key_normalizes_transcript_but_not_context() -> None:
+    assert _key("Open Slack.") == _key("  open   slack ")
+    assert _key("open slack") != _key("open slack", ax="AXWindow: General")
+
+
+def test_cache_lru_ttl_and_persistence(tmp_path: Path) -> None:
+    path = tmp_path / "plan_cache.json"
+    action = [Action(id="a1", kind="open_app", target="Slack")]
+    cache = PlanCache(capacity=2, ttl_s=60, path=path)
+    cache.put("k1", actions=action, confidence=0.9, summary="one")
+    cache.put("k2", actions=action, confidence=0.9, summary="two")
+    assert cache.get("k1") is not None
+    cache.put("k3", actions=action, confidence=0.9, summary="three")
+    assert cache.get("k2") is None
+    assert cache.stats()["evictions"] == 1
+
+    reloaded = PlanCache(capacity=2, ttl_s=60, path=path)
+    entry = reloaded.get("k1")
+    assert entry is not None and entry.actions[0].target == "Slack"
+    assert reloaded.get("k3") is not None
+
+    short_lived = PlanCache(capacity=2, ttl_s=0.01, path=None)
+    short_lived.put("k1", actions=action, confidence=0.9, summary="one")
+    time.sleep(0.02)
+    assert short_lived.get("k1") is None
+
+
+def test_cache_writes_are_debounced_off_the_event_loop(tmp_path: Path) -> None:
+    path = tmp_path / "plan_cache.json"
+    action = [Action(id="a1", kind="open_app", target="Slack")]
+    cache = PlanCache(capacity=8, ttl_s=60, path=path, flush_delay_s=0.05)
+
+    async def scenario() -> tuple[bool, int]:
+        for index in range(5):
+            cache.put(f"k{index}", actions=action, confidence=0.9, summary=str(index))
+        written_inline = path.exists()
+        await asyncio.sleep(0.2)
+        return written_inline, len(PlanCache(capacity=8, ttl_s=60, path=path))
+
+    written_inline, reloaded = asyncio.run(scenario())
+    assert not written_inline and reloaded == 5
+
+    async def last_change() -> None:
+        cache.invalidate("k0")
+        cache.flush()
+
+    asyncio.run(last_change())
+    assert len(PlanCache(capacity=8, ttl_s=60, path=path)) == 4
+
+
+def test_plan_cache_hit_skips_provider_and_failed_verify_invalidates(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-cache-key")
+    calls: list[str] = []
+
+    async def fake_plan_with_anthropic(*, transcript: str, **_: object) -> AdapterResult:
+        calls.append(transcript)
+        return AdapterResult(
+            actions=[Action(id="a1", kind="open_app", target="Slack", expected_outcome="Slack opened")],
+            confidence=0.9,
+            summary="Open Slack",
+            warnings=[],
+        )
+
+    monkeypatch.setattr(app_main._planner._adapter, "_plan_with_anthropic", fake_plan_with_anthropic)
+    payload = {
+        "session_id": "session-cache",
+        "transcript": "Open Slack for the cache test",
+        "app": {"name": "Finder", "bundle_id": "com.apple.finder"},
+    }
+    before = client.get("/v1/plan/cache").json()
+
+    assert client.post("/v1/plan", json=payload).status_code == 200
+    second = client.post("/v1/plan", json={**payload, "transcript": "open slack for the cache test!"})
+    assert second.status_code == 200
+    assert second.json()["actions"][0]["target"] == "Slack"
+    assert len(calls) == 1
+
+    stats = client.get("/v1/plan/cache").json()
+    assert stats["hits"] == before["hits"] + 1
+    assert stats["misses"] == before["misses"] + 1
+
+    verify_payload = {
+        "session_id": "session-cache",
+        "action_plan": second.json(),
+        "execution_result": "failure",
+    }
+    assert client.post("/v1/verify", json=verify_payload).json()["status"] == "failure"
+    assert client.get("/v1/plan/cache").json()["invalidations"] == before["invalidations"] + 1
+
+    assert client.post("/v1/plan", json=payload).status_code == 200
+    assert len(calls) == 2
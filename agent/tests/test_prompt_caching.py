@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+
+from macos_use_adapter.adapter import MacOSUseAdapter, planning_profile
+from macos_use_adapter.http_pool import ProviderConnectionPool
+
+
+def test_static_prompt_is_sent_as_system_blocks_and_usage_is_recorded() -> None:
+    payloads: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        return httpx.Response(
+            200,
+            json={
+                "content": [{"type": "text", "text": '{"summary":"s","actions":[{"id":"a1","kind":"wait"}]}'}],
+                "usage": {
+                    "input_tokens": 120,
+                    "output_tokens": 40,
+                    "cache_creation_input_tokens": 0,
+                    "cache_read_input_tokens": 900,
+                },
+            },
+        )
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0, transport=httpx.MockTransport(handler))
+    adapter = MacOSUseAdapter(http_pool=pool)
+
+    async def plan(transcript: str) -> None:
+        await adapter._plan_with_anthropic(
+            transcript=transcript,
+            active_app_name="Slack",
+            ax_tree_summary="AXTextArea: Message #general",
+            api_key="sk-ant-test-cache-prompt",
+        )
+
+    async def scenario() -> None:
+        await plan("reply thanks")
+        await plan("scroll down")
+        await adapter.shutdown()
+
+    asyncio.run(scenario())
+
+    first, second = payloads
+    assert first["system"] == second["system"]
+    assert "Return strictly JSON" in first["system"][0]["text"]
+    user_prompt = first["messages"][0]["content"]
+    assert "reply thanks" in user_prompt and "AXTextArea" in user_prompt
+    assert "Return strictly JSON" not in user_prompt
+
+    usage = adapter.usage_snapshot()
+    assert usage["requests"] == 2
+    assert usage["cache_hit_requests"] == 2
+    assert usage["cache_read_input_tokens"] == 1800
+    assert usage["mean_latency_ms"]["cached"] is not None
+
+
+def test_real_system_prompt_carries_no_cache_breakpoint() -> None:
+    adapter = MacOSUseAdapter()
+    for low_latency in (False, True):
+        blocks = adapter._build_system_blocks("Slack", profile=planning_profile(low_latency=low_latency))
+        assert not any("cache_control" in block for block in blocks)
+        # Under the 1024-token minimum cacheable prompt, where a breakpoint would be ignored.
+        assert sum(len(block["text"]) for block in blocks) < 1024 * 4
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from core import planner_service as planner_module
+from core.config import settings
+from core.event_bus import EventBus
+from core.plan_cache import PlanCache
+from core.planner_service import PlannerService
+from core.schemas import ActionPlan, PlanRequest, ReplanRequest
+from macos_use_adapter import adapter as adapter_module
+from macos_use_adapter import model_router as router_module
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.http_pool import ProviderConnectionPool
+
+
+TRANSCRIPT = "email bob that the demo moved to friday"
+AX_SUMMARY = '[1] depth=0 role=AXWindow title="New Message" value="" enabled=true description=""'
+PLAN_TEXT = json.dumps(
+    {
+        "summary": "Email Bob",
+        "confidence": 0.8,
+        "actions": [
+            {"id": "a1", "kind": "open_app", "target": "Mail"},
+            {"id": "a2", "kind": "click", "target": "New Message", "expected_outcome": "Compose window appears"},
+            {"id": "a3", "kind": "type", "text": "bob@example.com", "expected_outcome": "To field filled"},
+        ],
+    }
+)
+REPLAN_TEXT = json.dumps(
+    {
+        "summary": "Use the menu instead",
+        "confidence": 0.7,
+        "actions": [
+            {"id": "a1", "kind": "select_menu_item", "target": "File > New Message"},
+            {"id": "a2", "kind": "type", "text": "bob@example.com"},
+        ],
+    }
+)
+
+
+def _planner(monkeypatch, payloads: list[dict]) -> PlannerService:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-replan")
+    monkeypatch.setattr(planner_module, "settings", replace(settings, stream_planning=False))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        text = REPLAN_TEXT if len(payloads) > 1 else PLAN_TEXT
+        return httpx.Response(200, json={"content": [{"type": "text", "text": text}], "usage": {}})
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0, transport=httpx.MockTransport(handler))
+    return PlannerService(
+        EventBus(),
+        adapter=MacOSUseAdapter(http_pool=pool),
+        plan_cache=PlanCache(capacity=8, ttl_s=60, path=None),
+    )
+
+
+def test_replan_asks_only_for_the_suffix_behind_the_shared_prefix(monkeypatch) -> None:
+    payloads: list[dict] = []
+    planner = _planner(monkeypatch, payloads)
+    preferences = {"low_latency": False}
+
+    async def scenario() -> tuple[ActionPlan, ActionPlan]:
+        plan = await planner.plan(
+            PlanRequest(session_id="s-replan", transcript=TRANSCRIPT, app={"name": "Mail"}, preferences=preferences)
+        )
+        suffix = await planner.replan(
+            ReplanRequest(
+                session_id="s-replan",
+                transcript=TRANSCRIPT,
+                action_plan=plan,
+                failed_step_index=1,
+                failure_reason="Compose window did not appear",
+                ax_tree_summary=AX_SUMMARY,
+                app={"name": "Mail"},
+                preferences=preferences,
+            )
+        )
+        return plan, suffix
+
+    plan, suffix = asyncio.run(scenario())
+
+    first, second = payloads
+    assert second["system"] == first["system"]
+    assert second["max_tokens"] < first["max_tokens"]
+    prompt = second["messages"][0]["content"]
+    completed, _, rest = prompt.partition("Failed step:")
+    assert "do not repeat" in completed and '"target":"Mail"' in completed
+    assert '"target":"New Message"' in rest and "Compose window did not appear" in rest
+    assert "numbered from a2" in prompt
+
+    assert [action.id for action in suffix.actions] == ["a2", "a3"]
+    assert suffix.actions[0].kind == "select_menu_item"
+    assert plan.actions[0].id == "a1"
+    assert planner.planner_stats().replans == 1
+
+
+def test_replan_routes_to_the_same_model_as_the_plan(monkeypatch) -> None:
+    payloads: list[dict] = []
+    planner = _planner(monkeypatch, payloads)
+    monkeypatch.setattr(router_module, "settings", replace(settings, model_overrides_raw="notes:claude-notes-override"))
+
+    async def scenario(app_name: str, preferences: dict) -> None:
+        session_id = f"s-{app_name}"
+        plan = await planner.plan(
+            PlanRequest(session_id=session_id, transcript=TRANSCRIPT, app={"name": app_name}, preferences=preferences)
+        )
+        await planner.replan(
+            ReplanRequest(
+                session_id=session_id,
+                transcript=TRANSCRIPT,
+                action_plan=plan,
+                failed_step_index=1,
+                app={"name": app_name},
+                preferences=preferences,
+            )
+        )
+
+    asyncio.run(scenario("Mail", {"low_latency": False, "preferred_model": "claude-pinned"}))
+    asyncio.run(scenario("Notes", {"low_latency": False}))
+    assert [payload["model"] for payload in payloads] == [
+        "claude-pinned", "claude-pinned", "claude-notes-override", "claude-notes-override"
+    ]
+
+
+def test_replan_falls_back_to_retrying_the_remaining_steps(monkeypatch) -> None:
+    monkeypatch.setattr(adapter_module, "settings", replace(adapter_module.settings, enable_remote_llm=False))
+    plan = {
+        "session_id": "s-fallback",
+        "actions": [
+            {"id": "a1", "kind": "open_app", "target": "Mail"},
+            {"id": "a2", "kind": "click", "target": "New Message"},
+        ],
+        "confidence": 0.8,
+        "risk_level": "low",
+        "requires_confirmation": False,
+    }
+    client = TestClient(app)
+
+    response = client.post(
+        "/v1/plan/replan",
+        json={"session_id": "s-fallback", "transcript": TRANSCRIPT, "action_plan": plan, "failed_step_index": 1},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [action["id"] for action in body["actions"]] == ["a2"]
+    assert body["actions"][0]["target"] == "New Message"
+    assert body["confidence"] == 0.5
+
+    out_of_range = client.post(
+        "/v1/plan/replan",
+        json={"session_id": "s-fallback", "transcript": TRANSCRIPT, "action_plan": plan, "failed_step_index": 2},
+    )
+    assert out_of_range.status_code == 422
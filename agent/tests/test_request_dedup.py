@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app import main as app_main
+from app.main import app
+from core.event_bus import EventBus
+from core.plan_cache import PlanCache
+from core import planner_service as planner_module
+from core.config import settings
+from core.planner_service import PlannerService, PlanningCancelledError
+from core.schemas import Action, PlanRequest
+from macos_use_adapter.adapter import AdapterResult, MacOSUseAdapter
+
+
+client = TestClient(app)
+TRANSCRIPT = "summarize the open document into three bullet points"
+
+
+def _counting_provider(calls: list[str], delay_s: float = 0.0):
+    async def fake_plan_with_anthropic(*, transcript: str, **_: object) -> AdapterResult:
+        calls.append(transcript)
+        await asyncio.sleep(delay_s)
+        return AdapterResult(
+            actions=[Action(id="a1", kind="type", text="- one")],
+            confidence=0.8,
+            summary="Summarize",
+            warnings=[],
+        )
+
+    return fake_plan_with_anthropic
+
+
+def test_identical_in_flight_plans_share_one_provider_call(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-singleflight")
+    calls: list[str] = []
+    adapter = MacOSUseAdapter()
+    monkeypatch.setattr(adapter, "_plan_with_anthropic", _counting_provider(calls, delay_s=0.05))
+    planner = PlannerService(EventBus(), adapter=adapter, plan_cache=PlanCache(capacity=8, ttl_s=60, path=None))
+    request = PlanRequest(session_id="session-sf", transcript=TRANSCRIPT, app={"name": "Pages"})
+
+    async def scenario():
+        return await asyncio.gather(planner.plan(request), planner.plan(request), planner.plan(request))
+
+    plans = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(plan.actions[0].text == "- one" for plan in plans)
+    stats = planner.planner_stats()
+    assert stats.coalesced == 2 and stats.plan_requests == 3
+
+
+def test_idempotency_key_replays_stored_plan(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-idempotency")
+    calls: list[str] = []
+    monkeypatch.setattr(app_main._planner._adapter, "_plan_with_anthropic", _counting_provider(calls))
+    payload = {"session_id": "session-idem", "transcript": TRANSCRIPT, "app": {"name": "Pages"}}
+    headers = {"Idempotency-Key": "utterance-7f1c"}
+
+    first = client.post("/v1/plan", json=payload, headers=headers)
+    # Same key, different context: still the stored result, no second provider call.
+    second = client.post("/v1/plan", json={**payload, "ax_tree_summary": "AXWindow"}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(calls) == 1
+    assert client.get("/v1/plan/stats").json()["idempotent_replays"] >= 1
+
+
+def test_idempotency_key_reused_for_a_different_request_is_rejected(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-REDACTED")
+    monkeypatch.setattr(app_main._planner._adapter, "_plan_with_anthropic", _counting_provider([]))
+    payload = {"session_id": "session-idem-a", "transcript": TRANSCRIPT, "app": {"name": "Pages"}}
+    headers = {"Idempotency-Key": "utterance-91ab"}
+
+    assert client.post("/v1/plan", json=payload, headers=headers).status_code == 200
+    for changed in ({"session_id": "session-idem-b"}, {"transcript": "delete the second paragraph"}):
+        response = client.post("/v1/plan", json={**payload, **changed}, headers=headers)
+        assert response.status_code == 422
+        assert response.json()["detail"]["error_code"] == "idempotency_key_mismatch"
+
+    simulate = {"session_id": "session-idem-a", "transcript": TRANSCRIPT, "app": {"name": "Pages"}}
+    assert client.post("/v1/plan/simulate", json=simulate, headers=headers).status_code == 200
+    response = client.post("/v1/plan/simulate", json={**simulate, "session_id": "session-idem-c"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_plan_reuses_simulation_for_same_session(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-sim-reuse")
+    calls: list[str] = []
+    monkeypatch.setattr(app_main._planner._adapter, "_plan_with_anthropic", _counting_provider(calls))
+    payload = {"session_id": "session-confirm", "transcript": TRANSCRIPT + " please", "app": {"name": "Pages"}}
+
+    simulation = client.post("/v1/plan/simulate", json=payload)
+    assert simulation.status_code == 200 and simulation.json()["is_valid"] is True
+    plan = client.post("/v1/plan", json={**payload, "ax_tree_summary": "AXDocument: Report"})
+    assert plan.status_code == 200
+    assert plan.json()["actions"][0]["text"] == "- one"
+    assert len(calls) == 1
+
+
+def _cancellable_planner(monkeypatch, cancelled: list[str]) -> tuple[PlannerService, EventBus]:
+    """Planner whose provider hangs on TRANSCRIPT and answers anything else at once."""
+    fast = _counting_provider([])
+
+    async def provider(*, transcript: str, **kwargs: object) -> AdapterResult:
+        if transcript != TRANSCRIPT:
+            return await fast(transcript=transcript, **kwargs)
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(transcript)
+            raise
+        raise AssertionError("provider call should have been cancelled")
+
+    adapter = MacOSUseAdapter()
+    monkeypatch.setattr(adapter, "_plan_with_anthropic", provider)
+    event_bus = EventBus()
+    planner = PlannerService(event_bus, adapter=adapter, plan_cache=PlanCache(capacity=8, ttl_s=60, path=None))
+    return planner, event_bus
+
+
+def test_newer_utterance_supersedes_in_flight_plan(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-supersede")
+    cancelled: list[str] = []
+    planner, event_bus = _cancellable_planner(monkeypatch, cancelled)
+
+    events: list[str] = []
+    publish = event_bus.publish
+
+    async def recording_publish(event) -> None:
+        events.append(event.event)
+        await publish(event)
+
+    monkeypatch.setattr(event_bus, "publish", recording_publish)
+
+    async def scenario():
+        first = asyncio.create_task(
+            planner.plan(PlanRequest(session_id="session-newer", transcript=TRANSCRIPT, app={"name": "Pages"}))
+        )
+        await asyncio.sleep(0.02)
+        second = await planner.plan(
+            PlanRequest(session_id="session-newer", transcript=TRANSCRIPT + " instead", app={"name": "Pages"})
+        )
+        with pytest.raises(PlanningCancelledError) as excinfo:
+            await first
+        return second, excinfo.value
+
+    second, error = asyncio.run(scenario())
+    assert second.actions[0].text == "- one"
+    assert error.error_code == "planning_superseded"
+    assert cancelled == [TRANSCRIPT]
+    assert "planning_cancelled" in events
+    assert planner.planner_stats().cancelled_superseded == 1
+
+
+def test_client_disconnect_cancels_provider_call(monkeypatch) -> None:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-disconnect")
+    monkeypatch.setattr(planner_module, "settings", replace(settings, disconnect_poll_interval_s=0.01))
+    cancelled: list[str] = []
+    planner, _ = _cancellable_planner(monkeypatch, cancelled)
+    disconnected = False
+
+    async def is_disconnected() -> bool:
+        return disconnected
+
+    async def scenario() -> PlanningCancelledError:
+        nonlocal disconnected
+        request = PlanRequest(session_id="session-gone", transcript=TRANSCRIPT, app={"name": "Pages"})
+        task = asyncio.create_task(planner.plan(request, is_disconnected=is_disconnected))
+        await asyncio.sleep(0.03)
+        disconnected = True
+        with pytest.raises(PlanningCancelledError) as excinfo:
+            await task
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.error_code == "client_disconnected"
+    assert cancelled == [TRANSCRIPT]
+    assert planner.planner_stats().cancelled_disconnected == 1
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from core import verifier_service
+from core.cpu_executor import CPUExecutor
+from core.schemas import Action, ActionPlan, VerifyRequest, VerifyStepRequest
+from core.verifier_service import VerifierService
+from tests.ax_lines import ax_line
+
+
+client = TestClient(app)
+
+
+INBOX = "\n".join([ax_line(1, 0, "AXWindow", "Inbox"), ax_line(2, 1, "AXButton", "Compose")])
+COMPOSE = "\n".join(
+    [ax_line(1, 0, "AXWindow", "New Message"), ax_line(2, 1, "AXTextField", "To"), ax_line(3, 1, "AXButton", "Compose")]
+)
+ADDRESSED = COMPOSE.replace('title="To" value=""', 'title="To" value="bob@example.com"')
+
+
+def _step(session_id: str, context: str, action: dict | None = None) -> dict:
+    payload: dict = {"session_id": session_id, "context": context}
+    if action is not None:
+        payload["action"] = action
+    response = client.post("/v1/verify/step", json=payload)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_step_verdicts_diff_against_server_held_context() -> None:
+    session_id = "session-steps"
+    baseline = _step(session_id, INBOX)
+    assert baseline["status"] == "baseline"
+
+    first = _step(
+        session_id,
+        COMPOSE,
+        {"id": "a1", "kind": "click", "target": "Compose", "expected_outcome": "New message window appears"},
+    )
+    assert first["step"] == 1
+    assert first["status"] == "success"
+    assert first["action_result"]["action_id"] == "a1"
+
+    # The next step is diffed against COMPOSE, which the sidecar kept from the previous call.
+    second = _step(
+        session_id,
+        COMPOSE,
+        {"id": "a2", "kind": "type", "text": "bob@example.com", "expected_outcome": "To field contains bob@example.com"},
+    )
+    assert second["step"] == 2
+    assert second["status"] == "failure"
+    assert [action["id"] for action in second["corrective_actions"]] == ["retry_a2"]
+
+    third = _step(
+        session_id,
+        ADDRESSED,
+        {"id": "a3", "kind": "type", "text": "bob@example.com", "expected_outcome": "To field contains bob@example.com"},
+    )
+    assert third["step"] == 3
+    assert third["status"] == "success"
+    assert third["action_result"]["matched"][0].startswith("updated AXTextField")
+
+
+def test_step_state_is_bounded_and_expires(monkeypatch) -> None:
+    monkeypatch.setattr(
+        verifier_service,
+        "settings",
+        dataclasses.replace(verifier_service.settings, step_verify_sessions=2, step_verify_ttl_s=60),
+    )
+    verifier = VerifierService()
+    action = Action(id="a1", kind="click", target="Compose", expected_outcome="New message window appears")
+
+    async def step(session_id: str, context: str, with_action: bool = True) -> str:
+        request = VerifyStepRequest(session_id=session_id, context=context, action=action if with_action else None)
+        return (await verifier.verify_step(request)).status
+
+    async def scenario() -> list[str]:
+        for session_id in ("s1", "s2", "s3"):
+            await step(session_id, INBOX, with_action=False)
+        # s1 was evicted by s3; s2 still has its baseline.
+        return [await step("s2", COMPOSE), await step("s1", COMPOSE)]
+
+    assert asyncio.run(scenario()) == ["success", "unverified"]
+
+    monkeypatch.setattr(
+        verifier_service,
+        "settings",
+        dataclasses.replace(verifier_service.settings, step_verify_ttl_s=0),
+    )
+    expiring = VerifierService()
+
+    async def expired() -> str:
+        await expiring.verify_step(VerifyStepRequest(session_id="s4", context=INBOX))
+        await asyncio.sleep(0.01)
+        return (await expiring.verify_step(VerifyStepRequest(session_id="s4", context=COMPOSE, action=action))).status
+
+    assert asyncio.run(expired()) == "unverified"
+
+
+def test_final_verify_releases_step_state() -> None:
+    verifier = VerifierService()
+    plan = ActionPlan(session_id="s5", actions=[], confidence=0.8, risk_level="low", requires_confirmation=False)
+
+    async def scenario() -> str:
+        await verifier.verify_step(VerifyStepRequest(session_id="s5", context=INBOX))
+        await verifier.verify(
+            VerifyRequest(session_id="s5", action_plan=plan, execution_result="success", before_context=INBOX)
+        )
+        request = VerifyStepRequest(session_id="s5", context=COMPOSE, action=Action(id="a1", kind="wait"))
+        return (await verifier.verify_step(request)).status
+
+    assert asyncio.run(scenario()) == "unverified"
+
+
+def test_step_baseline_matches_across_processes() -> None:
+    executor = CPUExecutor(mode="process", max_workers=1, offload_min_chars=10**9)
+    verifier = VerifierService(cpu_executor=executor)
+    context = "\n".join([ax_line(1, 0, "AXWindow", "Inbox"), ax_line(2, 1, "AXRow", "Row 7")])
+    action = Action(id="a1", kind="click", target="Row 7", expected_outcome="Row 7 opened in Inbox")
+
+    async def scenario():
+        # The baseline is parsed in this process and the step in a pool worker with its own hash seed.
+        await verifier.verify_step(VerifyStepRequest(session_id="cross-process", context=context))
+        executor.offload_min_chars = 0
+        return await verifier.verify_step(VerifyStepRequest(session_id="cross-process", context=context, action=action))
+
+    try:
+        response = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert executor.offloaded_runs == 1
+    assert response.status == "success" and response.confidence == 0.55
+    assert response.reason.startswith("Already shown")
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+
+from core.event_bus import EventBus
+from core.planner_service import PlannerService
+from core.schemas import Action, PlanRequest, StreamEvent
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.http_pool import ProviderConnectionPool
+from macos_use_adapter.stream_parser import ActionStreamParser
+
+
+PLAN_TEXT = (
+    '{"summary":"Go to github.com","confidence":0.85,"actions":['
+    '{"id":"a1","kind":"open_app","target":"Safari"},'
+    '{"id":"a2","kind":"key_combo","key_combo":"cmd+l"},'
+    '{"id":"a3","kind":"type","text":"github.com {\\"quoted\\"} ]"}'
+    "]}"
+)
+
+
+def _sse_body(text: str, chunk_size: int = 7) -> bytes:
+    lines = ['event: message_start\ndata: {"type":"message_start"}\n']
+    for start in range(0, len(text), chunk_size):
+        delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[start : start + chunk_size]}}
+        lines.append(f"event: content_block_delta\ndata: {json.dumps(delta)}\n")
+    lines.append('event: message_stop\ndata: {"type":"message_stop"}\n')
+    return "\n".join(lines).encode()
+
+
+def test_action_stream_parser_emits_each_action_once_when_closed() -> None:
+    parser = ActionStreamParser()
+    emitted: list[tuple[int, str]] = []
+    for position, char in enumerate("Here is the plan:\n" + PLAN_TEXT):
+        for _, raw in parser.feed(char):
+            emitted.append((position, raw["id"]))
+
+    assert [action_id for _, action_id in emitted] == ["a1", "a2", "a3"]
+    # The first action is available long before the response finishes.
+    assert emitted[0][0] < len(PLAN_TEXT) * 2 // 3
+
+
+def _stream_plan(
+    monkeypatch, text: str, session_id: str, requests: list[dict] | None = None
+) -> tuple[list[StreamEvent], list[Action]]:
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-stream-key")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests is not None:
+            requests.append(json.loads(request.content))
+        return httpx.Response(200, content=_sse_body(text), headers={"content-type": "text/event-stream"})
+
+    pool = ProviderConnectionPool(keepalive_interval_s=0, transport=httpx.MockTransport(handler))
+    bus = EventBus()
+    planner = PlannerService(bus, adapter=MacOSUseAdapter(http_pool=pool))
+    request = PlanRequest(session_id=session_id, transcript="show me the orange repository on github", app={"name": "Safari"})
+
+    async def scenario() -> tuple[list[StreamEvent], list[Action]]:
+        received: list[StreamEvent] = []
+
+        async def collect() -> None:
+            async for published in bus.subscribe(session_id):
+                event = published.event
+                received.append(event)
+                if event.event == "planning_completed":
+                    return
+
+        collector = asyncio.create_task(collect())
+        await asyncio.sleep(0)
+        plan = await planner.plan(request)
+        await asyncio.wait_for(collector, timeout=1)
+        return received, plan.actions
+
+    return asyncio.run(scenario())
+
+
+def test_streaming_plan_publishes_planning_action_events(monkeypatch) -> None:
+    requests: list[dict] = []
+    events, actions = _stream_plan(monkeypatch, PLAN_TEXT, "session-stream", requests)
+
+    assert requests[0]["stream"] is True
+    action_events = [event for event in events if event.event == "planning_action"]
+    assert [event.step_id for event in action_events] == ["a1", "a2", "a3"]
+    assert action_events[0].action is not None and action_events[0].action.kind == "open_app"
+    progresses = [event.progress or 0 for event in action_events]
+    assert progresses == sorted(progresses)
+    assert [action.id for action in actions] == ["a1", "a2", "a3"]
+    assert actions[2].text == 'github.com {"quoted"} ]'
+
+
+def test_streamed_and_final_default_ids_agree_when_an_action_is_dropped(monkeypatch) -> None:
+    text = (
+        '{"summary":"Go to github.com","confidence":0.85,"actions":['
+        '{"kind":"teleport"},{"kind":"open_app","target":"Safari"},{"kind":"key_combo","key_combo":"cmd+l"}'
+        "]}"
+    )
+    events, actions = _stream_plan(monkeypatch, text, "session-stream-ids")
+
+    streamed = [event.step_id for event in events if event.event == "planning_action"]
+    assert streamed == [action.id for action in actions] == ["a2", "a3"]
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from dataclasses import replace
+import random
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from core import telemetry as telemetry_module
+from core.schemas import TelemetryEvent
+from core.telemetry import LatencyHistogram, TelemetryStore
+
+
+client = TestClient(app)
+
+
+def _event(stage: str, status: str, latency_ms: int | None, app_name: str = "Mail") -> TelemetryEvent:
+    return TelemetryEvent(session_id="s", stage=stage, app=app_name, status=status, latency_ms=latency_ms)
+
+
+def test_histogram_percentiles_stay_within_bucket_precision() -> None:
+    rng = random.Random(7)
+    samples = [int(rng.lognormvariate(6, 1.2)) for _ in range(20_000)]
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.record(sample)
+
+    ordered = sorted(samples)
+    for pct in (50, 95, 99):
+        exact = ordered[int(pct / 100 * len(ordered)) - 1]
+        estimate = histogram.percentile(pct)
+        assert abs(estimate - exact) <= max(1, exact * 0.02)
+    assert histogram.percentile(100) == max(samples)
+    assert len(histogram.counts) < 700
+
+
+def test_store_aggregates_sliding_windows_and_keeps_a_bounded_ring() -> None:
+    store = TelemetryStore(capacity=3, slot_s=10, window_s=3600)
+    now = 1_000_000.0
+    store.record(_event("planning", "completed", 5000), now=now - 900)
+    for latency in (10, 20, 30, 40):
+        store.record(_event("planning", "completed", latency), now=now - 5)
+    store.record(_event("planning", "failed", None), now=now - 5)
+    store.record(_event("executing", "success", 40, app_name="Slack"), now=now)
+
+    summary = store.summary([60, 3600], ["stage"], now=now)
+    recent, hour = summary.windows
+    planning = next(group for group in recent.groups if group.stage == "planning")
+    assert planning.count == 5 and planning.errors == 1 and planning.error_rate == 0.2
+    assert planning.latency_samples == 4 and planning.p50_ms == 20 and planning.max_ms == 40
+    assert next(group for group in hour.groups if group.stage == "planning").max_ms == 5000
+
+    by_app = store.summary([60], ["app", "status"], now=now).windows[0].groups
+    assert {(group.app, group.status) for group in by_app} == {
+        ("Mail", "completed"),
+        ("Mail", "failed"),
+        ("Slack", "success"),
+    }
+
+    assert summary.total_events == 7 and summary.buffered_events == 3
+    assert [event.stage for event in store.recent(10)] == ["planning", "planning", "executing"]
+
+
+def test_summary_endpoint_validates_grouping() -> None:
+    client.post("/v1/telemetry", json={"session_id": "s-sum", "stage": "verifying", "status": "success", "latency_ms": 80})
+
+    response = client.get("/v1/telemetry/summary?windows=60&group_by=stage,status")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["group_by"] == ["stage", "status"]
+    verifying = [group for group in body["windows"][0]["groups"] if group["stage"] == "verifying"]
+    assert verifying and verifying[0]["p99_ms"] is not None
+
+    invalid = client.get("/v1/telemetry/summary?group_by=session_id")
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"]["error_code"] == "invalid_group_by"
+
+
+def test_batch_endpoint_accepts_ndjson_and_arrays_in_one_pass() -> None:
+    lines = [
+        '{"session_id": "s-batch", "stage": "planning", "status": "completed", "latency_ms": 120}',
+        "",
+        '{"session_id": "s-batch", "stage": "executing", "status": "failed", "error_code": "ax_timeout"}',
+    ]
+    response = client.post(
+        "/v1/telemetry/batch", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["accepted"] == 2 and 0 < body["sample_rate"] <= 1 and body["flush_interval_s"] > 0
+
+    array = client.post("/v1/telemetry/batch", json=[{"session_id": "s-batch", "stage": "verifying", "status": "success"}])
+    assert array.json()["accepted"] == 1
+    assert [event["stage"] for event in client.get("/v1/telemetry?limit=3").json()["events"]] == [
+        "planning",
+        "executing",
+        "verifying",
+    ]
+
+    invalid = client.post("/v1/telemetry/batch", content='{"session_id": "s-batch", "stage": "planning"}')
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"]["error_code"] == "invalid_telemetry_batch"
+    assert "0.status" in invalid.json()["detail"]["message"]
+
+
+def test_batching_advice_backs_off_under_load(monkeypatch) -> None:
+    monkeypatch.setattr(
+        telemetry_module,
+        "settings",
+        replace(
+            telemetry_module.settings,
+            telemetry_target_events_per_s=1.0,
+            telemetry_flush_interval_s=5.0,
+            telemetry_max_flush_interval_s=30.0,
+        ),
+    )
+    store = TelemetryStore(slot_s=10, window_s=3600)
+    now = 1_000_000.0
+    for _ in range(30):
+        store.record(_event("planning", "completed", 10), now=now)
+    assert store.batching_advice(now=now) == (1.0, 5.0)
+
+    # 45 more events sampled at 0.5 make 120 over the last minute: twice the target.
+    for _ in range(45):
+        store.record(_event("planning", "completed", 10), now=now, sample_rate=0.5)
+    assert store.batching_advice(now=now) == (0.5, 10.0)
+
+    for _ in range(600):
+        store.record(_event("planning", "completed", 10), now=now)
+    sample_rate, flush_interval_s = store.batching_advice(now=now)
+    assert sample_rate < 0.1 and flush_interval_s == 30.0
+    assert store.batching_advice(now=now + 120) == (1.0, 5.0)
+
+
+def test_summary_undoes_client_side_sampling() -> None:
+    store = TelemetryStore(slot_s=10, window_s=3600)
+    now = 1_000_000.0
+    # 1,000 successes sampled at 0.1 arrive as 100; all 50 errors are sent.
+    for _ in range(100):
+        store.record(_event("executing", "success", 30), now=now, sample_rate=0.1)
+    for _ in range(50):
+        store.record(_event("executing", "failed", 30), now=now, sample_rate=0.1)
+
+    window = store.summary([60], ["stage"], now=now).windows[0]
+    group = window.groups[0]
+    assert window.count == 1050 and group.count == 1050 and group.received == 150
+    assert group.errors == 50 and group.error_rate == round(50 / 1050, 4)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from core.schemas import TelemetryEvent
+from core.telemetry_log import TelemetryLog
+
+
+client = TestClient(app)
+
+
+def _event(index: int) -> TelemetryEvent:
+    return TelemetryEvent(session_id=f"s-{index}", stage="planning", status="completed", latency_ms=index)
+
+
+def test_log_survives_reopen_and_reads_only_the_requested_range(tmp_path) -> None:
+    start = round(time.time()) - 60
+    log = TelemetryLog(tmp_path)
+    for index in range(10):
+        log.append(_event(index), now=start + index)
+        if index % 3 == 2:
+            assert log.flush(now=start + index) == 3
+    assert log.stats().buffered_events == 1
+    log.close()
+
+    segment = next(tmp_path.glob("*.tlog"))
+    # A crash mid-write leaves a torn frame at the tail; it must not hide the frames before it.
+    with segment.open("ab") as handle:
+        handle.write(b"OTL1\xff\xff")
+
+    reopened = TelemetryLog(tmp_path)
+    stats = reopened.stats()
+    assert stats.segments == 1 and stats.oldest_recorded_at == start
+    assert stats.bytes < sum(len(_event(i).model_dump_json()) for i in range(10))
+
+    records = reopened.read(since=start + 3, until=start + 6)
+    assert [record.event.latency_ms for record in records] == [3, 4, 5, 6]
+    assert [record.recorded_at for record in reopened.read(limit=2)] == [start + 8, start + 9]
+
+    reopened.append(_event(42), now=start + 30)
+    assert [record.event.latency_ms for record in reopened.read(since=start + 9)] == [9, 42]
+    reopened.flush(now=start + 30)
+    assert len(list(tmp_path.glob("*.tlog"))) == 2
+
+
+def test_limited_read_does_not_decode_older_frames(tmp_path) -> None:
+    start = round(time.time()) - 60
+    log = TelemetryLog(tmp_path, segment_bytes=1)
+    for index in range(6):
+        log.append(_event(index), now=start + index)
+        log.flush(now=start + index)
+    log.close()
+
+    # Corrupt the payload of the oldest frame; a read that touched it would fail to decompress.
+    oldest = min(tmp_path.glob("*.tlog"))
+    raw = bytearray(oldest.read_bytes())
+    raw[-4:] = b"\x00\x00\x00\x00"
+    oldest.write_bytes(bytes(raw))
+
+    reopened = TelemetryLog(tmp_path)
+    assert [record.event.latency_ms for record in reopened.read(limit=3)] == [3, 4, 5]
+    assert [record.event.latency_ms for record in reopened.read(since=start + 1, limit=10)] == [1, 2, 3, 4, 5]
+
+
+def test_log_rolls_segments_and_applies_size_and_age_retention(tmp_path) -> None:
+    log = TelemetryLog(tmp_path, segment_bytes=1, segment_s=3600, max_bytes=10_000, retention_s=100)
+    for index in range(5):
+        log.append(_event(index), now=float(index))
+        log.flush(now=float(index))
+    assert log.stats().segments == 5
+
+    # Older than retention_s: everything but the segment being written goes.
+    log.append(_event(5), now=500.0)
+    log.flush(now=500.0)
+    assert log.stats().segments == 1
+    assert [record.event.latency_ms for record in log.read()] == [5]
+
+    sized = TelemetryLog(tmp_path / "sized", segment_bytes=1, max_bytes=1)
+    for index in range(4):
+        sized.append(_event(index), now=float(index))
+        sized.flush(now=float(index))
+    assert sized.stats().segments == 1
+    assert len(list((tmp_path / "sized").glob("*.tlog"))) == 1
+
+
+def test_history_endpoint_includes_buffered_events() -> None:
+    client.post("/v1/telemetry", json={"session_id": "s-history", "stage": "executing", "status": "success"})
+
+    response = client.get("/v1/telemetry/history?limit=1")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["events"][0]["event"]["session_id"] == "s-history"
+    assert body["log"]["buffered_events"] + body["log"]["written_events"] >= 1
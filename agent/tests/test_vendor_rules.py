@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from macos_use_adapter import adapter as adapter_module
+from macos_use_adapter.adapter import MacOSUseAdapter
+from macos_use_adapter.vendor_rules import VendorRules, read_artifact, write_artifact
+
+
+def test_artifact_round_trip_is_keyed_by_vendor_commit(tmp_path: Path) -> None:
+    path = tmp_path / "vendor_rules.json"
+    write_artifact(VendorRules(rules="Never delete files.", loaded=True, source="import", commit="abc123"), path)
+
+    loaded = read_artifact(path, expected_commit="abc123")
+    assert loaded is not None and loaded.rules == "Never delete files." and loaded.source == "artifact"
+    assert read_artifact(path, expected_commit="def456") is None
+    # Packaged builds have no vendor checkout to compare against.
+    assert read_artifact(path, expected_commit=None) is not None
+    assert read_artifact(tmp_path / "missing.json") is None
+
+
+def test_vendor_rules_load_on_first_prompt_not_at_construction(monkeypatch, tmp_path: Path) -> None:
+    path = tmp_path / "vendor_rules.json"
+    write_artifact(VendorRules(rules="Confirm before sending.", loaded=True, source="import", commit="abc123"), path)
+    loads: list[Path] = []
+
+    def fake_load() -> VendorRules:
+        loads.append(path)
+        return read_artifact(path)  # type: ignore[return-value]
+
+    monkeypatch.setattr(adapter_module, "load_vendor_rules", fake_load)
+    adapter = MacOSUseAdapter()
+    assert loads == []
+
+    blocks = adapter._build_system_blocks("Mail")
+    assert "Confirm before sending." in blocks[0]["text"]
+    assert adapter.vendor_loaded is True
+    assert len(loads) == 1
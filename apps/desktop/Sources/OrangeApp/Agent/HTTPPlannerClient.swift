@@ -3,10 +3,15 @@ import Foundation
 final class HTTPPlannerClient: PlannerClient {
     private let baseURL: URL
     private let session: URLSession
+    private let telemetryBatcher: TelemetryBatcher
 
     init(baseURL: URL = URL(string: "http://127.0.0.1:7789")!, session: URLSession = .shared) {
         self.baseURL = baseURL
         self.session = session
+        self.telemetryBatcher = TelemetryBatcher(
+            endpoint: baseURL.appendingPathComponent("/v1/telemetry/batch"),
+            session: session
+        )
     }
 
     func plan(request: PlanRequest) async throws -> ActionPlan {
@@ -110,16 +115,7 @@ final class HTTPPlannerClient: PlannerClient {
     }
 
     func telemetry(event: SessionTelemetryEvent) async {
-        do {
-            let endpoint = baseURL.appendingPathComponent("/v1/telemetry")
-            var request = URLRequest(url: endpoint)
-            request.httpMethod = "POST"
-            request.setValue("application/json", forHTTPHeaderField: "Content-Type")
-            request.httpBody = try JSONEncoder().encode(event)
-            _ = try await session.data(for: request)
-        } catch {
-            Logger.error("Telemetry upload failed: \(error.localizedDescription)")
-        }
+        await telemetryBatcher.enqueue(event)
     }
 
     func verify(
@@ -197,6 +193,83 @@ final class HTTPPlannerClient: PlannerClient {
     }
 }
 
+/// Buffers telemetry and posts it as NDJSON, following the sidecar's sample rate and flush interval.
+private actor TelemetryBatcher {
+    private static let maxBatchSize = 200
+    private static let errorStatuses: Set<String> = ["failed", "failure", "error"]
+
+    private let endpoint: URL
+    private let session: URLSession
+    private var pending: [SessionTelemetryEvent] = []
+    private var sampleRate = 1.0
+    private var flushInterval: TimeInterval = 5.0
+    private var flushTask: Task<Void, Never>?
+
+    init(endpoint: URL, session: URLSession) {
+        self.endpoint = endpoint
+        self.session = session
+    }
+
+    func enqueue(_ event: SessionTelemetryEvent) async {
+        // Errors are always kept so error rates stay exact; the sidecar scales the rest back up.
+        let isError = event.errorCode != nil || Self.errorStatuses.contains(event.status.lowercased())
+        guard isError || sampleRate >= 1.0 || Double.random(in: 0 ..< 1) < sampleRate else { return }
+
+        pending.append(event)
+        if pending.count >= Self.maxBatchSize {
+            await flush()
+        } else if flushTask == nil {
+            let delay = flushInterval
+            flushTask = Task { [weak self] in
+                try? await Task.sleep(nanoseconds: UInt64(delay * 1_000_000_000))
+                await self?.flush()
+            }
+        }
+    }
+
+    func flush() async {
+        flushTask?.cancel()
+        flushTask = nil
+        guard !pending.isEmpty else { return }
+        let batch = pending
+        let appliedRate = sampleRate
+        pending.removeAll()
+
+        do {
+            let encoder = JSONEncoder()
+            var body = Data()
+            for event in batch {
+                body.append(try encoder.encode(event))
+                body.append(0x0A)
+            }
+            var components = URLComponents(url: endpoint, resolvingAgainstBaseURL: false)
+            components?.queryItems = [URLQueryItem(name: "sample_rate", value: String(appliedRate))]
+            var request = URLRequest(url: components?.url ?? endpoint)
+            request.httpMethod = "POST"
+            request.setValue("application/x-ndjson", forHTTPHeaderField: "Content-Type")
+            request.httpBody = body
+
+            let (data, _) = try await session.data(for: request)
+            if let advice = try? JSONDecoder().decode(TelemetryBatchAdvice.self, from: data) {
+                sampleRate = min(1.0, max(0.01, advice.sampleRate))
+                flushInterval = max(1.0, advice.flushIntervalS)
+            }
+        } catch {
+            Logger.error("Telemetry upload failed: \(error.localizedDescription)")
+        }
+    }
+}
+
+private struct TelemetryBatchAdvice: Decodable {
+    let sampleRate: Double
+    let flushIntervalS: Double
+
+    enum CodingKeys: String, CodingKey {
+        case sampleRate = "sample_rate"
+        case flushIntervalS = "flush_interval_s"
+    }
+}
+
 private struct ServerErrorDetail {
     let message: String
     let errorCode: String?
@@ -56,6 +56,7 @@ struct PlannerStreamEvent: Codable, Identifiable {
     let stepId: String?
     let severity: String?
     let timestamp: String?
+    let action: AgentAction?
 
     var id: String {
         "\(sessionId)-\(stepId ?? "none")-\(event)-\(message)-\(progress ?? -1)"
@@ -69,6 +70,7 @@ struct PlannerStreamEvent: Codable, Identifiable {
         case stepId = "step_id"
         case severity
         case timestamp
+        case action
     }
 }
 
@@ -14,6 +14,11 @@ pip install -r "$AGENT_DIR/requirements.txt" pyinstaller
 
 rm -rf "$AGENT_DIR/build" "$AGENT_DIR/dist/sidecar_server" "$AGENT_DIR/sidecar_server.spec"
 
+# Precompile vendored planner rules (keyed by vendor/macos-use.commit) so startup never imports them.
+VENDOR_RULES="$AGENT_DIR/macos_use_adapter/vendor_rules.json"
+python -m macos_use_adapter.vendor_rules --output "$VENDOR_RULES"
+python -m benchmarks.bench_startup --rounds 3
+
 pyinstaller \
   --noconfirm \
   --clean \
@@ -23,6 +28,7 @@ pyinstaller \
   --collect-submodules app \
   --collect-submodules core \
   --collect-submodules macos_use_adapter \
+  --add-data "$VENDOR_RULES:macos_use_adapter" \
   "$AGENT_DIR/packaging/sidecar_entry.py"
 
 echo "[sidecar] Built artifact at $AGENT_DIR/dist/sidecar_server"